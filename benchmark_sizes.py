@@ -0,0 +1,129 @@
+"""!@file benchmark_sizes.py
+@brief Python script to benchmark the solver on puzzles of several sizes
+"""
+
+import argparse
+import os
+from time import perf_counter
+
+import numpy as np
+
+from src.engine.grids import solve_grid, BOX_SIZES
+from src.toolkit.generation import generate_grid
+from src.toolkit.input import parse_token_line
+from src.toolkit.output import puzzle_to_token_line
+from src.toolkit.validation import validate_solution
+
+# default fraction of empty squares of the generated puzzles, for each box size
+# (25x25 puzzles with more empty squares have very long tails of solving times)
+EMPTY = {2: 0.75, 3: 0.6, 4: 0.6, 5: 0.45}
+
+parser = argparse.ArgumentParser(
+    description="Solve corpora of puzzles of several sizes (4x4 up to 25x25), and "
+    "report the solving times and search nodes for each size"
+)
+parser.add_argument(
+    "corpora",
+    nargs="*",
+    help="corpus files of one puzzle per line in the token format (default is to "
+    "generate a corpus for each --box)",
+)
+parser.add_argument(
+    "--box",
+    type=int,
+    nargs="+",
+    choices=BOX_SIZES,
+    default=[3, 4, 5],
+    help="box sizes of the generated corpora (default is 3 4 5, for 9x9, 16x16 and "
+    "25x25 puzzles)",
+)
+parser.add_argument(
+    "--count",
+    type=int,
+    default=10,
+    help="number of puzzles in each generated corpus (default is 10)",
+)
+parser.add_argument(
+    "--empty",
+    type=float,
+    default=None,
+    help="fraction of empty squares of the generated puzzles (default is "
+    + ", ".join(f"{EMPTY[box]} for box {box}" for box in BOX_SIZES)
+    + ")",
+)
+parser.add_argument("--seed", type=int, default=0, help="seed of the generator")
+parser.add_argument(
+    "--save",
+    metavar="DIRECTORY",
+    help="directory to save the generated corpora to, one file per size",
+)
+args = parser.parse_args()
+
+if args.count < 1:
+    parser.error("the --count must be at least 1")
+if args.empty is not None and not 0 <= args.empty <= 1:
+    parser.error("the --empty fraction must be within 0-1")
+
+
+def generate_corpus(box, rng):
+    n = box * box
+    empty = EMPTY[box] if args.empty is None else args.empty
+    clues = n * n - round(empty * n * n)
+    return [generate_grid(box, clues, rng=rng) for _ in range(args.count)]
+
+
+def load_corpus(filepath):
+    puzzles = []
+    with open(filepath, "r") as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue  # skip blank lines
+            puzzle = parse_token_line(line)
+            if isinstance(puzzle, str):
+                parser.error(f"{filepath}, line {number}: {puzzle}")
+            puzzles.append(puzzle)
+    return puzzles
+
+
+# corpora as (name, puzzles) pairs
+corpora = []
+if args.corpora:
+    for filepath in args.corpora:
+        corpora.append((filepath, load_corpus(filepath)))
+else:
+    rng = np.random.default_rng(args.seed)
+    for box in args.box:
+        n = box * box
+        puzzles = generate_corpus(box, rng)
+        corpora.append((f"{n}x{n}", puzzles))
+        if args.save is not None:
+            os.makedirs(args.save, exist_ok=True)
+            filepath = os.path.join(args.save, f"grids_{n}x{n}.txt")
+            with open(filepath, "w") as file:
+                for puzzle in puzzles:
+                    file.write(puzzle_to_token_line(puzzle) + "\n")
+            print(f"Corpus saved in {filepath}")
+
+width = max([16] + [len(name) + 2 for name, _ in corpora])
+print(
+    f"{'Corpus':<{width}}{'Puzzles':>8}{'Solved':>8}{'Mean ms':>10}{'Median ms':>11}"
+    f"{'Max ms':>10}{'Mean nodes':>12}{'Max nodes':>11}"
+)
+for name, puzzles in corpora:
+    times, nodes, solved = [], [], 0
+    for puzzle in puzzles:
+        stats = {}
+        start = perf_counter()
+        solution = solve_grid(puzzle, stats=stats)
+        times.append((perf_counter() - start) * 1000)
+        nodes.append(stats["nodes"])
+        if not isinstance(solution, str):
+            assert validate_solution(puzzle, solution) == "Valid"
+            solved += 1
+
+    print(
+        f"{name:<{width}}{len(puzzles):>8}{solved:>8}{np.mean(times):>10.1f}"
+        f"{np.median(times):>11.1f}{np.max(times):>10.1f}{np.mean(nodes):>12.1f}"
+        f"{np.max(nodes):>11}",
+        flush=True,
+    )
@@ -0,0 +1,48 @@
+"""!@file dedup_corpus.py
+@brief Python script to remove equivalent puzzles from a corpus file
+"""
+
+import argparse
+from time import time
+
+from src.toolkit.dedup import dedup_corpus, IndexFullError
+
+parser = argparse.ArgumentParser(
+    description="Keep one representative of each class of equivalent puzzles in a corpus"
+)
+parser.add_argument("corpus", help="corpus file to deduplicate")
+parser.add_argument("output", help="corpus file to write the representatives to")
+parser.add_argument(
+    "mapping", help="text file to write the class of each puzzle to (one per line)"
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="number of worker processes computing fingerprints (default is 1)",
+)
+parser.add_argument(
+    "--capacity",
+    type=int,
+    default=1 << 22,
+    help="number of slots in the hash index, a power of 2 (default is 4194304); "
+    "the index uses 12 bytes per slot and holds up to 3/4 as many classes",
+)
+args = parser.parse_args()
+
+if args.workers < 1:
+    parser.error("the number of --workers must be at least 1")
+if args.capacity < 1 or args.capacity & (args.capacity - 1):
+    parser.error("the --capacity must be a power of 2")
+
+start = time()
+try:
+    read, classes = dedup_corpus(
+        args.corpus, args.output, args.mapping, args.capacity, args.workers
+    )
+except IndexFullError as error:
+    parser.error(f"{error}: try a larger --capacity")
+end = time()
+
+print(f"{read} Puzzle(s) in {classes} Class(es) Found in {end - start: .3}s")
+print(f"Representatives saved in {args.output}, classes in {args.mapping}")
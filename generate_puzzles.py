@@ -0,0 +1,86 @@
+"""!@file generate_puzzles.py
+@brief Python script to generate many puzzles with a unique solution
+"""
+
+import argparse
+import sys
+from time import time
+
+from src.toolkit.generation import iter_generate, DIFFICULTIES, MAX_ATTEMPTS
+from src.toolkit.output import puzzle_to_line
+
+parser = argparse.ArgumentParser(
+    description="Generate Sudoku puzzles with a unique solution, one per line"
+)
+parser.add_argument("output", help="text file to write the puzzles to")
+parser.add_argument("count", type=int, help="number of puzzles to generate")
+parser.add_argument(
+    "--difficulty",
+    choices=DIFFICULTIES,
+    default="singles",
+    help="techniques needed to solve the puzzles by candidate elimination, or "
+    "backtracking if elimination is not enough (default is singles)",
+)
+parser.add_argument(
+    "--min-clues", type=int, default=17, help="minimum number of clues (default is 17)"
+)
+parser.add_argument(
+    "--max-clues", type=int, default=81, help="maximum number of clues (default is 81)"
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=None,
+    help="number of worker processes (default is the number of cores)",
+)
+parser.add_argument("--seed", type=int, default=None, help="seed of the generator")
+parser.add_argument(
+    "--max-attempts",
+    type=int,
+    default=MAX_ATTEMPTS,
+    help="number of full boards tried for each puzzle before giving up, when the "
+    f"difficulty and range of clues cannot be met (default is {MAX_ATTEMPTS})",
+)
+args = parser.parse_args()
+
+if args.count < 0:
+    parser.error("the count must not be negative")
+if not 17 <= args.min_clues <= args.max_clues <= 81:
+    parser.error("the range of clues must be within 17-81")
+if args.workers is not None and args.workers < 1:
+    parser.error("the number of --workers must be at least 1")
+if args.max_attempts < 1:
+    parser.error("the --max-attempts must be at least 1")
+
+start = time()
+puzzles = iter_generate(
+    args.count,
+    args.difficulty,
+    args.min_clues,
+    args.max_clues,
+    args.workers,
+    args.seed,
+    args.max_attempts,
+)
+
+# write each puzzle as soon as it is generated, stopping at the first puzzle not found
+# (the requirements can most likely never be met, so the other workers are stopped)
+generated = 0
+with open(args.output, "w") as file:
+    for puzzle in puzzles:
+        if puzzle is None:
+            puzzles.close()
+            print(
+                f"No {args.difficulty} puzzle with {args.min_clues}-{args.max_clues} "
+                f"clues found in {args.max_attempts} attempts: this target cannot be "
+                f"met (or is very rare). {generated} Puzzle(s) saved in {args.output}",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+        generated += 1
+        file.write(puzzle_to_line(puzzle) + "\n")
+        file.flush()
+end = time()
+
+print(f"{args.count} Puzzle(s) Generated in {end - start: .3}s")
+print(f"Puzzles saved in {args.output}")
@@ -9,5 +9,6 @@ There are two main data objects used in this package. The first is `puzzle` - a
 9x9 NumPy array, where each element is the number occupying that square of the puzzle,
 or 0 representing an empty square. The second is `candidates` - a 9x9 NumPy array
 where each element is a set of numbers representing the possible candidates for that
-square of the puzzle.
+square of the puzzle. A compact alternative to `candidates` is `masks` - a flat NumPy
+array of 81 uint16 bitmasks (one per square), used by the faster bitmask engine.
 """
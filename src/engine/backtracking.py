@@ -4,28 +4,105 @@
 @author Created by W.D Knottenbelt
 """
 
-import copy
 import numpy as np
-from .basics import init_candidates
-from .elimination import all_elimination
+from itertools import islice
+from .basics import init_candidates, filler, solvable
+from .elimination import all_elimination, TECHNIQUES
+from .branching import STRATEGIES
+from .instrumentation import reset_search
+from .scheduling import new_scheduler, schedule_techniques
+from . import bitmask, trail, parallel
 
 
-def solve(puzzle, solutions, candidates, num_solutions=1):
+def iterate(
+    puzzle, candidates, strategy="first", start=0, stats=None, depth=0, scheduler=None
+):
     """!
-    @brief Recursive function to solve a Sudoku puzzle using backtracking.
+    @brief Recursive generator of the solutions of a Sudoku puzzle using backtracking.
 
-    @details This function operates by filling empty squares in the puzzle with the possible
-    candidates for that square, as determined by the candidates grid, and then recursively calling
-    itself to proceed to the next square. Once a square is reached that has no candidates,
-    the function backtracks and empties the last-filled square, and tries the next candidate.
-    When a solution is found, it is appended to the solutions list, and continues backtracking
-    to find additional solutions. When the desired number of solutions is found, the condition is
-    triggered to break out of all recursive calls.
+    @details This function operates by choosing where to branch using the branching strategy
+    (see branching.py), and trying each alternative in turn: the chosen square is given the
+    chosen number in a copy of the candidates grid, candidate elimination is applied to the copy,
+    and the function recursively calls itself. Branches where a square runs out of candidates
+    are abandoned, and the function backtracks to try the next alternative.
+    When every square has a single candidate, the filled puzzle is yielded, and the search only
+    continues (to find additional solutions) if the next solution is requested.
+    The candidates grid must already have had candidate elimination applied.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param candidates (numpy.ndarray) A 9x9 numpy array containing the possible candidate numbers for each square.
+    @param strategy (str, optional) Name of the branching strategy (default is "first").
+    @param start (int, optional) Flat index of the square branched on at the parent node.
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
+    @param depth (int, optional) The number of branching choices made to reach this node.
+    @param scheduler (dict, optional) The scheduler of the elimination techniques applied
+    to the children (see scheduling.py). Defaults to all four, in a fixed order.
+
+    @return Generator yielding each solution as soon as it is found.
+    """
+    if stats is not None:
+        stats["nodes"] += 1
+        stats["max_depth"] = max(stats["max_depth"], depth)
+
+    # choose the (square, number) alternatives to branch on (the strategies take masks,
+    # so the grid is converted at every node, like it is copied, see branching.py)
+    masks = bitmask.candidates_to_masks(candidates).tolist()
+    branches = STRATEGIES[strategy](masks, start)
+
+    # we only get here if every square has a single candidate (puzzle is solved)
+    if branches is None:
+        yield filler(puzzle, candidates)
+        return
+
+    np.random.shuffle(branches)  # introduce randomness
+    techniques, escalate, measure = schedule_techniques(scheduler, depth + 1, stats)
+
+    for square, n in branches:
+        i, j = divmod(square, 9)
+
+        # create new candidates grid with the chosen number in the chosen square
+        # (all_elimination copies the grid, so only the changed square is replaced,
+        # and only the units containing it need to be propagated)
+        new_candidates = candidates.copy()
+        new_candidates[i, j] = {n}
+        new_candidates = all_elimination(
+            new_candidates, [square], techniques, measure, escalate
+        )
+
+        if solvable(new_candidates):
+            # recursively fill puzzle
+            yield from iterate(
+                puzzle, new_candidates, strategy, square, stats, depth + 1, scheduler
+            )
+        elif stats is not None:
+            stats["backtracks"] += 1
+
+
+def solve(
+    puzzle,
+    solutions,
+    candidates,
+    num_solutions=1,
+    strategy="first",
+    start=0,
+    stats=None,
+):
+    """!
+    @brief Function to solve a Sudoku puzzle using backtracking.
+
+    @details Collects the solutions generated by 'iterate' until the desired number of
+    solutions is found, at which point the search is abandoned.
+    The candidates grid must already have had candidate elimination applied.
 
     @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
     @param solutions (list) A list to store the solutions found.
     @param candidates (numpy.ndarray) A 9x9 numpy array containing the possible candidate numbers for each square.
     @param num_solutions (int, optional) The number of solutions to find (default is 1).
+    @param strategy (str, optional) Name of the branching strategy (default is "first").
+    @param start (int, optional) Flat index of the square branched on at the parent node.
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
 
     @return None. The function modifies the solutions list in place.
     """
@@ -33,43 +110,136 @@ def solve(puzzle, solutions, candidates, num_solutions=1):
     if len(solutions) >= num_solutions:
         return
 
-    for i in range(9):  # iterate over rows
-        for j in range(9):  # iterate over columns
-            if puzzle[i, j] == 0:  # find an empty square
-                numbers = list(candidates[i, j])
-                np.random.shuffle(numbers)  # introduce randomness
+    for solution in iterate(puzzle, candidates, strategy, start, stats):
+        solutions.append(solution)
+        if len(solutions) >= num_solutions:
+            break
+
+
+def iter_solutions(
+    puzzle, candidates=None, method="sets", strategy="first", stats=None, schedule=None
+):
+    """!
+    @brief Generator of the solutions of a Sudoku puzzle, found using backtracking.
+
+    @details Sets up the candidates grid (or masks grid) and applies candidate elimination,
+    then yields each solution as soon as the search finds it. The search is suspended between
+    solutions, so only the solution being yielded is held in memory, and the generator can be
+    stopped (Eg. with 'break' or 'itertools.islice') or closed at any time.
+
+    The search can be run on three representations of the candidates grid:
+    - "sets": the 9x9 grid of candidate sets (see 'iterate')
+    - "bitmask": the flat grid of 81 candidate masks (see 'bitmask.iterate'), which is
+    considerably faster. A candidates grid of sets passed with this method is converted.
+    - "trail": a single masks grid modified in place, with eliminations undone from a
+    trail when backtracking (see 'trail.iterate'), so the grid is never copied.
+
+    With every method, the square (or number) to branch on is chosen by one of the branching
+    strategies in branching.py: "first", "mrv", "mrv_degree" or "hidden". The elimination
+    techniques applied at each node can be chosen by a scheduler (see scheduling.py), except
+    that with the "trail" method, the techniques are never escalated (they are applied to
+    the changed entries of the grid, rather than to the whole grid). The extra elimination
+    techniques (see EXTRA_TECHNIQUES in elimination.py) can only be scheduled with "sets".
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param candidates (numpy.ndarray, optional) Precomputed candidate numbers for each square. Initialized if None.
+    @param method (str, optional) The search method, "sets", "bitmask" or "trail" (default is "sets").
+    @param strategy (str, optional) The branching strategy (default is "first").
+    @param stats (dict, optional) If provided, the search counts are stored in it, and the
+    elimination costs added to it (see instrumentation.py).
+    @param schedule (str or dict, optional) The scheduling policy, or a scheduler created by
+    'new_scheduler' (default is None, for "fixed").
+
+    @return Generator yielding each solution (9x9 numpy array) as soon as it is found.
+    """
+    # check puzzle is numpy array with shape (9,9)
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
 
-                for n in numbers:
-                    puzzle[i, j] = n  # fill square if number is a possibility
+    puzzle = puzzle.copy()
 
-                    # create new candidates grid according to new puzzle
-                    new_candidates = copy.deepcopy(candidates)
-                    new_candidates[i, j] = {n}
-                    new_candidates = all_elimination(new_candidates)
+    assert method in ("sets", "bitmask", "trail"), f"Unknown method '{method}'"
+    assert strategy in STRATEGIES, f"Unknown branching strategy '{strategy}'"
 
-                    solve(
-                        puzzle, solutions, new_candidates, num_solutions
-                    )  # recursively fill puzzle
+    scheduler = new_scheduler(schedule) if isinstance(schedule, str) else schedule
+    if stats is not None:
+        reset_search(stats)
+    techniques, escalate, measure = schedule_techniques(scheduler, 0, stats)
+    assert method == "sets" or set(techniques) <= set(
+        TECHNIQUES
+    ), "The extra elimination techniques are only supported by the sets method"
 
-                    puzzle[i, j] = 0  # backtrack
+    if method in ("bitmask", "trail"):
+        # initialise masks grid, converting the candidates grid if one is provided
+        if candidates is None:
+            masks = bitmask.init_masks(puzzle)
+        elif candidates.dtype == object:
+            masks = bitmask.candidates_to_masks(candidates)
+        else:
+            masks = candidates
 
-                return  # trigger backtracking if there are no possibilities
+        # type-check masks grid
+        assert isinstance(masks, np.ndarray) and masks.shape == (81,)
 
-    # we only get here if puzzle is solved
-    solutions.append(puzzle.copy())
+        # find solutions
+        if method == "bitmask":
+            masks = bitmask.all_elimination(masks, measure, techniques, escalate)
+            if bitmask.solvable(masks):
+                yield from bitmask.iterate(
+                    puzzle, masks, strategy, stats=stats, scheduler=scheduler
+                )
+        else:
+            masks = trail.init_places(masks.tolist())  # single grid, modified in place
+            if trail.propagate(masks, [], stats=measure, techniques=techniques):
+                yield from trail.iterate(
+                    masks, [], strategy, stats=stats, scheduler=scheduler
+                )
+    else:
+        # initialise candidates grid if none is provided
+        if candidates is None:
+            candidates = init_candidates(puzzle)
 
+        # type-check candidates grid
+        assert isinstance(candidates, np.ndarray) and candidates.dtype == object
 
-def backtracker(puzzle, candidates=None, num_solutions=1):
+        # find solutions
+        candidates = all_elimination(candidates, None, techniques, measure, escalate)
+        if solvable(candidates):
+            yield from iterate(
+                puzzle, candidates, strategy, stats=stats, scheduler=scheduler
+            )
+
+
+def backtracker(
+    puzzle,
+    candidates=None,
+    num_solutions=1,
+    method="sets",
+    strategy="first",
+    stats=None,
+    workers=None,
+    schedule=None,
+):
     """!
     @brief Function to run the backtracking process for solving Sudoku puzzles.
 
-    @details Initiates the backtracking algorithm. Sets up necessary data structures and checks,
-    and calls the recursive 'solve' function. Handles scenarios where no solutions are found
-    and ensures uniqueness of solutions.
+    @details Collects the first 'num_solutions' solutions generated by 'iter_solutions'
+    (see there for the search methods and branching strategies). Handles scenarios where
+    no solutions are found and ensures uniqueness of solutions.
+
+    If more than one worker is requested, the search tree is split into subproblems which
+    are searched on multiple cores (see 'parallel_search' in parallel.py).
 
     @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
     @param candidates (numpy.ndarray, optional) Precomputed candidate numbers for each square. Initialized if None.
     @param num_solutions (int, optional) The number of solutions to find (default is 1).
+    @param method (str, optional) The search method, "sets", "bitmask" or "trail" (default is "sets").
+    @param strategy (str, optional) The branching strategy (default is "first").
+    @param stats (dict, optional) If provided, the search counts are stored in it, and the
+    elimination costs added to it (see instrumentation.py).
+    @param workers (int, optional) The number of worker processes (default is None, searching
+    in this process).
+    @param schedule (str or dict, optional) The scheduling policy of the elimination techniques,
+    or a scheduler (see scheduling.py). Default is None, for "fixed".
 
     @return A single solution array if one solution is requested, a list of solutions if
     multiple solutions are requested, or the string "UNSOLVABLE" if no solutions are found.
@@ -77,18 +247,26 @@ def backtracker(puzzle, candidates=None, num_solutions=1):
     # check puzzle is numpy array with shape (9,9)
     assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
 
-    puzzle = puzzle.copy()
-    solutions = []
-
-    # initialise candidates grid if none is provided
-    if candidates is None:
-        candidates = init_candidates(puzzle)
-
-    # type-check candidates grid
-    assert isinstance(candidates, np.ndarray) and candidates.dtype == object
-
     # find solutions
-    solve(puzzle, solutions, candidates, num_solutions)
+    if workers is not None and workers > 1:
+        assert method in ("sets", "bitmask", "trail"), f"Unknown method '{method}'"
+        assert strategy in STRATEGIES, f"Unknown branching strategy '{strategy}'"
+        solutions = parallel.parallel_search(
+            puzzle,
+            candidates,
+            num_solutions,
+            method,
+            strategy,
+            workers,
+            stats,
+            schedule,
+        )
+    else:
+        generator = iter_solutions(
+            puzzle, candidates, method, strategy, stats, schedule
+        )
+        solutions = list(islice(generator, num_solutions))
+        generator.close()
 
     # if there are no solutions, the puzzle is unsolvable
     if not solutions:
@@ -105,3 +283,44 @@ def backtracker(puzzle, candidates=None, num_solutions=1):
     assert len(solutions) == len(unique_solutions), "Solutions found are not unique"
 
     return solutions
+
+
+def count_solutions(puzzle, limit=2, candidates=None, strategy="mrv", stats=None):
+    """!
+    @brief Function to count the solutions of a Sudoku puzzle, up to a limit.
+
+    @details Answers "does the puzzle have 0, 1 or more solutions?" more cheaply than
+    'backtracker': the search is done in place with an undo trail (see 'trail.count'),
+    in a deterministic order, no solutions are stored, and it stops as soon as 'limit'
+    solutions have been found. With the default limit of 2, the result is 0 for an
+    unsolvable puzzle, 1 for a puzzle with a unique solution, and 2 otherwise.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param limit (int, optional) The maximum number of solutions to count (default is 2).
+    @param candidates (numpy.ndarray, optional) Candidates grid of sets (or masks grid). Initialized if None.
+    @param strategy (str, optional) The branching strategy (default is "mrv").
+    @param stats (dict, optional) If provided, the search counts are stored in it, and the
+    elimination costs added to it (see instrumentation.py).
+
+    @return The number of solutions of the puzzle, capped at limit.
+    """
+    # check puzzle is numpy array with shape (9,9)
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+    assert limit >= 1, "The limit must be at least 1"
+    assert strategy in STRATEGIES, f"Unknown branching strategy '{strategy}'"
+
+    if stats is not None:
+        reset_search(stats)
+
+    # initialise masks grid, converting the candidates grid if one is provided
+    if candidates is None:
+        masks = bitmask.init_masks(puzzle)
+    elif candidates.dtype == object:
+        masks = bitmask.candidates_to_masks(candidates)
+    else:
+        masks = candidates
+
+    masks = trail.init_places(masks.tolist())
+    if not trail.propagate(masks, [], stats=stats):
+        return 0
+    return trail.count(masks, [], limit, strategy, stats=stats)
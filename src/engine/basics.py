@@ -11,6 +11,7 @@ of a Sudoku puzzle.
 """
 
 import numpy as np
+from .tables import SQUARE, UNITS_ARRAY, SQUARE_UNITS_ARRAY
 
 
 def possibilities(puzzle, i, j):
@@ -28,18 +29,11 @@ def possibilities(puzzle, i, j):
     @return The set of possible numbers that can be placed in the square without
     causing immedate conflicts.
     """
-    row = puzzle[i]
-    col = puzzle[:, j]
-
-    # getting indices of the top left square in relevant block
-    block_i = 3 * (i // 3)  # row index
-    block_j = 3 * (j // 3)  # column index
-
-    # getting block
-    block = puzzle[block_i : block_i + 3, block_j : block_j + 3].flatten()
+    # values in the row, column and block of the square (see tables.py)
+    units = puzzle.ravel()[UNITS_ARRAY[SQUARE_UNITS_ARRAY[SQUARE[i][j]]]]
 
     # find all unique integers above 0 in row, col and block
-    taken_numbers = set(set(row) | set(col) | set(block)) - set([0])
+    taken_numbers = set(units.ravel().tolist()) - {0}
 
     # return which numbers are available to the square
     return set(range(1, 10)) - taken_numbers
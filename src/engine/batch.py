@@ -0,0 +1,304 @@
+"""!@file batch.py
+@brief Module containing vectorised candidate elimination for batches of puzzles
+
+@details Puzzles in a batch are stored as an (N, 9, 9) array, and their candidates
+as an (N, 9, 9, 9) boolean array 'cands', where cands[k, i, j, n - 1] is True if and
+only if n is a candidate of square (i, j) in the k-th puzzle. The techniques 'Naked
+Singles', 'Hidden Singles' and 'Pointing Pairs/Triples' are implemented as NumPy
+reductions over rows, columns and blocks of all N puzzles at once, so no Python code
+runs per puzzle (or per square). Each puzzle is given one of the following statuses:
+- STUCK: elimination stopped changing the candidates before the puzzle was solved
+- SOLVED: every square has a single candidate (and these do not clash)
+- CONTRADICTION: some square has no candidates (the puzzle is unsolvable)
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from .backtracking import backtracker
+from .bitmask import masks_to_candidates
+
+# status codes of puzzles in a batch
+STUCK = 0
+SOLVED = 1
+CONTRADICTION = 2
+
+# the bit of each number in a mask
+_BITS = (1 << np.arange(9)).astype(np.uint16)
+
+
+def _block_view(cands):
+    """!
+    @brief View a batch of candidates with the blocks as separate axes
+
+    @param cands (numpy.ndarray) Candidates of shape (N, 9, 9, 9).
+
+    @return View of shape (N, block row, row in block, block column, column in block, 9).
+    """
+    return cands.reshape(-1, 3, 3, 3, 3, 9)
+
+
+def _count(cands, axes, keepdims=False):
+    """!
+    @brief Count the True values of a boolean array along one or more axes
+
+    @details Equivalent to 'cands.sum(axes)', but adds up the slices along each axis
+    one at a time in int8. This is considerably faster than NumPy's reductions along
+    the short (length 3 or 9) inner axes of the candidates arrays.
+
+    @param cands (numpy.ndarray) Boolean array.
+    @param axes (int or tuple) Axis or axes to count along.
+    @param keepdims (bool, optional) Whether to keep the counted axes with length 1.
+
+    @return Array of int8 counts.
+    """
+    counts = cands.view(np.int8)
+    for axis in sorted(np.atleast_1d(axes), reverse=True):
+        moved = np.moveaxis(counts, axis, 0)
+        total = moved[0].copy()
+        for k in range(1, len(moved)):
+            total += moved[k]
+        counts = np.expand_dims(total, axis) if keepdims else total
+    return counts
+
+
+def init_candidates_batch(puzzles):
+    """!
+    @brief Initializes the candidates of a batch of puzzles
+
+    @details Equivalent to 'init_candidates' in basics.py for every puzzle: a filled
+    square has its value as its only candidate, and an empty square has every number
+    not present in its row, column or block.
+
+    @param puzzles (numpy.ndarray) An (N, 9, 9) array of puzzles.
+
+    @return Candidates of shape (N, 9, 9, 9).
+    """
+    assert isinstance(puzzles, np.ndarray) and puzzles.shape[1:] == (9, 9)
+
+    # one-hot encoding of filled squares
+    given = puzzles[..., np.newaxis] == np.arange(1, 10)
+
+    # numbers present in each row, column and block
+    in_row = given.any(axis=2)  # (N, 9, 9)
+    in_col = given.any(axis=1)  # (N, 9, 9)
+    in_block = _block_view(given).any(axis=(2, 4))  # (N, 3, 3, 9)
+
+    taken = in_row[:, :, np.newaxis, :] | in_col[:, np.newaxis, :, :]
+    taken |= np.repeat(np.repeat(in_block, 3, axis=1), 3, axis=2)
+
+    empty = (puzzles == 0)[..., np.newaxis]
+    return np.where(empty, ~taken, given)
+
+
+def naked_singles_batch(cands):
+    """!
+    @brief Eliminate candidates in a batch using the naked singles technique
+
+    @details Every square with a single candidate has that candidate removed from
+    its peers. For each number, the singles in every row, column and block are
+    counted, and a square loses the number if any other square in one of its units
+    has it as a single.
+
+    Reference: https://sudoku.com/sudoku-rules/obvious-singles/
+
+    @param cands (numpy.ndarray) Candidates of shape (N, 9, 9, 9), modified in place.
+
+    @return Updated candidates
+    """
+    singles = cands & (_count(cands, 3) == 1)[..., np.newaxis]
+    s = singles.view(np.int8)
+
+    # number of singles of each number in each unit, excluding the square itself
+    in_row = _count(singles, 2, keepdims=True) - s
+    in_col = _count(singles, 1, keepdims=True) - s
+    in_block = _count(_block_view(singles), (2, 4), keepdims=True) - _block_view(s)
+
+    cands &= (in_row == 0) & (in_col == 0)
+    _block_view(cands)[...] &= in_block == 0
+
+    return cands
+
+
+def hidden_singles_batch(cands):
+    """!
+    @brief Eliminate candidates in a batch using the hidden singles technique
+
+    @details If a number is a candidate of only one square in a row, column or block,
+    it becomes the only candidate of that square. A square forced to take two
+    different numbers is left with no candidates.
+
+    Reference: https://sudoku.com/sudoku-rules/hidden-singles/
+
+    @param cands (numpy.ndarray) Candidates of shape (N, 9, 9, 9), modified in place.
+
+    @return Updated candidates
+    """
+    # numbers which are candidates of exactly one square in each unit
+    once_row = _count(cands, 2, keepdims=True) == 1
+    once_col = _count(cands, 1, keepdims=True) == 1
+    once_block = _count(_block_view(cands), (2, 4), keepdims=True) == 1
+
+    hidden = cands & (once_row | once_col)
+    _block_view(hidden)[...] |= _block_view(cands) & once_block
+
+    # squares with multiple candidates and at least one hidden single
+    n_hidden = _count(hidden, 3)
+    update = (n_hidden > 0) & (_count(cands, 3) > 1)
+
+    # a square with two hidden singles is left with none
+    cands[update] = hidden[update] & (n_hidden[update] == 1)[:, np.newaxis]
+
+    return cands
+
+
+def pointing_batch(cands):
+    """!
+    @brief Eliminate candidates in a batch using the pointing pairs/triples technique
+
+    @details If a number is a candidate within a block only in one of its rows (or
+    columns), it is removed from the rest of that row (or column) outside the block.
+
+    Reference 1: https://sudoku.com/sudoku-rules/pointing-pairs/
+    Reference 2: https://sudoku.com/sudoku-rules/pointing-triples/
+
+    @param cands (numpy.ndarray) Candidates of shape (N, 9, 9, 9), modified in place.
+
+    @return Updated candidates
+    """
+    blocks = _block_view(cands)  # (N, block row, row, block col, col, 9)
+
+    # numbers present in each row of each block, and those confined to one row
+    row_present = _count(blocks, 4) > 0  # (N, block row, row, block col, 9)
+    row_only = row_present & (_count(row_present, 2, keepdims=True) == 1)
+
+    # remove them from the same row in the other blocks of the band
+    pointed = _count(row_only, 3, keepdims=True) - row_only.view(np.int8) > 0
+    blocks &= ~pointed[:, :, :, :, np.newaxis, :]
+
+    # same for columns, within the stack
+    col_present = _count(blocks, 2) > 0  # (N, block row, block col, col, 9)
+    col_only = col_present & (_count(col_present, 3, keepdims=True) == 1)
+    pointed = _count(col_only, 1, keepdims=True) - col_only.view(np.int8) > 0
+    blocks &= ~pointed[:, :, np.newaxis, :, :, :]
+
+    return cands
+
+
+def batch_status(cands):
+    """!
+    @brief Status of each puzzle in a batch
+
+    @details A puzzle is SOLVED only if every square has a single candidate and
+    these singles do not clash (each number appears once in every unit). Puzzles
+    where every square has a single candidate but some singles clash, or where
+    some square has no candidates, are CONTRADICTION.
+
+    @param cands (numpy.ndarray) Candidates of shape (N, 9, 9, 9).
+
+    @return Array of N status codes (STUCK, SOLVED or CONTRADICTION).
+    """
+    n = len(cands)
+    counts = _count(cands, 3).reshape(n, 81)
+    filled = np.all(counts == 1, axis=1)
+
+    # every number must appear exactly once in every row, column and block
+    unique = np.all(_count(cands, 2).reshape(n, 81) == 1, axis=1)
+    unique &= np.all(_count(cands, 1).reshape(n, 81) == 1, axis=1)
+    unique &= np.all(_count(_block_view(cands), (2, 4)).reshape(n, 81) == 1, axis=1)
+
+    status = np.full(n, STUCK, dtype=np.int8)
+    status[filled & unique] = SOLVED
+    status[filled & ~unique] = CONTRADICTION
+    status[np.any(counts == 0, axis=1)] = CONTRADICTION
+    return status
+
+
+def batch_elimination(cands):
+    """!
+    @brief Repeated application of the batch elimination techniques
+
+    @details Applies naked singles, hidden singles and pointing pairs/triples to the
+    whole batch in a loop. A puzzle leaves the loop as soon as its candidates stop
+    changing or it is solved or contradictory, so each puzzle reaches its own fixpoint
+    and later iterations only process the puzzles still changing.
+
+    @param cands (numpy.ndarray) Candidates of shape (N, 9, 9, 9).
+
+    @return Tuple of the updated candidates and the array of status codes.
+    """
+    assert isinstance(cands, np.ndarray) and cands.dtype == bool
+    assert cands.shape[1:] == (9, 9, 9)
+
+    cands = cands.copy()
+    active = np.flatnonzero(batch_status(cands) == STUCK)
+
+    while active.size:
+        old = cands[active]
+        new = pointing_batch(hidden_singles_batch(naked_singles_batch(old.copy())))
+        cands[active] = new
+
+        # puzzles still changing, and not yet solved or contradictory
+        changed = np.any(new != old, axis=(1, 2, 3))
+        active = active[changed & (batch_status(new) == STUCK)]
+
+    return cands, batch_status(cands)
+
+
+def cands_to_masks(cands):
+    """!
+    @brief Convert a batch of candidates into masks grids (see bitmask.py)
+
+    @param cands (numpy.ndarray) Candidates of shape (N, 9, 9, 9).
+
+    @return Array of shape (N, 81) of uint16 masks.
+    """
+    return (cands * _BITS).sum(axis=3, dtype=np.uint16).reshape(len(cands), 81)
+
+
+def solve_batch(puzzles, method=None, chunk_size=10000):
+    """!
+    @brief Solve a batch of puzzles using vectorised candidate elimination
+
+    @details The puzzles are processed in chunks (to bound memory usage). Puzzles
+    which are still STUCK after elimination are left unsolved unless a backtracking
+    method is given, in which case each of them is solved by 'backtracker', seeded
+    with its reduced candidates (as a masks grid, converted to a candidates grid of sets
+    for the "sets" method).
+
+    @param puzzles (numpy.ndarray) An (N, 9, 9) array of puzzles.
+    @param method (str, optional) Backtracking method for stuck puzzles, "sets",
+    "bitmask" or "trail" (see 'backtracker').
+    @param chunk_size (int, optional) Number of puzzles processed at once.
+
+    @return Tuple of an (N, 9, 9) array of solutions (with 0 in the squares of unsolved
+    puzzles which have multiple or no candidates) and the array of status codes.
+    """
+    assert isinstance(puzzles, np.ndarray) and puzzles.shape[1:] == (9, 9)
+
+    solutions = np.zeros(puzzles.shape, dtype=int)
+    status = np.zeros(len(puzzles), dtype=np.int8)
+
+    for start in range(0, len(puzzles), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        cands, status[chunk] = batch_elimination(init_candidates_batch(puzzles[chunk]))
+
+        # fill squares with a single candidate
+        single = _count(cands, 3) == 1
+        solutions[chunk] = np.where(single, cands.argmax(axis=3) + 1, 0)
+
+        if method is None:
+            continue
+
+        # backtracking for each stuck puzzle
+        masks = cands_to_masks(cands)
+        for k in np.flatnonzero(status[chunk] == STUCK):
+            reduced = masks_to_candidates(masks[k]) if method == "sets" else masks[k]
+            solution = backtracker(puzzles[start + k], reduced, method=method)
+            if isinstance(solution, str) and solution == "UNSOLVABLE":
+                status[start + k] = CONTRADICTION
+            else:
+                solutions[start + k] = solution
+                status[start + k] = SOLVED
+
+    return solutions, status
@@ -0,0 +1,425 @@
+"""!@file bitmask.py
+@brief Module containing a compact bitmask representation of the candidates grid
+
+@details In this module, the candidates grid is stored as a flat NumPy array of
+81 unsigned 16-bit integers (one per square, in row-major order, so square (i, j)
+is at index 9 * i + j). Each integer is a 9-bit mask where bit n - 1 is set if
+and only if the number n is a candidate for that square. This module contains
+adapters to convert between this 'masks' grid and the 'candidates' grid of sets
+used elsewhere in the engine, as well as bitmask versions of the four candidate
+elimination techniques and of the backtracking algorithm. All elimination
+techniques are vectorised over the whole grid using NumPy, so no Python sets
+are created, copied or compared during solving.
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from time import perf_counter
+from . import tables
+from .branching import STRATEGIES
+from .elimination import TECHNIQUES, init_elimination_stats, record_technique
+from .scheduling import schedule_techniques
+
+# mask containing all 9 numbers as candidates
+ALL_CANDIDATES = 0x1FF
+
+# BIT[n] is the mask containing only the number n (BIT[0] = 0 for empty squares)
+BIT = np.array([0] + [1 << n for n in range(9)], dtype=np.uint16)
+
+# number of candidates in each of the 512 possible masks
+POPCOUNT = np.array(tables.POPCOUNT, dtype=np.uint8)
+
+# the number contained in each mask with a single candidate (0 otherwise)
+SINGLE_VALUE = np.array(
+    [mask.bit_length() if POPCOUNT[mask] == 1 else 0 for mask in range(512)],
+    dtype=np.uint8,
+)
+
+# index tables (flat indices of squares, see tables.py)
+UNITS = tables.UNITS_ARRAY
+PEERS = tables.PEERS_ARRAY
+
+
+def candidates_to_masks(candidates):
+    """!
+    @brief Convert a candidates grid of sets into a masks grid
+
+    @param candidates (numpy.ndarray) A 9x9 numpy array of candidate sets.
+
+    @return A numpy array of 81 uint16 masks.
+    """
+    assert isinstance(candidates, np.ndarray) and candidates.dtype == object
+    assert candidates.shape == (9, 9)
+
+    masks = np.zeros(81, dtype=np.uint16)
+    for s, square in enumerate(candidates.flat):
+        for n in square:
+            masks[s] |= BIT[n]
+    return masks
+
+
+def masks_to_candidates(masks):
+    """!
+    @brief Convert a masks grid into a candidates grid of sets
+
+    @details This allows the output of the bitmask functions to be used with
+    tools that expect the candidates grid of sets (Eg. 'print_candidates').
+
+    @param masks (numpy.ndarray) A numpy array of 81 uint16 masks.
+
+    @return A 9x9 numpy array of candidate sets.
+    """
+    assert isinstance(masks, np.ndarray) and masks.shape == (81,)
+
+    candidates = np.empty((9, 9), dtype=object)
+    for s, mask in enumerate(masks.tolist()):
+        candidates[s // 9, s % 9] = {n for n in range(1, 10) if mask & (1 << (n - 1))}
+    return candidates
+
+
+def mask_to_numbers(mask):
+    """!
+    @brief List the numbers contained in a single mask
+
+    @param mask (int) A 9-bit mask of candidates.
+
+    @return List of the candidate numbers (in ascending order).
+    """
+    mask = int(mask)
+    return [n for n in range(1, 10) if mask & (1 << (n - 1))]
+
+
+def init_masks(puzzle):
+    """!
+    @brief Initializes a masks grid based on the current state of the Sudoku puzzle.
+
+    @details Equivalent to 'init_candidates' in basics.py: the candidates of each
+    empty square are the numbers not already present in its row, column or block,
+    and the only candidate of a filled square is its value.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the puzzle.
+
+    @return A numpy array of 81 uint16 masks.
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+
+    given = BIT[puzzle.ravel().astype(int)]  # mask of the value of each filled square
+
+    # numbers taken by the peers of each square
+    taken = np.bitwise_or.reduce(given[PEERS], axis=1)
+
+    return np.where(given > 0, given, ALL_CANDIDATES & ~taken).astype(np.uint16)
+
+
+def naked_singles_elimination(masks):
+    """!
+    @brief Eliminate candidates using the naked singles technique (bitmask version).
+
+    @details Every square with a single candidate has that candidate removed
+    from all of its peers (all squares in the same row, column and block).
+
+    Reference: https://sudoku.com/sudoku-rules/obvious-singles/
+
+    @param masks (numpy.ndarray) The masks grid.
+
+    @return Updated masks grid
+    """
+    assert isinstance(masks, np.ndarray) and masks.shape == (81,)
+
+    # masks of squares that have a single candidate (0 for other squares)
+    singles = np.where(POPCOUNT[masks] == 1, masks, 0)
+
+    # remove the singles of the peers of each square
+    masks &= ~np.bitwise_or.reduce(singles[PEERS], axis=1)
+
+    return masks
+
+
+def hidden_singles_elimination(masks):
+    """!
+    @brief Eliminate candidates using the hidden singles technique (bitmask version).
+
+    @details If a number is a candidate of only one square in a row, column or
+    block, then it becomes the only candidate of that square. If a square is
+    forced to take two different numbers, it is left with no candidates
+    (since the grid is then unsolvable).
+
+    Reference: https://sudoku.com/sudoku-rules/hidden-singles/
+
+    @param masks (numpy.ndarray) The masks grid.
+
+    @return Updated masks grid
+    """
+    assert isinstance(masks, np.ndarray) and masks.shape == (81,)
+
+    unit_masks = masks[UNITS]  # shape (27, 9)
+
+    # for each unit, the mask of numbers which appear in exactly one square
+    contains = (unit_masks[:, :, np.newaxis] & BIT[1:]) != 0  # shape (27, 9, 9)
+    once = contains.sum(axis=1) == 1  # shape (27, 9)
+    once_masks = (once * BIT[1:]).sum(axis=1).astype(np.uint16)  # shape (27,)
+
+    # scatter the hidden singles of each unit back to its squares
+    hidden = np.zeros(81, dtype=np.uint16)
+    np.bitwise_or.at(hidden, UNITS, unit_masks & once_masks[:, np.newaxis])
+
+    # only squares with multiple candidates contain hidden singles
+    multiple = (POPCOUNT[masks] > 1) & (hidden > 0)
+    masks[multiple] = np.where(POPCOUNT[hidden[multiple]] == 1, hidden[multiple], 0)
+
+    return masks
+
+
+def obvious_pairs_elimination(masks):
+    """!
+    @brief Eliminate candidates using the obvious pairs technique (bitmask version).
+
+    @details If two squares in the same row, column or block have exactly the
+    same two candidates, then those candidates are eliminated from all other
+    squares in that row, column or block.
+
+    Reference: https://sudoku.com/sudoku-rules/obvious-pairs/
+
+    @param masks (numpy.ndarray) The masks grid.
+
+    @return Updated masks grid
+    """
+    assert isinstance(masks, np.ndarray) and masks.shape == (81,)
+
+    unit_masks = masks[UNITS]  # shape (27, 9)
+    is_pair = POPCOUNT[unit_masks] == 2
+
+    # find squares whose pair of candidates is shared by another square in the unit
+    same = unit_masks[:, :, np.newaxis] == unit_masks[:, np.newaxis, :]
+    same &= is_pair[:, :, np.newaxis] & is_pair[:, np.newaxis, :]
+    same &= ~np.eye(9, dtype=bool)
+    in_pair = same.any(axis=2)  # shape (27, 9)
+
+    # all numbers belonging to obvious pairs of each unit
+    pair_numbers = np.bitwise_or.reduce(np.where(in_pair, unit_masks, 0), axis=1)
+
+    # squares in a pair keep their own candidates, the rest lose all pair numbers
+    removal = pair_numbers[:, np.newaxis] & ~np.where(in_pair, unit_masks, 0)
+    removal = removal.astype(np.uint16)
+
+    # scatter the eliminations of each unit back to its squares
+    removed = np.zeros(81, dtype=np.uint16)
+    np.bitwise_or.at(removed, UNITS, removal)
+    masks &= ~removed
+
+    return masks
+
+
+def pointing_elimination(masks):
+    """!
+    @brief Eliminate candidates using the pointing pairs/triples technique (bitmask version).
+
+    @details If a number is a candidate within a block only in a single row
+    (or column) of that block, it is eliminated from the rest of that row
+    (or column) outside of the block.
+
+    Reference 1: https://sudoku.com/sudoku-rules/pointing-pairs/
+    Reference 2: https://sudoku.com/sudoku-rules/pointing-triples/
+
+    @param masks (numpy.ndarray) The masks grid.
+
+    @return Updated masks grid
+    """
+    assert isinstance(masks, np.ndarray) and masks.shape == (81,)
+
+    # numbers in each intersection of a block with a row or column, which
+    # appear nowhere else in the block
+    in_intersection = np.bitwise_or.reduce(masks[tables.INTERSECTION_ARRAY], axis=1)
+    in_block_rest = np.bitwise_or.reduce(masks[tables.BLOCK_REST_ARRAY], axis=1)
+    pointing = in_intersection & ~in_block_rest  # shape (54,)
+
+    # remove them from the rest of the row or column
+    removed = np.zeros(81, dtype=np.uint16)
+    np.bitwise_or.at(removed, tables.LINE_REST_ARRAY, pointing[:, np.newaxis])
+    masks &= ~removed
+
+    return masks
+
+
+# the elimination techniques, in the order they are applied (names as in elimination.py)
+ELIMINATIONS = (
+    ("naked_singles", naked_singles_elimination),
+    ("hidden_singles", hidden_singles_elimination),
+    ("obvious_pairs", obvious_pairs_elimination),
+    ("pointing", pointing_elimination),
+)
+
+
+def all_elimination(masks, stats=None, techniques=TECHNIQUES, escalate=False):
+    """!
+    @brief Repeated application of all four elimination techniques (bitmask version)
+
+    @details Applies 'Naked Singles', 'Hidden Singles', 'Obvious Pairs' and
+    'Pointing Pairs/Triples' sequentially to the masks grid in a loop until no
+    more candidates can be eliminated. Stops early if a square runs out of
+    candidates, since the grid is then unsolvable.
+
+    With escalation, a technique is only applied once the cheaper ones (in the order of
+    TECHNIQUES) have stopped removing candidates, and after it removes any, the
+    cheapest is applied again (see scheduling.py).
+
+    @param masks (numpy.ndarray) The masks grid.
+    @param stats (dict, optional) If provided, each sweep of the techniques (of a single
+    technique with escalation) is counted under "iterations", and each technique applied
+    is recorded (see instrumentation.py).
+    @param techniques (tuple, optional) Names of the techniques to apply (see TECHNIQUES).
+    Defaults to all four.
+    @param escalate (bool, optional) If True, apply the techniques cheapest first with
+    escalation (default is False).
+
+    @return Updated masks grid
+    """
+    assert isinstance(masks, np.ndarray) and masks.shape == (81,)
+
+    # take copy of masks grid to avoid mutating the original
+    masks = masks.copy()
+    if stats is not None:
+        init_elimination_stats(stats)
+
+    eliminations = [item for item in ELIMINATIONS if item[0] in techniques]
+    if escalate:
+        groups = [[item] for item in eliminations]
+    else:
+        groups = [eliminations]
+
+    # apply the groups of techniques until the masks grid stops changing, going back
+    # to the first group whenever one changes it
+    k = 0
+    while k < len(groups) and solvable(masks):
+        old_masks = masks.copy()
+        if stats is None:
+            for _, technique in groups[k]:
+                masks = technique(masks)
+        else:
+            stats["iterations"] += 1
+            count = int(POPCOUNT[masks].sum())
+            for name, technique in groups[k]:
+                start = perf_counter()
+                masks = technique(masks)
+                seconds = perf_counter() - start
+                removed = count - int(POPCOUNT[masks].sum())
+                record_technique(stats, name, seconds, removed)
+                count -= removed
+
+        k = k + 1 if np.array_equal(masks, old_masks) else 0
+
+    return masks
+
+
+def solvable(masks):
+    """!
+    @brief Checks if the masks grid could correspond to a solvable puzzle.
+
+    @details Equivalent to 'solvable' in basics.py: returns False if any square
+    has no candidates. A True result does not guarantee the puzzle is solvable.
+
+    @param masks (numpy.ndarray) The masks grid.
+
+    @return True if every square has at least one candidate, False otherwise.
+    """
+    return bool(np.all(masks))
+
+
+def filler(puzzle, masks):
+    """!
+    @brief Fills the puzzle using the provided masks grid.
+
+    @details Equivalent to 'filler' in basics.py: fills the empty squares
+    which have exactly one candidate.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the puzzle.
+    @param masks (numpy.ndarray) The masks grid.
+
+    @return The updated Sudoku puzzle as a numpy array.
+    """
+    puzzle = puzzle.copy()
+    values = SINGLE_VALUE[masks].reshape(9, 9)
+    empty = puzzle == 0
+    puzzle[empty] = values[empty]
+    return puzzle
+
+
+def iterate(
+    puzzle, masks, strategy="first", start=0, stats=None, depth=0, scheduler=None
+):
+    """!
+    @brief Recursive generator of the solutions of a Sudoku puzzle using backtracking (bitmask version).
+
+    @details Identical in structure to 'iterate' in backtracking.py: the branching strategy
+    chooses the (square, number) alternatives, and each is tried in turn (in random order)
+    on a copy of the masks grid, to which the candidate eliminations are applied before the
+    function recurses. Branches where a square runs out of candidates are abandoned.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param masks (numpy.ndarray) The masks grid, with candidate elimination already applied.
+    @param strategy (str, optional) Name of the branching strategy (default is "first").
+    @param start (int, optional) Flat index of the square branched on at the parent node.
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
+    @param depth (int, optional) The number of branching choices made to reach this node.
+    @param scheduler (dict, optional) The scheduler of the elimination techniques applied
+    to the children (see scheduling.py). Defaults to all four, in a fixed order.
+
+    @return Generator yielding each solution as soon as it is found.
+    """
+    if stats is not None:
+        stats["nodes"] += 1
+        stats["max_depth"] = max(stats["max_depth"], depth)
+
+    # choose the (square, number) alternatives to branch on
+    branches = STRATEGIES[strategy](masks.tolist(), start)
+
+    # we only get here if every square has a single candidate (puzzle is solved)
+    if branches is None:
+        yield filler(puzzle, masks)
+        return
+
+    np.random.shuffle(branches)  # introduce randomness
+    techniques, escalate, measure = schedule_techniques(scheduler, depth + 1, stats)
+
+    for square, n in branches:
+        # create new masks grid with the chosen number in the chosen square
+        new_masks = masks.copy()
+        new_masks[square] = BIT[n]
+        new_masks = all_elimination(new_masks, measure, techniques, escalate)
+
+        if solvable(new_masks):
+            yield from iterate(
+                puzzle, new_masks, strategy, square, stats, depth + 1, scheduler
+            )
+        elif stats is not None:
+            stats["backtracks"] += 1
+
+
+def solve(
+    puzzle, solutions, masks, num_solutions=1, strategy="first", start=0, stats=None
+):
+    """!
+    @brief Function to solve a Sudoku puzzle using backtracking (bitmask version).
+
+    @details Collects the solutions generated by 'iterate' until enough are found.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param solutions (list) A list to store the solutions found.
+    @param masks (numpy.ndarray) The masks grid, with candidate elimination already applied.
+    @param num_solutions (int, optional) The number of solutions to find (default is 1).
+    @param strategy (str, optional) Name of the branching strategy (default is "first").
+    @param start (int, optional) Flat index of the square branched on at the parent node.
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
+
+    @return None. The function modifies the solutions list in place.
+    """
+    if len(solutions) >= num_solutions:
+        return
+
+    for solution in iterate(puzzle, masks, strategy, start, stats):
+        solutions.append(solution)
+        if len(solutions) >= num_solutions:
+            break
@@ -0,0 +1,158 @@
+"""!@file branching.py
+@brief Module containing strategies for choosing where backtracking branches
+
+@details At each node of the backtracking search, a branching strategy decides
+which alternatives to try. Every strategy takes the masks grid (a list of 81
+bitmasks, see bitmask.py) of a node where candidate elimination has already been
+applied, and returns a list of (square, number) pairs. Exactly one of these pairs
+must hold in any solution, so the search can try each one in turn. If every
+square has a single candidate, strategies return None (the grid is solved).
+The strategies implemented are:
+- "first": the first square (in row-major order) with multiple candidates
+- "mrv": the square with the fewest candidates (minimum remaining values)
+- "mrv_degree": as "mrv", but ties are broken by choosing the square with the
+most unsolved peers (the square constraining the rest of the grid the most)
+- "hidden": as "mrv", unless some number has fewer possible squares within a row,
+column or block than the best square has candidates, in which case the search
+branches on the squares that number can occupy
+
+Only "first" avoids a full scan of the grid: squares before the one branched on at
+the parent node stay solved, so the search resumes from it. The other strategies scan
+all 81 squares at every node (stopping early only when "mrv" finds a square with two
+candidates), and the "sets" backend converts its grid into masks at every node to
+call them. Incremental structures were tried instead, keeping the squares bucketed by
+candidate count alongside the trail of the "trail" backend, but moving squares between
+buckets on every elimination and undo made the search 15-25% slower than the scan it
+replaces (which is a small part of the cost of a node, next to propagation). For the
+same reason the "sets" and "bitmask" backends, which copy the whole grid at every
+node, are not given one.
+
+@author Created by W.D Knottenbelt
+"""
+
+from .tables import POPCOUNT as _POPCOUNT, UNITS as _UNITS, PEERS as _PEERS
+
+
+def square_branches(masks, square):
+    """!
+    @brief List the alternatives for branching on a square
+
+    @param masks (list) The masks grid (list of 81 ints).
+    @param square (int) Flat index of the square.
+
+    @return List of (square, number) pairs, one for each candidate of the square.
+    """
+    mask = masks[square]
+    return [(square, n) for n in range(1, 10) if mask & (1 << (n - 1))]
+
+
+def select_first(masks, start=0):
+    """!
+    @brief Branch on the first square with multiple candidates
+
+    @details Squares are searched in row-major order from 'start'. Since squares
+    before the square branched on at the parent node are already solved (and stay
+    solved deeper in the search), the search passes that square as 'start' so the
+    grid is never rescanned from (0, 0).
+
+    @param masks (list) The masks grid (list of 81 ints).
+    @param start (int, optional) Flat index of the square to start searching from.
+
+    @return List of (square, number) pairs, or None if every square is solved.
+    """
+    for square in range(start, 81):
+        if _POPCOUNT[masks[square]] > 1:
+            return square_branches(masks, square)
+    return None
+
+
+def select_mrv(masks, start=0):
+    """!
+    @brief Branch on the square with the fewest candidates
+
+    @param masks (list) The masks grid (list of 81 ints).
+    @param start (int, optional) Unused, present for a common strategy signature.
+
+    @return List of (square, number) pairs, or None if every square is solved.
+    """
+    best, best_count = None, 10
+    for square in range(81):
+        count = _POPCOUNT[masks[square]]
+        if 1 < count < best_count:
+            best, best_count = square, count
+            if count == 2:  # no square can have fewer candidates
+                break
+
+    if best is None:
+        return None
+    return square_branches(masks, best)
+
+
+def select_mrv_degree(masks, start=0):
+    """!
+    @brief Branch on the square with the fewest candidates, breaking ties by degree
+
+    @details The degree of a square is its number of unsolved peers.
+
+    @param masks (list) The masks grid (list of 81 ints).
+    @param start (int, optional) Unused, present for a common strategy signature.
+
+    @return List of (square, number) pairs, or None if every square is solved.
+    """
+    best, best_count, best_degree = None, 10, -1
+    for square in range(81):
+        count = _POPCOUNT[masks[square]]
+        if 1 < count <= best_count:
+            degree = sum(1 for peer in _PEERS[square] if _POPCOUNT[masks[peer]] > 1)
+            if count < best_count or degree > best_degree:
+                best, best_count, best_degree = square, count, degree
+
+    if best is None:
+        return None
+    return square_branches(masks, best)
+
+
+def select_hidden(masks, start=0):
+    """!
+    @brief Branch on a square or on the possible squares of a number in a unit
+
+    @details Finds the square with the fewest candidates (as "mrv"), then searches
+    every row, column and block for a number (not yet placed in that unit) with
+    fewer possible squares. If one is found, the alternatives are the squares the
+    number could occupy. Ties are resolved in favour of the square.
+
+    @param masks (list) The masks grid (list of 81 ints).
+    @param start (int, optional) Unused, present for a common strategy signature.
+
+    @return List of (square, number) pairs, or None if every square is solved.
+    """
+    best = select_mrv(masks)
+    if best is None or len(best) == 2:  # no number can have fewer than 2 places
+        return best
+
+    for unit in _UNITS:
+        # numbers already placed in the unit
+        placed = 0
+        for square in unit:
+            if _POPCOUNT[masks[square]] == 1:
+                placed |= masks[square]
+
+        for n in range(1, 10):
+            bit = 1 << (n - 1)
+            if placed & bit:
+                continue
+            places = [square for square in unit if masks[square] & bit]
+            if 1 < len(places) < len(best):
+                best = [(square, n) for square in places]
+                if len(best) == 2:
+                    return best
+    return best
+
+
+# mapping from strategy names to strategy functions
+STRATEGIES = {
+    "first": select_first,
+    "mrv": select_mrv,
+    "mrv_degree": select_mrv_degree,
+    "hidden": select_hidden,
+}
@@ -0,0 +1,132 @@
+"""!@file cache.py
+@brief Module containing a cache of solutions in front of the backtracking solver
+
+@details Puzzles are looked up by their canonical form (see canonical.py), so a puzzle
+which is a relabelled, permuted or transposed copy of one solved before is a cache hit:
+the cached solution of the canonical puzzle is mapped back through the transformation
+of the new puzzle. Unsolvable puzzles are cached too.
+
+The cache has two tiers:
+- memory: an OrderedDict holding at most 'maxsize' entries, evicting the least recently
+  used entry when full
+- disk (optional): any persistent mapping from strings to strings, Eg. a 'shelve' opened
+  by the caller, which is checked on a memory miss and holds every entry ever added
+
+Keys are canonical puzzles and values canonical solutions (or "UNSOLVABLE"), each as a
+string of 81 digits. The cache tiers are created and owned by the caller, so they can
+be shared between calls (and the disk tier between runs).
+
+Puzzles with fewer than MIN_CLUES givens bypass the cache: they have many solutions
+(no puzzle with fewer than 17 clues has a unique one), so are quick to solve directly,
+while they are the slowest to canonicalise.
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from time import perf_counter
+from .canonical import canonical_form, invert_transform
+from .backtracking import backtracker
+
+# puzzles with fewer givens are solved directly, without canonicalising them
+MIN_CLUES = 17
+
+
+def cached_backtracker(
+    puzzle,
+    cache,
+    maxsize=4096,
+    disk=None,
+    method="trail",
+    strategy="first",
+    stats=None,
+):
+    """!
+    @brief Function to solve a Sudoku puzzle, reusing the solutions of equivalent puzzles.
+
+    @details Has the same contract as 'backtracker' (finding a single solution). On a miss
+    in both tiers, the canonical puzzle is solved with 'backtracker' and the result added
+    to the cache. If stats is provided, the following counts are added to it (so a single
+    dict can collect them over many calls):
+    - "lookups", "hits", "disk_hits" and "misses": the number of lookups, and of those
+      found in memory, found on disk, or found in neither
+    - "lookup_seconds": the time spent finding the canonical form and looking it up
+      (excluding solving on a miss, and mapping solutions back)
+    - "skipped": the number of puzzles with fewer than MIN_CLUES givens, solved directly
+      without a lookup
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param cache (collections.OrderedDict) The memory tier, modified in place.
+    @param maxsize (int, optional) The maximum number of entries in memory (default is 4096).
+    @param disk (mapping, optional) The disk tier, modified in place (default is None, for
+    no disk tier).
+    @param method (str, optional) The search method used on a miss (default is "trail").
+    @param strategy (str, optional) The branching strategy used on a miss (default is "first").
+    @param stats (dict, optional) If provided, the cache counts are added to it.
+
+    @return A solution array, or the string "UNSOLVABLE" if there are no solutions.
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+    assert maxsize >= 1, "The cache must hold at least one entry"
+
+    if np.count_nonzero(puzzle) < MIN_CLUES:
+        if stats is not None:
+            stats["skipped"] = stats.get("skipped", 0) + 1
+        return backtracker(puzzle, method=method, strategy=strategy)
+
+    start = perf_counter()
+    canonical, transform = canonical_form(puzzle)
+    key = "".join(map(str, canonical.ravel().tolist()))
+
+    if key in cache:
+        cache.move_to_end(key)
+        value, found = cache[key], "hits"
+    elif disk is not None and key in disk:
+        value, found = disk[key], "disk_hits"
+        if isinstance(value, bytes):
+            value = value.decode()  # Eg. the 'dbm' module stores bytes
+    else:
+        value, found = None, "misses"
+    lookup = perf_counter() - start
+
+    if value is None:
+        solution = backtracker(canonical, method=method, strategy=strategy)
+        if isinstance(solution, str):
+            value = solution  # UNSOLVABLE
+        else:
+            value = "".join(map(str, solution.ravel().tolist()))
+        if disk is not None:
+            disk[key] = value
+
+    # add to (or refresh in) the memory tier, evicting the least recently used entries
+    if found != "hits":
+        cache[key] = value
+        while len(cache) > maxsize:
+            cache.popitem(last=False)
+
+    if stats is not None:
+        for name in ("lookups", "hits", "disk_hits", "misses"):
+            stats.setdefault(name, 0)
+        stats.setdefault("lookup_seconds", 0.0)
+        stats["lookups"] += 1
+        stats[found] += 1
+        stats["lookup_seconds"] += lookup
+
+    if value == "UNSOLVABLE":
+        return value
+
+    solution = np.array([int(char) for char in value]).reshape((9, 9))
+    return invert_transform(solution, transform)
+
+
+def hit_rate(stats):
+    """!
+    @brief Fraction of cache lookups found in either tier
+
+    @param stats (dict) The counts collected by 'cached_backtracker'.
+
+    @return The hit rate (0 if there have been no lookups).
+    """
+    if not stats.get("lookups"):
+        return 0.0
+    return (stats["hits"] + stats["disk_hits"]) / stats["lookups"]
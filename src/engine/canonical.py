@@ -0,0 +1,254 @@
+"""!@file canonical.py
+@brief Module containing a canonical form of Sudoku puzzles under their symmetries
+
+@details The following transformations map a puzzle to an equivalent puzzle (one
+with the same number of solutions, which are transformed in the same way):
+- relabelling the numbers 1-9 (by any permutation)
+- permuting the rows within each band (group of 3 rows), and the columns within each stack
+- permuting the bands, and the stacks
+- transposing the grid
+
+The canonical form of a puzzle is the smallest of all its transformed grids, compared
+as the sequence of 81 squares in row-major order, after relabelling numbers in the order
+they first appear (so the first given is always 1, the next different given 2, and so
+on). Equivalent puzzles therefore have the same canonical form.
+
+Rather than trying all 2 * 6^8 geometric transformations, the canonical grid is built
+one row at a time: every transformation that can still lead to the smallest grid (each
+a choice of transposition, column order and rows so far) is extended by every row
+allowed next, and only those giving the smallest row are kept. All transformations
+still in the running are processed together with NumPy. On sparse puzzles, many of them
+tie (Eg. column orders differing only in empty columns) and would multiply at every
+row, so transformations which are bound to give the same rows from then on are merged
+into one whenever they multiply (see '_distinct_states').
+
+A transformation is returned as a tuple (transpose, rows, cols, relabel): the grid is
+transposed if 'transpose' is True, then square (i, j) of the result is square
+(rows[i], cols[j]), with number n replaced by relabel[n] (relabel[0] = 0).
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from itertools import permutations, product
+
+# the 1296 orders of the 9 rows (or columns) which keep each band (or stack) together
+_PERMS = list(permutations(range(3)))
+LINE_ORDERS = np.array(
+    [
+        [3 * bands[k] + within[k][i] for k in range(3) for i in range(3)]
+        for bands in _PERMS
+        for within in product(_PERMS, repeat=3)
+    ],
+    dtype=np.intp,
+)
+LINE_ORDERS.flags.writeable = False
+
+# transformations in the running above which those giving the same rows are merged
+# (when ties have made them more numerous than before the last row)
+MERGE_ABOVE = 64
+
+# place value of each square of a row, for comparing rows as integers
+_PLACES = 10 ** np.arange(8, -1, -1, dtype=np.int64)
+
+
+def _first_rows():
+    """!
+    @brief Smallest first row of each pattern of givens in a line, over all column orders
+
+    @details As the numbers in a row are distinct, the first row of a transformed grid
+    is relabelled 1, 2, 3... from left to right, so it only depends on which of its
+    squares are given.
+
+    @return Tuple of the array of the smallest first row (as an integer) for each of the
+    512 patterns (bit j set if square j is given), and the tuple of the column orders
+    (indices of LINE_ORDERS) giving it for each pattern.
+    """
+    keys, orders = [], []
+    for pattern in range(512):
+        given = (pattern >> LINE_ORDERS) & 1
+        key = (given * np.cumsum(given, axis=1)) @ _PLACES
+        keys.append(key.min())
+        orders.append(np.flatnonzero(key == key.min()))
+    return np.array(keys), tuple(orders)
+
+
+_FIRST_KEY, _FIRST_ORDERS = _first_rows()
+_LINE_BITS = 1 << np.arange(9)
+_PACK = 1 << (5 * np.arange(9, dtype=np.int64))
+
+
+def _relabel(values, labels, next_label):
+    """!
+    @brief Relabel the rows of many transformations, in order of first appearance
+
+    @param values (numpy.ndarray) Array of shape (S, 9) of the next row of each transformation.
+    @param labels (numpy.ndarray) Array of shape (S, 10) of the label of each number (0 if
+    not seen yet), modified in place.
+    @param next_label (numpy.ndarray) Array of the next unused label of each transformation,
+    modified in place.
+
+    @return Array of shape (S, 9) of the relabelled rows.
+    """
+    every = np.arange(len(values))
+    relabelled = np.empty(values.shape, dtype=np.int64)
+    for j in range(9):
+        n = values[:, j]
+        new = (n > 0) & (labels[every, n] == 0)
+        labels[every[new], n[new]] = next_label[new]
+        next_label += new
+        relabelled[:, j] = labels[every, n]
+    return relabelled
+
+
+def _distinct_states(grids, transpose, rows, cols, labels):
+    """!
+    @brief Keep one of each set of transformations bound to give the same remaining rows
+
+    @details Two transformations in the running give the same rows from then on if they
+    have used the same rows, are in the same band, and see the same remaining grid: the
+    rows in their column order, with each number replaced by its label (or, if it has no
+    label yet, by itself, offset so it cannot be taken for a label). Keeping either of
+    them gives the same canonical form.
+
+    @param grids (numpy.ndarray) The puzzle and its transpose, as an array of shape (2, 9, 9).
+    @param transpose (numpy.ndarray) Array of the transposition of each transformation.
+    @param rows (numpy.ndarray) Array of shape (S, k) of the rows chosen so far.
+    @param cols (numpy.ndarray) Array of the column order (index of LINE_ORDERS) of each.
+    @param labels (numpy.ndarray) Array of shape (S, 10) of the label of each number.
+
+    @return Sorted array of the indices of the transformations kept.
+    """
+    every = np.arange(len(cols))[:, np.newaxis, np.newaxis]
+    seen = grids[
+        transpose[:, np.newaxis, np.newaxis],
+        np.arange(9)[:, np.newaxis],
+        LINE_ORDERS[cols][:, np.newaxis, :],
+    ]
+    mapped = np.where(labels[every, seen] > 0, labels[every, seen], seen + 10)
+    mapped[seen == 0] = 0
+
+    used = np.zeros((len(cols), 9), dtype=bool)
+    used[np.arange(len(cols))[:, np.newaxis], rows] = True
+    mapped[used] = 0
+
+    # each row packed into an integer (5 bits per square), then one more for the rows
+    # used and the band
+    key = np.column_stack(
+        [mapped @ _PACK, used @ _LINE_BITS + 512 * (rows[:, -1] // 3)]
+    )
+    order = np.lexsort(key.T)
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (key[order[1:]] != key[order[:-1]]).any(axis=1)
+    index = order[first]
+    return np.sort(index)
+
+
+def apply_transform(grid, transform):
+    """!
+    @brief Transform a puzzle (or solution)
+
+    @param grid (numpy.ndarray) A 9x9 numpy array.
+    @param transform (tuple) The transformation (see the module description).
+
+    @return The transformed 9x9 numpy array.
+    """
+    transpose, rows, cols, relabel = transform
+    grid = grid.T if transpose else grid
+    return relabel[grid[np.ix_(rows, cols)]]
+
+
+def invert_transform(grid, transform):
+    """!
+    @brief Undo a transformation of a puzzle (or solution)
+
+    @details Eg. 'invert_transform(apply_transform(grid, transform), transform)' is grid.
+
+    @param grid (numpy.ndarray) A 9x9 numpy array, transformed by 'transform'.
+    @param transform (tuple) The transformation (see the module description).
+
+    @return The 9x9 numpy array before the transformation.
+    """
+    transpose, rows, cols, relabel = transform
+    original = np.zeros((9, 9), dtype=int)
+    original[np.ix_(rows, cols)] = np.argsort(relabel)[grid]
+    return original.T if transpose else original
+
+
+def canonical_form(puzzle):
+    """!
+    @brief Find the canonical form of a puzzle, and the transformation giving it
+
+    @details See the module description. The relabelling returned is a permutation of all
+    the numbers 1-9: numbers not given in the puzzle take the unused labels in increasing
+    order. Solutions of the canonical puzzle can therefore be mapped back to solutions of
+    the puzzle using 'invert_transform'.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+
+    @return Tuple of the canonical puzzle (9x9 numpy array) and the transformation.
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+
+    grids = np.stack([puzzle, puzzle.T])
+
+    # transformations still in the running: transposition, column order, rows so far,
+    # and the labels given to the numbers seen so far. The first row is chosen from the
+    # lines with the best pattern of givens, in the column orders giving it.
+    patterns = (grids > 0) @ _LINE_BITS
+    transpose, first = np.nonzero(_FIRST_KEY[patterns] == _FIRST_KEY[patterns].min())
+    orders = [_FIRST_ORDERS[patterns[t, i]] for t, i in zip(transpose, first)]
+    sizes = [len(order) for order in orders]
+
+    transpose = np.repeat(transpose, sizes)
+    cols = np.concatenate(orders)
+    rows = np.repeat(first, sizes)[:, np.newaxis]
+    labels = np.zeros((len(cols), 10), dtype=np.int64)
+    next_label = np.ones(len(cols), dtype=np.int64)
+    _relabel(
+        grids[transpose[:, np.newaxis], rows, LINE_ORDERS[cols]], labels, next_label
+    )
+
+    line = np.arange(9)
+    for k in range(1, 9):
+        # rows allowed next: the first row of an unused band, or another row of this band
+        if k % 3 == 0:
+            used_bands = (rows // 3)[:, :, np.newaxis] == line // 3
+            allowed = ~used_bands.any(axis=1)
+        else:
+            allowed = (rows[:, -1:] // 3) == line // 3
+            allowed &= ~(rows[:, :, np.newaxis] == line).any(axis=1)
+
+        # extend every transformation by every allowed row, and relabel the new rows
+        count = len(cols)
+        index, row = np.nonzero(allowed)
+        values = grids[
+            transpose[index, np.newaxis],
+            row[:, np.newaxis],
+            LINE_ORDERS[cols[index]],
+        ]
+        labels, next_label = labels[index], next_label[index]
+        relabelled = _relabel(values, labels, next_label)
+
+        # keep the transformations giving the smallest row
+        key = relabelled @ _PLACES
+        keep = key == key.min()
+
+        index = index[keep]
+        transpose, cols = transpose[index], cols[index]
+        rows = np.column_stack([rows[index], row[keep]])
+        labels, next_label = labels[keep], next_label[keep]
+
+        # merge the transformations bound to give the same rows, if ties multiplied them
+        if len(cols) > max(count, MERGE_ABOVE):
+            index = _distinct_states(grids, transpose, rows, cols, labels)
+            transpose, cols, rows = transpose[index], cols[index], rows[index]
+            labels, next_label = labels[index], next_label[index]
+
+    # give the unused labels to the numbers not in the puzzle
+    relabel = labels[0]
+    unused = [n for n in range(1, 10) if relabel[n] == 0]
+    relabel[unused] = np.arange(next_label[0], 10)
+
+    transform = (bool(transpose[0]), rows[0], LINE_ORDERS[cols[0]], relabel)
+    return apply_transform(puzzle, transform), transform
@@ -0,0 +1,293 @@
+"""!@file dlx.py
+@brief Module containing an exact cover solver for Sudoku using Dancing Links
+
+@details A Sudoku puzzle can be expressed as an exact cover problem: choose a set
+of rows from a 729 x 324 binary matrix such that every column contains exactly one 1
+in the chosen rows. Each row corresponds to placing number n in square (i, j), and
+has four 1's, one in each of the following groups of 81 columns:
+- square constraint: square (i, j) contains a number
+- row constraint: row i contains the number n
+- column constraint: column j contains the number n
+- block constraint: the block containing (i, j) contains the number n
+
+Knuth's Algorithm X solves exact cover problems by repeatedly choosing the column
+with the fewest 1's, and trying each row covering it. The matrix is stored using
+'Dancing Links': a sparse grid of circular doubly-linked lists, where removing
+('covering') a column and its rows, and later restoring ('uncovering') them, only
+relinks the neighbouring nodes. Here, the links are stored in Python lists indexed
+by node number. Node 0 is the root, nodes 1-324 are the column headers, and the
+remaining nodes are the 1's of the matrix.
+
+Reference: D. E. Knuth, Dancing Links (2000), https://arxiv.org/abs/cs/0011047
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from itertools import islice
+from .basics import init_candidates
+from .bitmask import masks_to_candidates
+from .tables import SQUARE, BLOCK_OF
+
+
+def matrix_row(i, j, n):
+    """!
+    @brief Columns of the exact cover matrix covered by placing n in square (i, j)
+
+    @param i (int) The row index of the square.
+    @param j (int) The column index of the square.
+    @param n (int) The number placed in the square (1-9).
+
+    @return List of the four column indices (from 1 to 324).
+    """
+    block = BLOCK_OF[SQUARE[i][j]]
+    return [
+        1 + 9 * i + j,  # square constraint
+        82 + 9 * i + n - 1,  # row constraint
+        163 + 9 * j + n - 1,  # column constraint
+        244 + 9 * block + n - 1,  # block constraint
+    ]
+
+
+def build_links(candidates):
+    """!
+    @brief Build the dancing links for the exact cover matrix of a candidates grid
+
+    @details Only the rows corresponding to candidates in the candidates grid are
+    added to the matrix, so a grid which has been reduced by candidate elimination
+    gives a smaller matrix (and search).
+
+    @param candidates (numpy.ndarray) A 9x9 numpy array of candidate sets.
+
+    @return Tuple of lists (L, R, U, D, C, S, P): the left, right, up and down
+    links and column of each node, the number of nodes in each column, and the
+    (i, j, n) placement of the row each node belongs to.
+    """
+    # root and column headers (columns are linked in a circular list through the root)
+    L = [324] + list(range(324))
+    R = list(range(1, 325)) + [0]
+    U = list(range(325))
+    D = list(range(325))
+    C = list(range(325))
+    S = [0] * 325
+    P = [None] * 325
+
+    for i in range(9):
+        for j in range(9):
+            for n in sorted(candidates[i, j]):
+                first = len(L)
+                for k, col in enumerate(matrix_row(i, j, n)):
+                    node = first + k
+
+                    # link node into the bottom of its column
+                    U.append(U[col])
+                    D.append(col)
+                    D[U[col]] = node
+                    U[col] = node
+                    S[col] += 1
+
+                    # link node into the (circular) list of its row
+                    L.append(first + (k - 1) % 4)
+                    R.append(first + (k + 1) % 4)
+
+                    C.append(col)
+                    P.append((i, j, n))
+
+    return L, R, U, D, C, S, P
+
+
+def cover(links, col):
+    """!
+    @brief Remove a column from the header list, and its rows from the other columns
+
+    @param links (tuple) The dancing links (see 'build_links').
+    @param col (int) The column header to cover.
+    """
+    L, R, U, D, C, S, _ = links
+    R[L[col]] = R[col]
+    L[R[col]] = L[col]
+
+    i = D[col]
+    while i != col:
+        j = R[i]
+        while j != i:
+            D[U[j]] = D[j]
+            U[D[j]] = U[j]
+            S[C[j]] -= 1
+            j = R[j]
+        i = D[i]
+
+
+def uncover(links, col):
+    """!
+    @brief Restore a column covered by 'cover' (in exactly the reverse order)
+
+    @param links (tuple) The dancing links (see 'build_links').
+    @param col (int) The column header to uncover.
+    """
+    L, R, U, D, C, S, _ = links
+
+    i = U[col]
+    while i != col:
+        j = L[i]
+        while j != i:
+            S[C[j]] += 1
+            D[U[j]] = j
+            U[D[j]] = j
+            j = L[j]
+        i = U[i]
+
+    R[L[col]] = col
+    L[R[col]] = col
+
+
+def iterate(links, partial):
+    """!
+    @brief Recursive generator of the solutions of the exact cover problem (Algorithm X)
+
+    @details The uncovered column with the fewest nodes is chosen. If it has none,
+    the current branch has no solutions. Otherwise, each of its rows is added to the
+    partial solution in turn: the columns covered by that row are covered, the
+    function recurses, then the columns are uncovered again. When no columns remain,
+    the partial solution is a solution, and the corresponding grid is yielded. The
+    columns are also uncovered if the generator is closed while suspended, so closing
+    it early leaves the links as they were found.
+
+    @param links (tuple) The dancing links (see 'build_links').
+    @param partial (list) The nodes of the rows chosen so far.
+
+    @return Generator yielding each solution as soon as it is found.
+    """
+    L, R, U, D, C, S, P = links
+
+    # if every column is covered, the chosen rows are a solution
+    if R[0] == 0:
+        solution = np.zeros((9, 9), dtype=int)
+        for node in partial:
+            i, j, n = P[node]
+            solution[i, j] = n
+        yield solution
+        return
+
+    # choose the column with the fewest nodes
+    col, size = R[0], S[R[0]]
+    j = R[col]
+    while j != 0 and size > 1:
+        if S[j] < size:
+            col, size = j, S[j]
+        j = R[j]
+
+    if size == 0:
+        return  # some constraint can no longer be satisfied
+
+    cover(links, col)
+    try:
+        i = D[col]
+        while i != col:
+            # choose row i, covering all of its other columns
+            partial.append(i)
+            j = R[i]
+            while j != i:
+                cover(links, C[j])
+                j = R[j]
+
+            try:
+                yield from iterate(links, partial)
+            finally:
+                # un-choose row i (in reverse order)
+                j = L[i]
+                while j != i:
+                    uncover(links, C[j])
+                    j = L[j]
+                partial.pop()
+
+            i = D[i]
+    finally:
+        uncover(links, col)
+
+
+def solve(links, partial, solutions, num_solutions=1):
+    """!
+    @brief Function solving the exact cover problem (Algorithm X)
+
+    @details Collects the solutions generated by 'iterate' until enough are found.
+
+    @param links (tuple) The dancing links (see 'build_links').
+    @param partial (list) The nodes of the rows chosen so far.
+    @param solutions (list) A list to store the solutions found.
+    @param num_solutions (int, optional) The number of solutions to find (default is 1).
+
+    @return None. The function modifies the solutions list in place.
+    """
+    if len(solutions) >= num_solutions:
+        return
+
+    generator = iterate(links, partial)
+    for solution in generator:
+        solutions.append(solution)
+        if len(solutions) >= num_solutions:
+            break
+    generator.close()
+
+
+def iter_dlx_solutions(puzzle, candidates=None):
+    """!
+    @brief Generator of the solutions of a Sudoku puzzle, found using Dancing Links.
+
+    @details Has the same contract as 'iter_solutions' in backtracking.py: each solution
+    is yielded as soon as it is found, and the generator can be stopped or closed at any
+    time. If a candidates grid is provided (Eg. after candidate elimination), only the
+    candidates in it are considered.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param candidates (numpy.ndarray, optional) Candidates grid of sets (or masks grid)
+    to seed the matrix with. Initialized from the puzzle if None.
+
+    @return Generator yielding each solution (9x9 numpy array) as soon as it is found.
+    """
+    # check puzzle is numpy array with shape (9,9)
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+
+    # initialise candidates grid if none is provided, converting a masks grid
+    if candidates is None:
+        candidates = init_candidates(puzzle)
+    elif candidates.dtype != object:
+        candidates = masks_to_candidates(candidates)
+
+    # type-check candidates grid
+    assert isinstance(candidates, np.ndarray) and candidates.shape == (9, 9)
+
+    yield from iterate(build_links(candidates), [])
+
+
+def dlx_solver(puzzle, candidates=None, num_solutions=1):
+    """!
+    @brief Function to solve Sudoku puzzles as an exact cover problem using Dancing Links.
+
+    @details Has the same contract as 'backtracker' in backtracking.py, collecting the
+    first 'num_solutions' solutions generated by 'iter_dlx_solutions'. If a candidates
+    grid is provided (Eg. after candidate elimination), only the candidates in it are
+    considered. Unlike 'backtracker', the search is deterministic.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param candidates (numpy.ndarray, optional) Candidates grid of sets (or masks grid)
+    to seed the matrix with. Initialized from the puzzle if None.
+    @param num_solutions (int, optional) The number of solutions to find (default is 1).
+
+    @return A single solution array if one solution is requested, a list of solutions if
+    multiple solutions are requested, or the string "UNSOLVABLE" if no solutions are found.
+    """
+    # find solutions
+    generator = iter_dlx_solutions(puzzle, candidates)
+    solutions = list(islice(generator, num_solutions))
+    generator.close()
+
+    # if there are no solutions, the puzzle is unsolvable
+    if not solutions:
+        return "UNSOLVABLE"
+
+    # if 1 solution is specified, return just the array (not in a list)
+    if num_solutions == 1:
+        return solutions[0]
+
+    return solutions
@@ -4,13 +4,41 @@
 @details This module contains four candidate elimination techniques: 'Naked Singles',
 'Hidden Singles', 'Obvious Pairs', 'Pointing Pairs/Triples'. Each technique takes
 a candidates grid as input, and returns the modified grid (after eliminating
-candidates). The module also contains a function to combine all four techniques
-and loop them until no more candidates can be eliminated.
+candidates). The module also contains a function to combine the techniques (all four,
+or any selection of them) and loop them until no more candidates can be eliminated.
+The loop is driven by a queue of units (rows, columns and blocks): when the candidates
+of a square shrink, only the units containing that square are re-examined.
+
+A library of extra techniques (EXTRA_TECHNIQUES) can be switched on in the loop, one by
+one, to shrink the search trees of hard puzzles at a higher cost per node: 'Claiming'
+(box-line reduction), 'Naked Triples/Quads', 'Hidden Triples/Quads', which are applied
+within a unit like the four, and 'X-Wing', 'XY-Wing' and 'Swordfish', which look at the
+whole grid and are only applied once the units have stopped changing. These are only
+supported on the candidates grid of sets (not by bitmask.py and trail.py).
 
 @author Created by W.D Knottenbelt
 """
 import numpy as np
-import copy
+from collections import deque
+from itertools import combinations
+from time import perf_counter
+from .tables import UNITS, SQUARE_UNITS, PEERS, INTERSECTIONS, ROW_OF, COL_OF
+
+# names of the elimination techniques, from the simplest to the most advanced
+TECHNIQUES = ("naked_singles", "hidden_singles", "obvious_pairs", "pointing")
+
+# names of the extra techniques (off by default), from the cheapest
+EXTRA_TECHNIQUES = (
+    "claiming",
+    "naked_triples",
+    "hidden_triples",
+    "naked_quads",
+    "hidden_quads",
+    "x_wing",
+    "xy_wing",
+    "swordfish",
+)
+ALL_TECHNIQUES = TECHNIQUES + EXTRA_TECHNIQUES
 
 
 def naked_singles_elimination(candidates):
@@ -31,29 +59,14 @@ def naked_singles_elimination(candidates):
     assert isinstance(candidates, np.ndarray) and candidates.dtype == object
     assert candidates.shape == (9, 9)
 
-    for i in range(9):
-        for j in range(9):
-            if len(candidates[i, j]) == 1:
-                # extract the single candidate
-                value = list(candidates[i, j])[0]
-
-                # eliminate this candidate from all squares in the same row
-                for c in range(9):
-                    if c != j:
-                        candidates[i, c].discard(value)
-
-                # eliminate this candidate from all squares in the same column
-                for r in range(9):
-                    if r != i:
-                        candidates[r, j].discard(value)
-
-                # eliminate this candidate from all squares in the same block
-                block_i = 3 * (i // 3)  # row index of top left square in block
-                block_j = 3 * (j // 3)  # col index of top left square in block
-                for r in range(block_i, block_i + 3):
-                    for c in range(block_j, block_j + 3):
-                        if r != i or c != j:
-                            candidates[r, c].discard(value)
+    cells = list(candidates.flat)  # the candidate sets, in row-major order
+    for s, cell in enumerate(cells):
+        if len(cell) == 1:
+            # eliminate the single candidate from all squares in the same
+            # row, column and block
+            value = next(iter(cell))
+            for peer in PEERS[s]:
+                cells[peer].discard(value)
 
     return candidates
 
@@ -110,35 +123,19 @@ def hidden_singles_elimination(candidates):
     assert isinstance(candidates, np.ndarray) and candidates.dtype == object
     assert candidates.shape == (9, 9)
 
-    for i in range(9):
-        for j in range(9):
-            current_candidates = candidates[i, j]
-
-            # we only check if squares with multiple candidates contain hidden singles
-            # (if it is the sole candidate then it isn't very 'hidden')
-            if len(current_candidates) > 1:
-                # check if any current candidates are unique in row
-                # if we find a candidate is unique, it becomes the sole candidate
-                unique_in_row = unique_in_group(candidates[i, :], current_candidates)
-                if unique_in_row:
-                    candidates[i, j] = {unique_in_row}
-                    continue
-
-                # same for column
-                unique_in_col = unique_in_group(candidates[:, j], current_candidates)
-                if unique_in_col:
-                    candidates[i, j] = {unique_in_col}
-                    continue
-
-                # same for block
-                block_i = 3 * (i // 3)
-                block_j = 3 * (j // 3)
-                block = candidates[
-                    block_i : block_i + 3, block_j : block_j + 3
-                ].flatten()
-                unique_in_block = unique_in_group(block, current_candidates)
-                if unique_in_block:
-                    candidates[i, j] = {unique_in_block}
+    cells = list(candidates.flat)  # the candidate sets, in row-major order
+    for s, current_candidates in enumerate(cells):
+        # we only check if squares with multiple candidates contain hidden singles
+        # (if it is the sole candidate then it isn't very 'hidden')
+        if len(current_candidates) > 1:
+            # check if any current candidates are unique in the row, column or block
+            # if we find a candidate is unique, it becomes the sole candidate
+            for unit in SQUARE_UNITS[s]:
+                group = [cells[square] for square in UNITS[unit]]
+                unique = unique_in_group(group, current_candidates)
+                if unique:
+                    current_candidates.intersection_update({unique})
+                    break
 
     return candidates
 
@@ -163,40 +160,18 @@ def obvious_pairs_elimination(candidates):
     assert candidates.shape == (9, 9)
 
     # search every square in grid
-    for i in range(9):
-        for j in range(9):
-            # check if the current square has exactly two candidates.
-            if len(candidates[i, j]) == 2:
-                pair = candidates[i, j]
-
-                # check for identical pair in the same row.
-                for c in range(9):
-                    if c != j and candidates[i, c] == pair:
-                        # eliminate the pair from all other squares in the same row.
-                        for eliminate_c in range(9):
-                            if eliminate_c != j and eliminate_c != c:
-                                candidates[i, eliminate_c] -= pair
-
-                # check for identical pair in the same column.
-                for r in range(9):
-                    if r != i and candidates[r, j] == pair:
-                        # eliminate the pair from all other squares in the same column.
-                        for eliminate_r in range(9):
-                            if eliminate_r != i and eliminate_r != r:
-                                candidates[eliminate_r, j] -= pair
-
-                # check for identical pair in the same block.
-                block_i, block_j = 3 * (i // 3), 3 * (j // 3)
-                for r in range(block_i, block_i + 3):
-                    for c in range(block_j, block_j + 3):
-                        if (r != i or c != j) and candidates[r, c] == pair:
-                            # eliminate the pair from all other squares in the same block.
-                            for eliminate_r in range(block_i, block_i + 3):
-                                for eliminate_c in range(block_j, block_j + 3):
-                                    if (eliminate_r != i or eliminate_c != j) and (
-                                        eliminate_r != r or eliminate_c != c
-                                    ):
-                                        candidates[eliminate_r, eliminate_c] -= pair
+    cells = list(candidates.flat)  # the candidate sets, in row-major order
+    for s, pair in enumerate(cells):
+        # check if the current square has exactly two candidates.
+        if len(pair) == 2:
+            # check for identical pair in the same row, column and block
+            for unit in SQUARE_UNITS[s]:
+                for other in UNITS[unit]:
+                    if other != s and cells[other] == pair:
+                        # eliminate the pair from all other squares in the unit
+                        for square in UNITS[unit]:
+                            if square != s and square != other:
+                                cells[square].difference_update(pair)
 
     return candidates
 
@@ -221,68 +196,543 @@ def pointing_elimination(candidates):
     assert isinstance(candidates, np.ndarray) and candidates.dtype == object
     assert candidates.shape == (9, 9)
 
-    # loop over each block
-    for block_i in range(0, 9, 3):
-        for block_j in range(0, 9, 3):
-            # for each number, find which rows and columns they are in (within the block)
-            for num in range(1, 10):
-                rows_with_num = set()
-                cols_with_num = set()
-
-                # loop over squares within the block to find the rows and columns where the number appears.
-                for i in range(block_i, block_i + 3):
-                    for j in range(block_j, block_j + 3):
-                        if num in candidates[i, j]:
-                            rows_with_num.add(i)
-                            cols_with_num.add(j)
-
-                # apply pointing pairs/triples technique for rows
-                if len(rows_with_num) == 1:
-                    # row index containing pointing pairs/triples
-                    row = list(rows_with_num)[0]
-                    # discard num from the rest of the row
-                    for c in range(9):
-                        if c < block_j or c >= block_j + 3:
-                            candidates[row, c].discard(num)
-
-                # apply pointing pairs/triples technique for columns
-                if len(cols_with_num) == 1:
-                    # column index containing pointing pairs/triples
-                    col = list(cols_with_num)[0]
-                    # discard num from rest of column
-                    for r in range(9):
-                        if r < block_i or r >= block_i + 3:
-                            candidates[r, col].discard(num)
+    # loop over the intersections of each block with its rows and columns
+    cells = list(candidates.flat)  # the candidate sets, in row-major order
+    for _, _, squares, line_rest, block_rest in INTERSECTIONS:
+        # numbers in the intersection which appear nowhere else in the block
+        pointing = set().union(*(cells[s] for s in squares))
+        pointing.difference_update(*(cells[s] for s in block_rest))
+
+        # discard them from the rest of the row or column
+        if pointing:
+            for s in line_rest:
+                cells[s].difference_update(pointing)
 
     return candidates
 
 
-def all_elimination(candidates):
+def init_elimination_stats(stats, techniques=TECHNIQUES):
+    """!
+    @brief Add any missing elimination counts to a stats dict (with zero counts)
+
+    @details See instrumentation.py for the keys of a stats dict. The four techniques are
+    always counted, and the extra techniques once they are applied.
+
+    @param stats (dict) The stats dict, modified in place.
+    @param techniques (tuple, optional) Names of the techniques applied (see ALL_TECHNIQUES).
+
+    @return The stats dict.
+    """
+    stats.setdefault("iterations", 0)
+    for name, zero in (("calls", 0), ("seconds", 0.0), ("removed", 0)):
+        counts = stats.setdefault(name, {})
+        for technique in TECHNIQUES + tuple(techniques):
+            counts.setdefault(technique, zero)
+    return stats
+
+
+def record_technique(stats, technique, seconds, removed):
+    """!
+    @brief Record one application of an elimination technique in a stats dict
+
+    @param stats (dict) The stats dict (see 'init_elimination_stats'), modified in place.
+    @param technique (str) The name of the technique.
+    @param seconds (float) The time spent applying it.
+    @param removed (int) The number of candidates it removed.
+    """
+    stats["calls"][technique] += 1
+    stats["seconds"][technique] += seconds
+    stats["removed"][technique] += removed
+
+
+def unit_naked_singles(cells, unit, changed):
+    """!
+    @brief Naked Singles within a unit: singles are discarded from its other squares
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param unit (int) Index of the unit.
+    @param changed (list) The squares whose candidates changed, appended to.
+    """
+    squares = UNITS[unit]
+    for s in squares:
+        if len(cells[s]) == 1:
+            value = next(iter(cells[s]))
+            for other in squares:
+                if other != s and value in cells[other]:
+                    cells[other].discard(value)
+                    changed.append(other)
+
+
+def unit_hidden_singles(cells, unit, changed):
+    """!
+    @brief Hidden Singles within a unit: a number with only one possible square becomes
+    the only candidate of that square (a square forced to take two numbers is left empty)
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param unit (int) Index of the unit.
+    @param changed (list) The squares whose candidates changed, appended to.
+    """
+    places = {}
+    for s in UNITS[unit]:
+        for n in cells[s]:
+            places.setdefault(n, []).append(s)
+    hidden = {}
+    for n, where in places.items():
+        if len(where) == 1 and len(cells[where[0]]) > 1:
+            hidden.setdefault(where[0], []).append(n)
+    for s, numbers in hidden.items():
+        cells[s].intersection_update(numbers if len(numbers) == 1 else ())
+        changed.append(s)
+
+
+def unit_obvious_pairs(cells, unit, changed):
+    """!
+    @brief Obvious Pairs within a unit: identical pairs are discarded from its other squares
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param unit (int) Index of the unit.
+    @param changed (list) The squares whose candidates changed, appended to.
+    """
+    squares = UNITS[unit]
+    for k, s in enumerate(squares):
+        pair = cells[s]
+        if len(pair) != 2:
+            continue
+        for other in squares[k + 1 :]:
+            if cells[other] == pair:
+                for rest in squares:
+                    if rest not in (s, other) and not pair.isdisjoint(cells[rest]):
+                        cells[rest].difference_update(pair)
+                        changed.append(rest)
+
+
+def unit_pointing(cells, unit, changed):
+    """!
+    @brief Pointing Pairs/Triples within a block: a number confined to one row or column
+    of the block is discarded from the rest of that row or column (other units are skipped)
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param unit (int) Index of the unit.
+    @param changed (list) The squares whose candidates changed, appended to.
+    """
+    if unit < 18:
+        return
+    first = 6 * (unit - 18)  # the intersections of the block
+    for _, _, inter, line_rest, block_rest in INTERSECTIONS[first : first + 6]:
+        pointing = set().union(*(cells[s] for s in inter))
+        pointing.difference_update(*(cells[s] for s in block_rest))
+        if pointing:
+            for s in line_rest:
+                if not pointing.isdisjoint(cells[s]):
+                    cells[s].difference_update(pointing)
+                    changed.append(s)
+
+
+def unit_claiming(cells, unit, changed):
+    """!
+    @brief Claiming (box-line reduction) within a row or column: a number confined to the
+    squares of the line in one block is discarded from the rest of that block (blocks are
+    skipped)
+
+    Reference: https://www.sudokuwiki.org/Intersection_Removal
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param unit (int) Index of the unit.
+    @param changed (list) The squares whose candidates changed, appended to.
+    """
+    if unit >= 18:
+        return
+    for _, _, inter, line_rest, block_rest in _LINE_INTERSECTIONS[unit]:
+        claiming = set().union(*(cells[s] for s in inter))
+        claiming.difference_update(*(cells[s] for s in line_rest))
+        if claiming:
+            for s in block_rest:
+                if not claiming.isdisjoint(cells[s]):
+                    cells[s].difference_update(claiming)
+                    changed.append(s)
+
+
+def unit_naked_subsets(cells, unit, changed, size):
+    """!
+    @brief Naked subsets within a unit: when 'size' squares of the unit have only 'size'
+    candidates between them, those numbers are discarded from its other squares (Obvious
+    Pairs are the subsets of size 2)
+
+    Reference: https://www.sudokuwiki.org/Naked_Candidates
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param unit (int) Index of the unit.
+    @param changed (list) The squares whose candidates changed, appended to.
+    @param size (int) The number of squares in a subset.
+    """
+    squares = UNITS[unit]
+    open_squares = [s for s in squares if 2 <= len(cells[s]) <= size]
+    for subset in combinations(open_squares, size):
+        numbers = set().union(*(cells[s] for s in subset))
+        if len(numbers) != size:
+            continue
+        for s in squares:
+            if s not in subset and not numbers.isdisjoint(cells[s]):
+                cells[s].difference_update(numbers)
+                changed.append(s)
+
+
+def unit_hidden_subsets(cells, unit, changed, size):
+    """!
+    @brief Hidden subsets within a unit: when 'size' numbers can only go in 'size' squares
+    of the unit between them, the other candidates of those squares are discarded
+
+    Reference: https://www.sudokuwiki.org/Hidden_Candidates
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param unit (int) Index of the unit.
+    @param changed (list) The squares whose candidates changed, appended to.
+    @param size (int) The number of numbers in a subset.
+    """
+    places = {}
+    for s in UNITS[unit]:
+        for n in cells[s]:
+            places.setdefault(n, set()).add(s)
+    numbers = [n for n, where in places.items() if 2 <= len(where) <= size]
+    for subset in combinations(numbers, size):
+        squares = set().union(*(places[n] for n in subset))
+        if len(squares) != size:
+            continue
+        for s in squares:
+            if not cells[s].issubset(subset):
+                cells[s].intersection_update(subset)
+                changed.append(s)
+
+
+def unit_naked_triples(cells, unit, changed):
+    """!
+    @brief Naked Triples within a unit (see 'unit_naked_subsets')
+    """
+    unit_naked_subsets(cells, unit, changed, 3)
+
+
+def unit_hidden_triples(cells, unit, changed):
+    """!
+    @brief Hidden Triples within a unit (see 'unit_hidden_subsets')
+    """
+    unit_hidden_subsets(cells, unit, changed, 3)
+
+
+def unit_naked_quads(cells, unit, changed):
+    """!
+    @brief Naked Quads within a unit (see 'unit_naked_subsets')
+    """
+    unit_naked_subsets(cells, unit, changed, 4)
+
+
+def unit_hidden_quads(cells, unit, changed):
+    """!
+    @brief Hidden Quads within a unit (see 'unit_hidden_subsets')
+    """
+    unit_hidden_subsets(cells, unit, changed, 4)
+
+
+def grid_fish(cells, changed, size):
+    """!
+    @brief Fish over the whole grid: when a number can only go in the same 'size' columns
+    of 'size' rows, it must take one square of each column in those rows, so it is discarded
+    from the rest of the columns (and the same with rows and columns swapped)
+
+    Reference: https://www.sudokuwiki.org/X_Wing_Strategy
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param changed (list) The squares whose candidates changed, appended to.
+    @param size (int) The number of rows (or columns) of the fish, 2 for X-Wing and 3 for
+    Swordfish.
+    """
+    for n in range(1, 10):
+        for lines, cover in ((range(9), COL_OF), (range(9, 18), ROW_OF)):
+            # the cover lines (columns of rows, or rows of columns) where n can go
+            covers = {}
+            for line in lines:
+                where = {cover[s] for s in UNITS[line] if n in cells[s]}
+                if 2 <= len(where) <= size:
+                    covers[line] = where
+            for base in combinations(covers, size):
+                cover_lines = set().union(*(covers[line] for line in base))
+                if len(cover_lines) != size:
+                    continue
+                offset = 9 if lines[0] == 0 else 0  # unit of a cover line
+                for k in cover_lines:
+                    for s in UNITS[offset + k]:
+                        if n in cells[s] and s not in _LINE_SQUARES[base]:
+                            cells[s].discard(n)
+                            changed.append(s)
+
+
+def grid_x_wing(cells, changed):
+    """!
+    @brief X-Wing over the whole grid (see 'grid_fish')
+    """
+    grid_fish(cells, changed, 2)
+
+
+def grid_swordfish(cells, changed):
+    """!
+    @brief Swordfish over the whole grid (see 'grid_fish')
+    """
+    grid_fish(cells, changed, 3)
+
+
+def grid_xy_wing(cells, changed):
+    """!
+    @brief XY-Wing over the whole grid: a pivot square with candidates {x, y} sees two
+    'pincer' squares with candidates {x, z} and {y, z}, so one of the pincers is z, and z
+    is discarded from the squares which see both pincers
+
+    Reference: https://www.sudokuwiki.org/Y_Wing_Strategy
+
+    @param cells (list) The 81 candidate sets of the grid, modified in place.
+    @param changed (list) The squares whose candidates changed, appended to.
+    """
+    for pivot in range(81):
+        if len(cells[pivot]) != 2:
+            continue
+        pincers = [
+            s
+            for s in PEERS[pivot]
+            if len(cells[s]) == 2 and len(cells[s] & cells[pivot]) == 1
+        ]
+        for first, second in combinations(pincers, 2):
+            if cells[first] & cells[pivot] == cells[second] & cells[pivot]:
+                continue  # the pincers must share different numbers with the pivot
+            shared = cells[first] & cells[second]
+            if len(shared) != 1 or not shared.isdisjoint(cells[pivot]):
+                continue
+            z = next(iter(shared))
+            for s in _PEER_SETS[first] & _PEER_SETS[second]:
+                if z in cells[s]:
+                    cells[s].discard(z)
+                    changed.append(s)
+
+
+# the intersections of each row and column, the squares of the base lines of each fish
+# (tuples of 2 or 3 rows, or of 2 or 3 columns), and the peers of each square as sets
+_LINE_INTERSECTIONS = [
+    [inter for inter in INTERSECTIONS if inter[1] == line] for line in range(18)
+]
+_LINE_SQUARES = {
+    lines: frozenset().union(*(UNITS[line] for line in lines))
+    for first in (0, 9)
+    for size in (2, 3)
+    for lines in combinations(range(first, first + 9), size)
+}
+_PEER_SETS = [frozenset(peers) for peers in PEERS]
+
+# the techniques within a unit, and the squares each can change for each unit
+UNIT_TECHNIQUES = {
+    "naked_singles": unit_naked_singles,
+    "hidden_singles": unit_hidden_singles,
+    "obvious_pairs": unit_obvious_pairs,
+    "pointing": unit_pointing,
+    "claiming": unit_claiming,
+    "naked_triples": unit_naked_triples,
+    "hidden_triples": unit_hidden_triples,
+    "naked_quads": unit_naked_quads,
+    "hidden_quads": unit_hidden_quads,
+}
+_SCOPES = {name: UNITS for name in UNIT_TECHNIQUES}
+_SCOPES["pointing"] = [[] for _ in range(18)] + [
+    sorted(
+        set(UNITS[18 + b]).union(
+            *(inter[3] for inter in INTERSECTIONS[6 * b : 6 * b + 6])
+        )
+    )
+    for b in range(9)
+]
+_SCOPES["claiming"] = [
+    sorted(set(UNITS[line]).union(*(inter[4] for inter in _LINE_INTERSECTIONS[line])))
+    for line in range(18)
+] + [[] for _ in range(9)]
+
+# the techniques over the whole grid, applied once the units have converged
+GRID_TECHNIQUES = {
+    "x_wing": grid_x_wing,
+    "xy_wing": grid_xy_wing,
+    "swordfish": grid_swordfish,
+}
+assert tuple(UNIT_TECHNIQUES) + tuple(GRID_TECHNIQUES) == ALL_TECHNIQUES
+
+
+def unit_elimination(cells, unit, techniques=TECHNIQUES, stats=None):
+    """!
+    @brief Apply the elimination techniques within a single unit
+
+    @details Restricting each technique to one unit (row, column or block):
+    - Naked Singles: singles in the unit are discarded from its other squares
+    - Hidden Singles: a number with only one possible square in the unit becomes the
+    only candidate of that square (a square forced to take two numbers is left empty)
+    - Obvious Pairs: identical pairs in the unit are discarded from its other squares
+    - Pointing Pairs/Triples (blocks only): a number confined to one row or column
+    of the block is discarded from the rest of that row or column
+    - the extra techniques within a unit, if selected (see 'UNIT_TECHNIQUES')
+
+    The techniques are applied in the order of ALL_TECHNIQUES, and the candidate sets are
+    modified in place.
+
+    @param cells (list) The 81 candidate sets of the grid (in row-major order).
+    @param unit (int) Index of the unit (0-8 rows, 9-17 columns, 18-26 blocks).
+    @param techniques (tuple, optional) Names of the techniques to apply (see ALL_TECHNIQUES,
+    techniques over the whole grid are ignored). Defaults to the four of TECHNIQUES.
+    @param stats (dict, optional) If provided, each technique applied is recorded in it
+    (see 'record_technique').
+
+    @return List of the squares whose candidates changed.
+    """
+    changed = []
+    for name, technique in UNIT_TECHNIQUES.items():
+        if name not in techniques:
+            continue
+        if stats is None:
+            technique(cells, unit, changed)
+            continue
+
+        scope = _SCOPES[name][unit]
+        if not scope:
+            continue  # the technique does not apply to this unit
+        before = sum(len(cells[s]) for s in scope)
+        start = perf_counter()
+        technique(cells, unit, changed)
+        seconds = perf_counter() - start
+        removed = before - sum(len(cells[s]) for s in scope)
+        record_technique(stats, name, seconds, removed)
+
+    return changed
+
+
+def grid_elimination(cells, techniques, stats=None):
+    """!
+    @brief Apply the first of the techniques over the whole grid which removes candidates
+
+    @details The techniques over the whole grid (X-Wing, XY-Wing and Swordfish, see
+    'GRID_TECHNIQUES') are tried cheapest first, stopping at the first one which removes
+    any candidates, so the cheaper techniques within units get to use them first.
+
+    @param cells (list) The 81 candidate sets of the grid (in row-major order), modified in
+    place.
+    @param techniques (tuple) Names of the techniques to apply (see ALL_TECHNIQUES,
+    techniques within a unit are ignored).
+    @param stats (dict, optional) If provided, each technique applied is recorded in it
+    (see 'record_technique').
+
+    @return List of the squares whose candidates changed.
+    """
+    changed = []
+    for name, technique in GRID_TECHNIQUES.items():
+        if name not in techniques:
+            continue
+        if stats is None:
+            technique(cells, changed)
+        else:
+            before = sum(len(cell) for cell in cells)
+            start = perf_counter()
+            technique(cells, changed)
+            seconds = perf_counter() - start
+            removed = before - sum(len(cell) for cell in cells)
+            record_technique(stats, name, seconds, removed)
+        if changed:
+            break
+
+    return changed
+
+
+def all_elimination(
+    candidates, squares=None, techniques=TECHNIQUES, stats=None, escalate=False
+):
     """!
     @brief Repeated application of all four elimination techniques
 
-    @details Applies the following candidate elimination techniques sequentially to the
-    candidates grid in a loop until no more candidates can be eliminated using these
-    techniques: 'Naked Singles', 'Hidden Singles', 'Obvious Pairs', 'Pointing Pairs/Triples'
+    @details Applies the following candidate elimination techniques to the candidates grid
+    until no more candidates can be eliminated using these techniques: 'Naked Singles',
+    'Hidden Singles', 'Obvious Pairs', 'Pointing Pairs/Triples'. A selection of these
+    techniques can be applied instead (Eg. to find which are needed to solve a puzzle), and
+    any of the extra techniques can be added (see EXTRA_TECHNIQUES).
+
+    Rather than sweeping the whole grid until it stops changing, the units to examine are
+    kept in a queue. Each unit taken from the queue has the techniques applied within it
+    (see 'unit_elimination'), and every square whose candidates changed queues its row,
+    column and block again. The units have converged when the queue is empty, and then the
+    selected techniques over the whole grid are tried (see 'grid_elimination'): the grid
+    has converged when none of them removes a candidate. Propagation stops early if a square
+    runs out of candidates, since the grid is then unsolvable.
+
+    With escalation, each technique has its own queue of units, and units are taken from
+    the queue of the cheapest technique (in the order of TECHNIQUES) which has any, so a
+    technique is only applied once the cheaper ones have stopped removing candidates. A
+    changed square queues its units for every technique. The grid converges to the same
+    candidates, with fewer applications of the expensive techniques (see scheduling.py).
 
     @param candidates (numpy.ndarray) The candidates grid as a numpy array.
+    @param squares (list, optional) Flat indices of the squares changed since the grid last
+    converged (Eg. the square branched on during backtracking). Only the units containing
+    these squares are queued initially. If None, every unit is queued.
+    @param techniques (tuple, optional) Names of the techniques to apply (see ALL_TECHNIQUES).
+    Defaults to the four of TECHNIQUES.
+    @param stats (dict, optional) If provided, each unit examined (and each pass over the
+    whole grid) is counted under "iterations", and each technique applied is recorded (see
+    instrumentation.py).
+    @param escalate (bool, optional) If True, apply the techniques cheapest first with
+    escalation (default is False).
 
     @return Updated candidates grid
     """
     # check candidates grid is of the correct type and shape
     assert isinstance(candidates, np.ndarray) and candidates.dtype == object
     assert candidates.shape == (9, 9)
+    assert set(techniques) <= set(ALL_TECHNIQUES), f"Unknown techniques {techniques}"
 
     # Take copy of candidates grid to avoid mutating the original
-    candidates = copy.deepcopy(candidates)
-
-    # Apply all elimination techniques until candidates grid stops changing
-    old_candidates = None
-    while not np.array_equal(candidates, old_candidates):
-        old_candidates = copy.deepcopy(candidates)
-        candidates = naked_singles_elimination(candidates)
-        candidates = hidden_singles_elimination(candidates)
-        candidates = obvious_pairs_elimination(candidates)
-        candidates = pointing_elimination(candidates)
-
+    cells = [set(cell) for cell in candidates.flat]
+
+    if squares is None:
+        queue = deque(range(27))
+    else:
+        queue = deque(sorted({unit for s in squares for unit in SQUARE_UNITS[s]}))
+    queued = [unit in queue for unit in range(27)]
+    if stats is not None:
+        init_elimination_stats(stats, techniques)
+
+    # one queue per group of techniques applied together (one per technique with escalation)
+    if escalate:
+        groups = [(name,) for name in UNIT_TECHNIQUES if name in techniques] or [()]
+    else:
+        groups = [techniques]
+    queues = [queue] + [deque(queue) for _ in groups[1:]]
+    flags = [queued] + [list(queued) for _ in groups[1:]]
+    grid = not set(techniques).isdisjoint(GRID_TECHNIQUES)
+
+    solvable = True
+    while solvable:
+        # the first group with queued units
+        k = next((k for k, queue in enumerate(queues) if queue), None)
+        if k is not None:
+            unit = queues[k].popleft()
+            flags[k][unit] = False
+            changed = unit_elimination(cells, unit, groups[k], stats)
+        elif grid:
+            changed = grid_elimination(cells, techniques, stats)
+            if not changed:
+                break
+        else:
+            break
+        if stats is not None:
+            stats["iterations"] += 1
+
+        for s in changed:
+            if not cells[s]:
+                solvable = False  # unsolvable, no need to continue
+                break
+            for other in SQUARE_UNITS[s]:
+                for queue, queued in zip(queues, flags):
+                    if not queued[other]:
+                        queued[other] = True
+                        queue.append(other)
+
+    candidates = np.empty((9, 9), dtype=object)
+    candidates.flat[:] = cells
     return candidates
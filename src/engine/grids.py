@@ -0,0 +1,430 @@
+"""!@file grids.py
+@brief Module containing a solver for Sudoku grids of any size (4x4 up to 25x25)
+
+@details A grid with blocks of box x box squares has n = box * box rows, columns, blocks
+and numbers (Eg. 16x16 grids with numbers 1-16 for box = 4), and is given as an n x n
+numpy array. The tables describing the grid are built by 'grid_tables' (see tables.py).
+
+The candidates of a square are a Python int used as a bitmask (bit k - 1 is set if k is
+a candidate), so masks scale to any number of candidates, and the grid is a list of the
+n * n masks. As in trail.py, the search works on a single masks grid modified in place,
+with every change pushed onto an undo trail, so the grid is never copied: copying the
+grid for every candidate tried is what makes the other solvers collapse on large grids.
+At each node, Naked Singles and Hidden Singles are propagated to a fixpoint, with a pass
+of Pointing and Claiming whenever the singles run out (on large grids this prunes the
+search tree by an order of magnitude), then the search branches on a square with the
+fewest candidates, or on the places of a number with only two places left in a unit.
+
+The complete grids used to generate puzzles are sampled by applying random symmetries
+(relabelling the numbers, reordering the rows and columns within bands and stacks,
+reordering the bands and stacks, and transposing) to a pattern grid.
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from math import isqrt
+from .tables import grid_tables
+from .instrumentation import reset_search
+
+# box sizes supported (4x4 up to 25x25 grids)
+BOX_SIZES = (2, 3, 4, 5)
+
+
+def box_size(puzzle):
+    """!
+    @brief Get the box size of a grid from its shape
+
+    @param puzzle (numpy.ndarray) An n x n numpy array, with n = box * box.
+
+    @return The box size (int).
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.ndim == 2
+    n = puzzle.shape[0]
+    box = isqrt(n)
+    assert (
+        puzzle.shape == (n, n) and box in BOX_SIZES
+    ), f"Unsupported shape {puzzle.shape}"
+    return box
+
+
+def init_masks(puzzle):
+    """!
+    @brief Initialise the masks grid of a puzzle
+
+    @details Each empty square gets the numbers not placed in its row, column or block,
+    and each filled square the single bit of its value.
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the puzzle (see 'box_size').
+
+    @return List of the n * n masks of the squares.
+    """
+    tables = grid_tables(box_size(puzzle))
+    n = tables["size"]
+    values = puzzle.ravel().tolist()
+
+    used = [0] * (3 * n)  # numbers placed in each unit
+    for s, value in enumerate(values):
+        if value:
+            for unit in tables["SQUARE_UNITS"][s]:
+                used[unit] |= 1 << (value - 1)
+
+    full = (1 << n) - 1
+    masks = []
+    for s, value in enumerate(values):
+        if value:
+            masks.append(1 << (value - 1))
+        else:
+            row, col, block = tables["SQUARE_UNITS"][s]
+            masks.append(full & ~(used[row] | used[col] | used[block]))
+    return masks
+
+
+def masks_to_puzzle(masks):
+    """!
+    @brief Convert a masks grid to a puzzle (0 for squares with several candidates)
+
+    @param masks (list) The masks grid.
+
+    @return An n x n numpy array of the values of the squares.
+    """
+    n = isqrt(len(masks))
+    values = [mask.bit_length() if mask & (mask - 1) == 0 else 0 for mask in masks]
+    return np.array(values).reshape((n, n))
+
+
+def undo(masks, trail, mark):
+    """!
+    @brief Roll the masks grid back to a mark of the trail
+
+    @param masks (list) The masks grid, modified in place.
+    @param trail (list) The undo trail of (square, previous mask) pairs.
+    @param mark (int) The length of the trail to roll back to.
+    """
+    while len(trail) > mark:
+        square, mask = trail.pop()
+        masks[square] = mask
+
+
+def propagate(masks, trail, tables, singles, units):
+    """!
+    @brief Propagate the singles, Pointing and Claiming in place, to a fixpoint
+
+    @details The value of each square in 'singles' is removed from its peers, and every
+    peer left with a single candidate is added to 'singles' in turn. Once there are no
+    singles left, the units whose squares changed are checked for Hidden Singles: a number
+    with only one place in a unit becomes the only candidate of that square, which makes
+    a new single. Once neither finds anything, Pointing and Claiming are applied (see
+    'intersection_removal'), and propagation resumes if they removed any candidates. Every
+    change is pushed onto the trail.
+
+    @param masks (list) The masks grid, modified in place.
+    @param trail (list) The undo trail of (square, previous mask) pairs.
+    @param tables (dict) The tables of the grid (see 'grid_tables').
+    @param singles (list) The squares with a single candidate to propagate, emptied.
+    @param units (set) The units to check for Hidden Singles.
+
+    @return False if a square or a number in a unit ran out of places (the grid is
+    unsolvable), otherwise True.
+    """
+    peers, square_units, unit_squares = (
+        tables["PEERS"],
+        tables["SQUARE_UNITS"],
+        tables["UNITS"],
+    )
+    full = (1 << tables["size"]) - 1
+
+    while True:
+        # Naked Singles
+        while singles:
+            s = singles.pop()
+            bit = masks[s]
+            for p in peers[s]:
+                mask = masks[p]
+                if mask & bit:
+                    trail.append((p, mask))
+                    mask ^= bit
+                    masks[p] = mask
+                    if mask & (mask - 1) == 0:
+                        if not mask:
+                            return False
+                        singles.append(p)
+                    units.update(square_units[p])
+
+        if not units:
+            return True
+
+        # Hidden Singles in the units which changed
+        checked, units = units, set()
+        for u in checked:
+            once = twice = 0
+            for s in unit_squares[u]:
+                mask = masks[s]
+                twice |= once & mask
+                once |= mask
+            if once != full:
+                return False  # a number has no place left in the unit
+            hidden = once & ~twice
+            if not hidden:
+                continue
+            for s in unit_squares[u]:
+                mask = masks[s]
+                single = mask & hidden
+                if single and single != mask:
+                    if single & (single - 1):
+                        return False  # two numbers only fit in this square
+                    trail.append((s, mask))
+                    masks[s] = single
+                    singles.append(s)
+                    units.update(square_units[s])
+        if not singles and not units:
+            # no singles left: remove candidates by Pointing and Claiming
+            if not intersection_removal(masks, trail, tables, singles, units):
+                return False
+            if not singles and not units:
+                return True
+
+
+def intersection_removal(masks, trail, tables, singles, units):
+    """!
+    @brief Apply Pointing and Claiming to every intersection of a line and a block, in place
+
+    @details For each intersection, the candidates of its squares are compared with those
+    of the rest of the line and the rest of the block. A number which has no place in the
+    rest of the block is removed from the rest of the line (Pointing), and a number which
+    has no place in the rest of the line is removed from the rest of the block (Claiming).
+    Every change is pushed onto the trail, and the squares left with a single candidate and
+    the units which changed are added to 'singles' and 'units'.
+
+    @param masks (list) The masks grid, modified in place.
+    @param trail (list) The undo trail of (square, previous mask) pairs.
+    @param tables (dict) The tables of the grid (see 'grid_tables').
+    @param singles (list) The squares with a single candidate, extended.
+    @param units (set) The units to check for Hidden Singles, extended.
+
+    @return False if a square ran out of candidates, otherwise True.
+    """
+    for block, line, inter, line_rest, block_rest in tables["INTERSECTIONS"]:
+        here = 0
+        for s in inter:
+            here |= masks[s]
+        line_other = 0
+        for s in line_rest:
+            line_other |= masks[s]
+        block_other = 0
+        for s in block_rest:
+            block_other |= masks[s]
+        pointing = here & ~block_other & line_other
+        claiming = here & ~line_other & block_other
+        for bits, rest in ((pointing, line_rest), (claiming, block_rest)):
+            if bits:
+                for s in rest:
+                    mask = masks[s]
+                    if mask & bits:
+                        trail.append((s, mask))
+                        mask &= ~bits
+                        masks[s] = mask
+                        if not mask:
+                            return False
+                        if mask & (mask - 1) == 0:
+                            singles.append(s)
+                        units.update(tables["SQUARE_UNITS"][s])
+    return True
+
+
+def setup(puzzle):
+    """!
+    @brief Set up the masks grid of a puzzle, and propagate its singles
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the puzzle (see 'box_size').
+
+    @return Tuple of the masks grid and the tables of the grid, or None if the puzzle is
+    found to be unsolvable.
+    """
+    tables = grid_tables(box_size(puzzle))
+    masks = init_masks(puzzle)
+    singles = [s for s, mask in enumerate(masks) if mask & (mask - 1) == 0]
+    if not all(masks) or not propagate(
+        masks, [], tables, singles, set(range(len(tables["UNITS"])))
+    ):
+        return None
+    return masks, tables
+
+
+def choose(masks, tables):
+    """!
+    @brief Choose the alternatives to branch on, as few as possible
+
+    @details The alternatives are the candidates of the unsolved square with the fewest
+    candidates. If that square has more than two candidates, and a number has only two
+    places left in a unit, the two places are branched on instead.
+
+    @param masks (list) The masks grid.
+    @param tables (dict) The tables of the grid (see 'grid_tables').
+
+    @return List of (square, bit) alternatives, or None if every square is solved.
+    """
+    best, best_count = None, 1 << 30
+    for s, mask in enumerate(masks):
+        if mask & (mask - 1):
+            count = mask.bit_count()
+            if count < best_count:
+                best, best_count = s, count
+                if count == 2:
+                    break
+    if best is None:
+        return None
+
+    if best_count > 2:
+        for unit in tables["UNITS"]:
+            once = twice = thrice = 0
+            for s in unit:
+                mask = masks[s]
+                thrice |= twice & mask
+                twice |= once & mask
+                once |= mask
+            pairs = twice & ~thrice  # numbers with exactly two places
+            if pairs:
+                bit = pairs & -pairs
+                return [(s, bit) for s in unit if masks[s] & bit]
+
+    mask = masks[best]
+    return [(best, 1 << n) for n in range(mask.bit_length()) if mask >> n & 1]
+
+
+def iterate(masks, trail, tables, stats=None, depth=0):
+    """!
+    @brief Recursive generator of the solutions of a puzzle using in-place backtracking
+
+    @details Each of the alternatives chosen (see 'choose') is tried in turn: the trail is
+    marked, the square is set to the number and the singles are propagated, and after
+    recursing the grid is rolled back to the mark (also when the generator is closed).
+
+    @param masks (list) The masks grid, modified in place.
+    @param trail (list) The undo trail of (square, previous mask) pairs.
+    @param tables (dict) The tables of the grid (see 'grid_tables').
+    @param stats (dict, optional) If provided, the search counts are added to it (see
+    instrumentation.py).
+    @param depth (int, optional) The number of branching choices made to reach this node.
+
+    @return Generator yielding each solution (n x n numpy array) as soon as it is found.
+    """
+    if stats is not None:
+        stats["nodes"] += 1
+        stats["max_depth"] = max(stats["max_depth"], depth)
+
+    branches = choose(masks, tables)
+    if branches is None:
+        yield masks_to_puzzle(masks)
+        return
+
+    for square, bit in branches:
+        mark = len(trail)
+        try:
+            trail.append((square, masks[square]))
+            masks[square] = bit
+            if propagate(masks, trail, tables, [square], set()):
+                yield from iterate(masks, trail, tables, stats, depth + 1)
+            elif stats is not None:
+                stats["backtracks"] += 1
+        finally:
+            undo(masks, trail, mark)  # backtrack
+
+
+def iter_grid_solutions(puzzle, stats=None):
+    """!
+    @brief Generator of the solutions of a puzzle of any size
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the puzzle (see 'box_size').
+    @param stats (dict, optional) If provided, the search counts are stored in it (see
+    instrumentation.py, elimination is not measured).
+
+    @return Generator yielding each solution (n x n numpy array) as soon as it is found.
+    """
+    if stats is not None:
+        reset_search(stats)
+    state = setup(puzzle)
+    if state is None:
+        return
+    masks, tables = state
+    yield from iterate(masks, [], tables, stats)
+
+
+def solve_grid(puzzle, num_solutions=1, stats=None):
+    """!
+    @brief Solve a puzzle of any size (see 'iter_grid_solutions')
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the puzzle.
+    @param num_solutions (int, optional) The number of solutions to find (default is 1).
+    @param stats (dict, optional) If provided, the search counts are stored in it.
+
+    @return As 'backtracker' (see backtracking.py): the solution if one solution is
+    requested, a list of solutions if more are requested, or the string "UNSOLVABLE" if
+    no solutions are found.
+    """
+    assert num_solutions >= 1, "The number of solutions must be at least 1"
+    solutions = []
+    generator = iter_grid_solutions(puzzle, stats)
+    for solution in generator:
+        solutions.append(solution)
+        if len(solutions) >= num_solutions:
+            break
+    generator.close()
+
+    if not solutions:
+        return "UNSOLVABLE"
+    return solutions[0] if num_solutions == 1 else solutions
+
+
+def count_grid_solutions(puzzle, limit=2, stats=None):
+    """!
+    @brief Count the solutions of a puzzle of any size, up to a limit
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the puzzle.
+    @param limit (int, optional) The maximum number of solutions to count (default is 2).
+    @param stats (dict, optional) If provided, the search counts are stored in it.
+
+    @return The number of solutions of the puzzle, capped at limit.
+    """
+    assert limit >= 1, "The limit must be at least 1"
+    total = 0
+    generator = iter_grid_solutions(puzzle, stats)
+    for _ in generator:
+        total += 1
+        if total >= limit:
+            break
+    generator.close()
+    return total
+
+
+def sample_grid(box, rng=None):
+    """!
+    @brief Sample a random complete grid of any size
+
+    @details The pattern grid, where square (i, j) holds (box * (i % box) + i // box + j)
+    % n + 1, is complete. Random symmetries are applied to it (see the module description),
+    each of which maps complete grids to complete grids.
+
+    @param box (int) The box size of the grid.
+    @param rng (numpy.random.Generator, optional) Random generator.
+
+    @return An n x n numpy array of the complete grid.
+    """
+    assert box in BOX_SIZES, f"Unsupported box size {box}"
+    rng = np.random.default_rng() if rng is None else rng
+    n = box * box
+
+    i, j = np.indices((n, n))
+    grid = (box * (i % box) + i // box + j) % n + 1
+
+    def line_order():
+        # shuffle the bands (or stacks), then the lines within each
+        return np.concatenate(
+            [box * band + rng.permutation(box) for band in rng.permutation(box)]
+        )
+
+    grid = grid[line_order()][:, line_order()]
+    if rng.random() < 0.5:
+        grid = grid.T
+    relabel = np.concatenate([[0], rng.permutation(n) + 1])
+    return relabel[grid]
@@ -0,0 +1,113 @@
+"""!@file instrumentation.py
+@brief Module containing the statistics collected by the solvers
+
+@details The search functions and candidate elimination functions take an optional 'stats'
+dict. When it is None (the default) nothing is measured, and when it is provided they fill
+in the following keys:
+- "nodes": the number of search nodes visited
+- "backtracks": the number of dead ends, where a branch was abandoned because its
+  propagation left a square without candidates
+- "max_depth": the greatest number of branching choices made on the way to a node
+- "iterations": the number of fixpoint iterations of candidate elimination (the meaning
+  depends on the representation: a unit examined for the candidates grid of sets, a sweep
+  of the whole grid for the masks grid, and a round of examining the changed entries for
+  the masks grid with an undo trail)
+- "calls", "seconds" and "removed": dicts giving, for each elimination technique (see
+  TECHNIQUES in elimination.py, and any extra techniques applied), the number of times it
+  was applied, the time spent applying it and the number of candidates it removed
+
+The search counts are reset at the start of each search, while the elimination counts are
+added to, so candidate elimination done before a search (Eg. by solve_sudoku.py) is
+included. Since the timers surround every application of a technique, collecting stats
+slows solving down, but the relative cost of the techniques is preserved. Each application
+of a technique is recorded with 'record_technique' (see elimination.py).
+
+@author Created by W.D Knottenbelt
+"""
+
+import json
+from .elimination import ALL_TECHNIQUES, init_elimination_stats
+
+# counts of the search, reset at the start of each search
+SEARCH_COUNTS = ("nodes", "backtracks", "max_depth")
+
+
+def init_stats(stats):
+    """!
+    @brief Add any missing keys to a stats dict (with zero counts)
+
+    @param stats (dict) The stats dict, modified in place.
+
+    @return The stats dict.
+    """
+    for name in SEARCH_COUNTS:
+        stats.setdefault(name, 0)
+    return init_elimination_stats(stats)
+
+
+def reset_search(stats):
+    """!
+    @brief Reset the search counts of a stats dict, keeping the elimination counts
+
+    @param stats (dict) The stats dict, modified in place.
+
+    @return The stats dict.
+    """
+    for name in SEARCH_COUNTS:
+        stats[name] = 0
+    return init_stats(stats)
+
+
+def merge_stats(total, stats, depth=0):
+    """!
+    @brief Add the stats of a search to a total (Eg. of the subproblems of a parallel search)
+
+    @param total (dict) The total stats dict, modified in place.
+    @param stats (dict) The stats dict to add.
+    @param depth (int, optional) The depth at which the search started (default is 0).
+
+    @return The total stats dict.
+    """
+    init_stats(total)
+    init_stats(stats)
+    total["nodes"] += stats["nodes"]
+    total["backtracks"] += stats["backtracks"]
+    total["max_depth"] = max(total["max_depth"], stats["max_depth"] + depth)
+    total["iterations"] += stats["iterations"]
+    for name in ("calls", "seconds", "removed"):
+        for technique, count in stats[name].items():
+            total[name][technique] = total[name].get(technique, 0) + count
+    return total
+
+
+def format_stats(stats, form="text"):
+    """!
+    @brief Format a stats dict for printing
+
+    @param stats (dict) The stats dict.
+    @param form (str, optional) "text" for a table, or "json" (default is "text").
+
+    @return The formatted string.
+    """
+    assert form in ("text", "json"), f"Unknown stats format '{form}'"
+    stats = init_stats(dict(stats))
+
+    if form == "json":
+        keys = SEARCH_COUNTS + ("iterations", "calls", "seconds", "removed")
+        ordered = {name: stats[name] for name in keys}
+        ordered.update(stats)  # any other counts (Eg. of the solution cache)
+        return json.dumps(ordered, indent=2)
+
+    lines = [
+        f"Search nodes: {stats['nodes']}",
+        f"Backtracks: {stats['backtracks']}",
+        f"Maximum depth: {stats['max_depth']}",
+        f"Elimination iterations: {stats['iterations']}",
+        f"{'Technique':<16}{'Calls':>10}{'Seconds':>12}{'Removed':>10}",
+    ]
+    for technique in (name for name in ALL_TECHNIQUES if name in stats["calls"]):
+        lines.append(
+            f"{technique:<16}{stats['calls'][technique]:>10}"
+            f"{stats['seconds'][technique]:>12.4f}{stats['removed'][technique]:>10}"
+        )
+    return "\n".join(lines)
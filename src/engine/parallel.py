@@ -0,0 +1,256 @@
+"""!@file parallel.py
+@brief Module containing functionality for solving Sudoku puzzles on multiple cores
+
+@details A single hard puzzle is solved in parallel by splitting its search tree:
+the tree is expanded breadth-first from the root (with candidate elimination at
+every node, as in bitmask.py) until there are several times more open nodes than
+workers. Each open node is a subproblem, made of the partial assignment of the
+(square, number) choices leading to it and its reduced masks grid. Subproblems
+are handed to a process pool one at a time, so a worker which finishes an easy
+subtree immediately takes the next one, and the work stays balanced even though
+subtrees differ greatly in size. Once the requested number of solutions has been
+found, the pool is terminated, cancelling the remaining searches.
+
+The module also contains 'solve_many', which solves a stream of many puzzles
+across a pool of workers.
+
+@author Created by W.D Knottenbelt
+"""
+
+import os
+import numpy as np
+from itertools import islice
+from multiprocessing import Pool
+from time import perf_counter
+from . import bitmask, backtracking
+from .branching import STRATEGIES
+from .instrumentation import reset_search, merge_stats
+
+# number of subproblems created for each worker, so that idle workers can take
+# more work while others are busy with large subtrees
+SUBPROBLEMS_PER_WORKER = 8
+
+
+def split(masks, target, strategy="first", stats=None):
+    """!
+    @brief Split a search tree into subproblems by breadth-first expansion
+
+    @details Each level of the tree is expanded in turn (branching with the branching
+    strategy, and applying candidate elimination to each child) until there are at least
+    'target' open nodes, or no more nodes to expand. Children found to be unsolvable are
+    discarded, and children which are solved are returned separately.
+
+    @param masks (numpy.ndarray) The masks grid, with candidate elimination already applied.
+    @param target (int) The number of subproblems to aim for.
+    @param strategy (str, optional) Name of the branching strategy (default is "first").
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
+
+    @return Tuple of the list of subproblems, each a tuple (assignment, masks) where the
+    assignment is the list of (square, number) choices made, and the list of masks grids
+    which are solved.
+    """
+    frontier = [([], masks)]
+    solved = []
+
+    while frontier and len(frontier) < target:
+        next_frontier = []
+        for assignment, node in frontier:
+            if stats is not None:
+                stats["nodes"] += 1
+                stats["max_depth"] = max(stats["max_depth"], len(assignment))
+
+            branches = STRATEGIES[strategy](node.tolist())
+            if branches is None:
+                solved.append(node)
+                continue
+
+            for square, n in branches:
+                child = node.copy()
+                child[square] = bitmask.BIT[n]
+                child = bitmask.all_elimination(child, stats)
+                if bitmask.solvable(child):
+                    next_frontier.append((assignment + [(square, n)], child))
+                elif stats is not None:
+                    stats["backtracks"] += 1
+        frontier = next_frontier
+
+    return frontier, solved
+
+
+def search_subproblem(task):
+    """!
+    @brief Search the subtree of a subproblem (run by the workers of the pool)
+
+    @param task (tuple) Tuple of the puzzle, the masks grid of the subproblem, the number
+    of solutions to find, the search method, the branching strategy, whether to collect
+    stats and the scheduling policy (or scheduler).
+
+    @return Tuple of the list of solutions found (at most the number requested) and the
+    stats of the search (see instrumentation.py), or None if they are not collected.
+    """
+    puzzle, masks, num_solutions, method, strategy, collect, schedule = task
+    if method == "sets":
+        candidates = bitmask.masks_to_candidates(masks)
+    else:
+        candidates = masks
+
+    stats = {} if collect else None
+    generator = backtracking.iter_solutions(
+        puzzle, candidates, method, strategy, stats, schedule
+    )
+    solutions = list(islice(generator, num_solutions))
+    generator.close()
+    return solutions, stats
+
+
+def parallel_search(
+    puzzle,
+    candidates=None,
+    num_solutions=1,
+    method="sets",
+    strategy="first",
+    workers=2,
+    stats=None,
+    schedule=None,
+):
+    """!
+    @brief Function to find solutions of a Sudoku puzzle, searching subtrees on multiple cores.
+
+    @details The search tree is split into subproblems (see 'split'), which are searched by a
+    pool of worker processes using 'backtracking.iter_solutions' (with the given method and
+    branching strategy). Subproblems are handed out one at a time, in the order they were
+    created, and results are collected as soon as any worker finishes. The pool is terminated
+    as soon as enough solutions have been found.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param candidates (numpy.ndarray, optional) Candidates grid of sets (or masks grid). Initialized if None.
+    @param num_solutions (int, optional) The number of solutions to find (default is 1).
+    @param method (str, optional) The search method used by the workers (default is "sets").
+    @param strategy (str, optional) The branching strategy (default is "first").
+    @param workers (int, optional) The number of worker processes (default is 2).
+    @param stats (dict, optional) If provided, the search counts (over all workers) are stored
+    in it, and the elimination costs added to it (see instrumentation.py).
+    @param schedule (str or dict, optional) The scheduling policy of the elimination techniques
+    used by the workers, or a scheduler (see scheduling.py). Default is None, for "fixed".
+
+    @return A list of at most num_solutions solutions (empty if the puzzle is unsolvable).
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+    assert workers >= 1, "There must be at least one worker"
+
+    if stats is not None:
+        reset_search(stats)
+
+    # initialise masks grid, converting the candidates grid if one is provided
+    if candidates is None:
+        masks = bitmask.init_masks(puzzle)
+    elif candidates.dtype == object:
+        masks = bitmask.candidates_to_masks(candidates)
+    else:
+        masks = candidates
+
+    masks = bitmask.all_elimination(masks, stats)
+    if not bitmask.solvable(masks):
+        subproblems, solved = [], []
+    else:
+        target = SUBPROBLEMS_PER_WORKER * workers
+        subproblems, solved = split(masks, target, strategy, stats)
+
+    solutions = [bitmask.filler(puzzle, node) for node in solved[:num_solutions]]
+
+    if subproblems and len(solutions) < num_solutions:
+        collect = stats is not None
+        tasks = [
+            (puzzle, node, num_solutions, method, strategy, collect, schedule)
+            for _, node in subproblems
+        ]
+        # leaving the 'with' block terminates the pool (cancelling the other searches)
+        with Pool(workers) as pool:
+            # every subproblem is at the same depth (one level of the split)
+            depth = len(subproblems[0][0])
+            for found, sub_stats in pool.imap_unordered(search_subproblem, tasks):
+                solutions.extend(found)
+                if collect:
+                    merge_stats(stats, sub_stats, depth)
+                if len(solutions) >= num_solutions:
+                    break
+
+    return solutions[:num_solutions]
+
+
+def solve_one(task):
+    """!
+    @brief Solve one puzzle of a batch with elimination and backtracking (run by the workers)
+
+    @param task (tuple) Tuple of the index of the puzzle, the puzzle, the search method,
+    the branching strategy and the scheduling policy.
+
+    @return Tuple of the index, the solution (or the string "UNSOLVABLE") and the time
+    taken to solve the puzzle in seconds.
+    """
+    index, puzzle, method, strategy, schedule = task
+    start = perf_counter()
+    solution = backtracking.backtracker(
+        puzzle, method=method, strategy=strategy, schedule=schedule
+    )
+    return index, solution, perf_counter() - start
+
+
+def solve_many(
+    puzzles,
+    workers=None,
+    chunksize=64,
+    ordered=True,
+    method="trail",
+    strategy="first",
+    schedule=None,
+):
+    """!
+    @brief Generator solving many puzzles across a pool of worker processes
+
+    @details Each puzzle is solved with 'backtracker' (candidate elimination, then
+    backtracking with the given method and branching strategy). Puzzles are sent to the
+    workers in chunks of 'chunksize', so the cost of communicating with the workers is
+    shared by many (typically fast) solves. The puzzles are read from the iterable in
+    windows of a few chunks per worker, so memory use does not grow with the number of
+    puzzles. With a single worker, the puzzles are solved in this process.
+
+    @param puzzles (iterable) The puzzles, as an (N, 9, 9) numpy array or an iterable
+    of 9x9 numpy arrays.
+    @param workers (int, optional) The number of worker processes (default is the number of cores).
+    @param chunksize (int, optional) The number of puzzles sent to a worker at once (default is 64).
+    @param ordered (bool, optional) If True (default), results are yielded in the order of
+    the puzzles, otherwise as soon as they are complete.
+    @param method (str, optional) The search method (default is "trail").
+    @param strategy (str, optional) The branching strategy (default is "first").
+    @param schedule (str or dict, optional) The scheduling policy, or a scheduler created by
+    'new_scheduler' (default is None, for "fixed"). With a single worker, a scheduler learns
+    from every puzzle, otherwise each chunk is solved with a copy.
+
+    @return Generator yielding a tuple (index, solution, seconds) for each puzzle, where
+    solution is the string "UNSOLVABLE" if the puzzle has no solutions.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    assert workers >= 1, "There must be at least one worker"
+    assert chunksize >= 1, "The chunk size must be at least 1"
+
+    tasks = (
+        (index, np.asarray(puzzle), method, strategy, schedule)
+        for index, puzzle in enumerate(puzzles)
+    )
+
+    if workers == 1:
+        for task in tasks:
+            yield solve_one(task)
+        return
+
+    window = 4 * workers * chunksize
+    with Pool(workers) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        while True:
+            batch = list(islice(tasks, window))
+            if not batch:
+                break
+            yield from imap(solve_one, batch, chunksize)
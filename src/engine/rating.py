@@ -0,0 +1,163 @@
+"""!@file rating.py
+@brief Module containing a rating engine measuring how hard a puzzle is to solve by elimination
+
+@details A puzzle is rated by solving it one step at a time, as a person would: each step
+applies the cheapest of the four elimination techniques (in the order of TECHNIQUES) which
+removes at least one candidate, to the whole grid at once. Rating stops when the puzzle is
+solved, when no technique removes a candidate (so backtracking is needed), or when a square
+runs out of candidates (so the puzzle is unsolvable). The steps are recorded as a trace of
+the technique applied and the number of candidates it removed.
+
+The difficulty class of a puzzle is given by the hardest technique in its trace:
+- "singles": Naked Singles
+- "hidden_singles": Hidden Singles
+- "obvious_pairs": Obvious Pairs
+- "pointing": Pointing Pairs/Triples
+- "backtracking": not solved by the four techniques (including unsolvable puzzles)
+
+Since applying a technique never prevents another from applying later, this is also the
+first class whose techniques, together with those of the easier classes, solve the puzzle.
+
+The numeric rating is 1-5 for the class (in the order above) plus a fraction below 1, which
+grows with the number of steps of the hardest technique (or, for "backtracking", with the
+number of squares left unsolved). Ratings therefore order puzzles by class first, then by
+how often they need their hardest technique, and thresholds on them can route puzzles to
+solver tiers. The steps run on the bitmask grid (see bitmask.py), so a puzzle is rated in
+around a millisecond, and many puzzles can be rated on a pool of workers ('rate_many').
+
+@author Created by W.D Knottenbelt
+"""
+
+import os
+import numpy as np
+from itertools import islice
+from multiprocessing import Pool
+from . import bitmask
+from .elimination import TECHNIQUES
+
+# difficulty classes, from the easiest (the first four match TECHNIQUES)
+DIFFICULTIES = (
+    "singles",
+    "hidden_singles",
+    "obvious_pairs",
+    "pointing",
+    "backtracking",
+)
+
+# bitmask versions of the techniques, from the cheapest
+STEPS = bitmask.ELIMINATIONS
+assert tuple(name for name, _ in STEPS) == TECHNIQUES
+
+
+def rate(puzzle):
+    """!
+    @brief Rate a puzzle by its trace of elimination steps
+
+    @details See the module description. The rating is returned as a dict with the keys:
+    - "rating": the numeric rating (float)
+    - "difficulty": the name of the difficulty class
+    - "status": "solved", "stuck" (backtracking is needed) or "unsolvable" (a square ran
+      out of candidates)
+    - "steps": the trace, a list of tuples (technique, candidates removed)
+    - "fired": the number of steps of each technique (dict keyed by TECHNIQUES)
+    - "removed": the number of candidates removed by each technique (dict keyed by TECHNIQUES)
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+
+    @return Dict of the rating of the puzzle.
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+
+    masks = bitmask.init_masks(puzzle)
+    count = int(bitmask.POPCOUNT[masks].sum())
+    steps = []
+
+    status = "stuck"
+    while bitmask.solvable(masks):
+        if count == 81:
+            status = "solved"
+            break
+
+        for name, technique in STEPS:
+            masks = technique(masks.copy())
+            removed = count - int(bitmask.POPCOUNT[masks].sum())
+            if removed:
+                steps.append((name, removed))
+                count -= removed
+                break
+        else:
+            break  # no technique removes a candidate
+    else:
+        status = "unsolvable"
+
+    fired = dict.fromkeys(TECHNIQUES, 0)
+    removed = dict.fromkeys(TECHNIQUES, 0)
+    for name, amount in steps:
+        fired[name] += 1
+        removed[name] += amount
+
+    if status == "solved":
+        level = max((TECHNIQUES.index(name) for name, _ in steps), default=0)
+        effort = fired[TECHNIQUES[level]]
+        fraction = effort / (effort + 1)
+    else:
+        level = len(TECHNIQUES)
+        fraction = np.count_nonzero(bitmask.POPCOUNT[masks] != 1) / 81
+
+    return {
+        "rating": level + 1 + fraction,
+        "difficulty": DIFFICULTIES[level],
+        "status": status,
+        "steps": steps,
+        "fired": fired,
+        "removed": removed,
+    }
+
+
+def rate_one(task):
+    """!
+    @brief Rate one puzzle of a batch (run by the workers of the pool)
+
+    @param task (tuple) Tuple of the index of the puzzle and the puzzle.
+
+    @return Tuple of the index and the rating of the puzzle (see 'rate').
+    """
+    index, puzzle = task
+    return index, rate(puzzle)
+
+
+def rate_many(puzzles, workers=None, chunksize=64):
+    """!
+    @brief Generator rating many puzzles across a pool of worker processes
+
+    @details As in 'solve_many' (see parallel.py), puzzles are sent to the workers in
+    chunks, and read from the iterable a few chunks per worker at a time, so a whole
+    corpus can be rated in one pass (Eg. from 'iter_corpus' in toolkit/corpus.py). With
+    a single worker, the puzzles are rated in this process.
+
+    @param puzzles (iterable) The puzzles, as an (N, 9, 9) numpy array or an iterable
+    of 9x9 numpy arrays.
+    @param workers (int, optional) The number of worker processes (default is the number of cores).
+    @param chunksize (int, optional) The number of puzzles sent to a worker at once (default is 64).
+
+    @return Generator yielding a tuple (index, rating) for each puzzle, in order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    assert workers >= 1, "There must be at least one worker"
+    assert chunksize >= 1, "The chunk size must be at least 1"
+
+    tasks = ((index, np.asarray(puzzle)) for index, puzzle in enumerate(puzzles))
+
+    if workers == 1:
+        for task in tasks:
+            yield rate_one(task)
+        return
+
+    window = 4 * workers * chunksize
+    with Pool(workers) as pool:
+        while True:
+            batch = list(islice(tasks, window))
+            if not batch:
+                break
+            yield from pool.imap(rate_one, batch, chunksize)
@@ -0,0 +1,187 @@
+"""!@file sampler.py
+@brief Module containing fast samplers of random complete Sudoku grids
+
+@details Two ways of sampling complete grids are provided:
+- search: a randomised backtracking search on unit masks (bit n - 1 of a unit's mask is
+  set if n is placed in the unit), filling the square with the fewest candidates first
+  and trying its candidates in random order. On an empty board, the three blocks on the
+  diagonal share no rows or columns, so they are first filled with random permutations.
+- transform: random symmetries (see canonical.py) are applied to grids drawn from a pool
+  of grids sampled by search. Every complete grid is mapped to a complete grid, and
+  whole batches are transformed at once with NumPy, which is much faster than searching.
+  Grids only come from the equivalence classes of the grids in the pool, so a small
+  pool gives less varied grids than search (each class holds up to 2 * 6^8 * 9! grids).
+
+@author Created by W.D Knottenbelt
+"""
+
+import random
+import numpy as np
+from .tables import SQUARE_UNITS, POPCOUNT
+from .canonical import LINE_ORDERS
+
+# the three blocks on the diagonal (which share no rows or columns)
+_DIAGONAL = [
+    [9 * (3 * b + i) + 3 * b + j for i in range(3) for j in range(3)] for b in range(3)
+]
+
+
+def _search(values, used, empty, rand):
+    """!
+    @brief Randomised backtracking search filling the empty squares
+
+    @param values (list) The 81 squares (0 for empty squares), filled in place.
+    @param used (list) The 27 unit masks, updated in place.
+    @param empty (list) The empty squares.
+    @param rand (random.Random) Random generator for the order of the candidates.
+
+    @return True if the squares were filled, or False (leaving them empty) if there is no solution.
+    """
+    # the empty square with the fewest candidates
+    best, best_count, best_candidates = None, 10, 0
+    for s in empty:
+        if values[s]:
+            continue
+        row, col, block = SQUARE_UNITS[s]
+        candidates = ~(used[row] | used[col] | used[block]) & 511
+        count = POPCOUNT[candidates]
+        if count < best_count:
+            best, best_count, best_candidates = s, count, candidates
+            if count <= 1:
+                break
+
+    if best is None:
+        return True  # every square is filled
+    if best_count == 0:
+        return False
+
+    numbers = [n for n in range(1, 10) if best_candidates >> (n - 1) & 1]
+    rand.shuffle(numbers)
+
+    row, col, block = SQUARE_UNITS[best]
+    for n in numbers:
+        bit = 1 << (n - 1)
+        values[best] = n
+        used[row] |= bit
+        used[col] |= bit
+        used[block] |= bit
+
+        if _search(values, used, empty, rand):
+            return True
+
+        used[row] ^= bit
+        used[col] ^= bit
+        used[block] ^= bit
+    values[best] = 0
+    return False
+
+
+def random_grid(puzzle=None, rng=None):
+    """!
+    @brief Sample a random complete grid by randomised search
+
+    @param puzzle (numpy.ndarray, optional) A 9x9 numpy array of squares the grid must
+    contain (Eg. a near-empty board). Defaults to an empty board.
+    @param rng (random.Random, optional) Random generator (default is the 'random' module).
+
+    @return A 9x9 numpy array of the complete grid, or None if the puzzle has no solutions.
+    """
+    rand = random if rng is None else rng
+
+    if puzzle is None:
+        values = [0] * 81
+        for block in _DIAGONAL:
+            for s, n in zip(block, rand.sample(range(1, 10), 9)):
+                values[s] = n
+    else:
+        assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+        values = puzzle.flatten().tolist()
+
+    used = [0] * 27
+    for s, n in enumerate(values):
+        if n:
+            bit = 1 << (n - 1)
+            for unit in SQUARE_UNITS[s]:
+                if used[unit] & bit:
+                    return None  # number repeated in a unit
+                used[unit] |= bit
+
+    empty = [s for s in range(81) if not values[s]]
+    if not _search(values, used, empty, rand):
+        return None
+    return np.array(values).reshape((9, 9))
+
+
+def random_grids(count, rng=None):
+    """!
+    @brief Sample random complete grids by randomised search
+
+    @param count (int) The number of grids.
+    @param rng (random.Random, optional) Random generator (default is the 'random' module).
+
+    @return An (count, 9, 9) numpy array of complete grids.
+    """
+    grids = np.zeros((count, 9, 9), dtype=int)
+    for k in range(count):
+        grids[k] = random_grid(rng=rng)
+    return grids
+
+
+def transform_grids(pool, count, rng=None):
+    """!
+    @brief Sample random complete grids by transforming grids from a pool
+
+    @details Each grid is a grid drawn at random from the pool, with a random relabelling
+    of the numbers, random row and column orders (keeping bands and stacks together) and
+    a random transposition.
+
+    @param pool (numpy.ndarray) An (M, 9, 9) array of complete grids.
+    @param count (int) The number of grids.
+    @param rng (numpy.random.Generator, optional) Random generator.
+
+    @return An (count, 9, 9) numpy array of complete grids.
+    """
+    assert isinstance(pool, np.ndarray) and pool.ndim == 3 and pool.shape[1:] == (9, 9)
+    rng = np.random.default_rng() if rng is None else rng
+
+    grids = pool[rng.integers(len(pool), size=count)]
+    transpose = rng.random(count) < 0.5
+    grids[transpose] = grids[transpose].transpose(0, 2, 1)
+
+    rows = LINE_ORDERS[rng.integers(len(LINE_ORDERS), size=count)]
+    cols = LINE_ORDERS[rng.integers(len(LINE_ORDERS), size=count)]
+    grids = grids[np.arange(count)[:, None, None], rows[:, :, None], cols[:, None, :]]
+
+    # relabel with a random permutation of 1-9 (and 0 unchanged)
+    relabel = np.zeros((count, 10), dtype=grids.dtype)
+    relabel[:, 1:] = rng.permuted(np.tile(np.arange(1, 10), (count, 1)), axis=1)
+    grids = np.take_along_axis(relabel, grids.reshape(count, 81), axis=1)
+    return grids.reshape(count, 9, 9)
+
+
+def sample_grids(count, mode="transform", pool_size=256, seed=None, chunk_size=65536):
+    """!
+    @brief Generator of random complete grids
+
+    @param count (int) The number of grids.
+    @param mode (str, optional) "search" or "transform" (default is "transform").
+    @param pool_size (int, optional) The number of grids in the pool of "transform" mode,
+    sampled by search (default is 256).
+    @param seed (int, optional) Seed of the random generators (default is None, for a random seed).
+    @param chunk_size (int, optional) The number of grids in each array yielded.
+
+    @return Generator yielding (k, 9, 9) numpy arrays of at most chunk_size grids.
+    """
+    assert mode in ("search", "transform"), f"Unknown mode '{mode}'"
+    rng = np.random.default_rng(seed)
+    rand = random.Random(int(rng.integers(2**32)))
+
+    if mode == "transform":
+        pool = random_grids(pool_size, rand)
+
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        if mode == "search":
+            yield random_grids(size, rand)
+        else:
+            yield transform_grids(pool, size, rng)
@@ -0,0 +1,134 @@
+"""!@file scheduling.py
+@brief Module containing schedulers choosing the elimination techniques applied during search
+
+@details At every node of the backtracking search, candidate elimination is applied until
+no more candidates can be removed. A scheduler chooses which techniques are applied at a
+node, and whether they are applied in a fixed order or escalated. The policies are:
+- "fixed": every technique is applied on every pass, in the order of TECHNIQUES (the
+  behaviour of 'all_elimination' without a scheduler)
+- "escalate": cheapest first with escalation, the techniques are applied in the order of
+  TECHNIQUES, but each is only tried once the cheaper ones have stopped removing
+  candidates, and after it removes any the cheaper ones are applied again. The grid
+  converges to the same candidates as with "fixed", with fewer calls of the expensive
+  techniques.
+- "depth": depth-adaptive, as "escalate" at nodes up to 'singles_depth' choices deep, and
+  only Naked and Hidden Singles deeper in the tree, where few squares are left and the
+  other techniques rarely remove anything
+- "adaptive": as "escalate", but a technique other than the singles is skipped once it has
+  been applied 'WARMUP_CALLS' times and removes candidates at less than 'min_yield' times
+  the rate of all techniques together (in candidates per second). The rates are measured
+  at one node in every 'PROBE_INTERVAL', where every technique is applied and timed, so
+  the other nodes pay nothing for the measurements.
+
+A scheduler also selects the techniques scheduled, the four of TECHNIQUES by default, to
+which extra techniques (see EXTRA_TECHNIQUES in elimination.py) can be added for the
+search on the candidates grid of sets.
+
+A scheduler is a dict created by 'new_scheduler', owned by the caller, so the rates learnt
+by the "adaptive" policy can be kept from one puzzle to the next. The rates are measured in
+a stats dict (see instrumentation.py): the stats of the search if they are collected (then
+every node is timed anyway), and otherwise the scheduler's own.
+
+The weaker propagation of "depth" and "adaptive" can make the search tree larger, so these
+trade the cost of each node against the number of nodes.
+
+@author Created by W.D Knottenbelt
+"""
+
+from .elimination import TECHNIQUES, ALL_TECHNIQUES, init_elimination_stats
+
+POLICIES = ("fixed", "escalate", "depth", "adaptive")
+
+# the techniques kept deep in the tree by the "depth" policy
+SINGLES = ("naked_singles", "hidden_singles")
+
+# default search depth below which the "depth" policy only applies singles
+SINGLES_DEPTH = 6
+
+# the "adaptive" policy measures each technique for this many calls before skipping it
+WARMUP_CALLS = 64
+
+# default fraction of the overall rate of removals below which a technique is skipped
+MIN_YIELD = 0.05
+
+# the "adaptive" policy applies every technique at one node in this many
+PROBE_INTERVAL = 16
+
+
+def new_scheduler(
+    policy="fixed",
+    singles_depth=SINGLES_DEPTH,
+    min_yield=MIN_YIELD,
+    techniques=TECHNIQUES,
+):
+    """!
+    @brief Create a scheduler of elimination techniques
+
+    @param policy (str, optional) The policy (see the module description), default is "fixed".
+    @param singles_depth (int, optional) The deepest nodes at which the "depth" policy applies
+    every technique.
+    @param min_yield (float, optional) The fraction of the overall rate of removals below
+    which the "adaptive" policy skips a technique.
+    @param techniques (tuple, optional) Names of the techniques scheduled (see ALL_TECHNIQUES
+    in elimination.py), default is the four of TECHNIQUES.
+
+    @return The scheduler (dict).
+    """
+    assert policy in POLICIES, f"Unknown scheduling policy '{policy}'"
+    assert singles_depth >= 0, "The depth must not be negative"
+    assert set(techniques) <= set(ALL_TECHNIQUES), f"Unknown techniques {techniques}"
+    return {
+        "policy": policy,
+        "singles_depth": singles_depth,
+        "min_yield": min_yield,
+        "techniques": tuple(name for name in ALL_TECHNIQUES if name in techniques),
+        "nodes": 0,
+        "stats": init_elimination_stats({}, techniques),
+    }
+
+
+def schedule_techniques(scheduler, depth=0, stats=None):
+    """!
+    @brief Choose the elimination techniques applied at a node of the search
+
+    @param scheduler (dict) The scheduler (see 'new_scheduler'), or None for "fixed".
+    @param depth (int, optional) The number of branching choices made to reach the node.
+    @param stats (dict, optional) The stats of the search (see instrumentation.py), or None
+    if they are not collected.
+
+    @return Tuple of the names of the techniques to apply, whether to escalate them, and the
+    stats dict to record them in (or None).
+    """
+    if scheduler is None:
+        return TECHNIQUES, False, stats
+
+    policy = scheduler["policy"]
+    scheduled = scheduler["techniques"]
+    if policy == "fixed":
+        return scheduled, False, stats
+    if policy == "escalate":
+        return scheduled, True, stats
+    if policy == "depth":
+        if depth > scheduler["singles_depth"]:
+            return tuple(name for name in scheduled if name in SINGLES), True, stats
+        return scheduled, True, stats
+
+    # adaptive: apply and measure every technique at probe nodes
+    scheduler["nodes"] += 1
+    rates = scheduler["stats"] if stats is None else stats
+    if scheduler["nodes"] % PROBE_INTERVAL == 1:
+        return scheduled, True, rates
+
+    total_seconds = sum(rates["seconds"].values())
+    if total_seconds == 0:
+        return scheduled, True, stats
+    rate = sum(rates["removed"].values()) / total_seconds
+    techniques = tuple(
+        name
+        for name in scheduled
+        if name in SINGLES
+        or rates["calls"].get(name, 0) < WARMUP_CALLS
+        or rates["removed"][name]
+        >= scheduler["min_yield"] * rate * rates["seconds"][name]
+    )
+    return techniques, True, stats
@@ -0,0 +1,144 @@
+"""!@file tables.py
+@brief Module containing precomputed lookup tables describing the Sudoku grid
+
+@details Squares are identified by their flat index s = 9 * i + j (row-major order).
+Every table is built once at import time and is immutable: tuple forms are provided
+for scalar access in Python loops, and '_ARRAY' forms (NumPy integer arrays) for fancy
+indexing of flat grids (Eg. 'puzzle.ravel()[UNITS_ARRAY]' gives a 27x9 array of the
+values in every unit). The tables are:
+- ROW_OF, COL_OF, BLOCK_OF: the row, column and block of each square
+- SQUARE: SQUARE[i][j] is the flat index of square (i, j)
+- UNITS: the 27 units (rows 0-8, then columns 9-17, then blocks 18-26)
+- SQUARE_UNITS: the row, column and block unit of each square
+- PEERS: the 20 peers of each square (squares sharing a unit with it)
+- INTERSECTIONS: the 54 intersections of a block with a row or column
+- POPCOUNT: the number of candidates in each of the 512 possible candidate masks
+
+The same tables (except SQUARE, POPCOUNT and the NumPy forms) are built for grids of
+other sizes by 'grid_tables' (Eg. 16x16 grids, with blocks of 4x4 squares).
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from functools import cache
+
+
+@cache
+def grid_tables(box=3):
+    """!
+    @brief Build the lookup tables of a grid of any size
+
+    @details A grid with blocks of box x box squares has n = box * box rows, columns,
+    blocks and numbers, and n * n squares (Eg. 16x16 for box = 4). The tables are the
+    same as the module-level tables of the 9x9 grid (which are built by this function),
+    and are built once per box size.
+
+    @param box (int, optional) The number of rows (and columns) of a block (default is 3).
+
+    @return Dict of the tables "ROW_OF", "COL_OF", "BLOCK_OF", "UNITS", "SQUARE_UNITS",
+    "PEERS" and "INTERSECTIONS", with the "box" and "size" (n) of the grid.
+    """
+    assert box >= 1, "The box size must be at least 1"
+    n = box * box
+    squares = range(n * n)
+
+    row_of = tuple(s // n for s in squares)
+    col_of = tuple(s % n for s in squares)
+    block_of = tuple(box * (s // (n * box)) + (s % n) // box for s in squares)
+
+    # units (rows, then columns, then blocks) as tuples of flat indices
+    units = tuple(
+        [tuple(s for s in squares if row_of[s] == k) for k in range(n)]
+        + [tuple(s for s in squares if col_of[s] == k) for k in range(n)]
+        + [tuple(s for s in squares if block_of[s] == k) for k in range(n)]
+    )
+    square_units = tuple(
+        (row_of[s], n + col_of[s], 2 * n + block_of[s]) for s in squares
+    )
+    peers = tuple(
+        tuple(sorted(set().union(*(units[u] for u in square_units[s])) - {s}))
+        for s in squares
+    )
+
+    # each intersection of a block with a row or column (a 'line') is a tuple of
+    # (block unit, line unit, the squares in both, the rest of the line, the rest of
+    # the block), with the row intersections of each block before its columns
+    intersections = tuple(
+        (
+            block,
+            line,
+            tuple(s for s in units[line] if s in units[block]),
+            tuple(s for s in units[line] if s not in units[block]),
+            tuple(s for s in units[block] if s not in units[line]),
+        )
+        for block in range(2 * n, 3 * n)
+        for line in range(2 * n)
+        if set(units[line]) & set(units[block])
+    )
+
+    return {
+        "box": box,
+        "size": n,
+        "ROW_OF": row_of,
+        "COL_OF": col_of,
+        "BLOCK_OF": block_of,
+        "UNITS": units,
+        "SQUARE_UNITS": square_units,
+        "PEERS": peers,
+        "INTERSECTIONS": intersections,
+    }
+
+
+_TABLES = grid_tables(3)
+
+# row, column and block of each square
+ROW_OF = _TABLES["ROW_OF"]
+COL_OF = _TABLES["COL_OF"]
+BLOCK_OF = _TABLES["BLOCK_OF"]
+
+# flat index of each square (i, j)
+SQUARE = tuple(tuple(9 * i + j for j in range(9)) for i in range(9))
+
+# 27 units (rows, then columns, then blocks) as tuples of flat indices
+UNITS = _TABLES["UNITS"]
+
+# the row, column and block unit of each square
+SQUARE_UNITS = _TABLES["SQUARE_UNITS"]
+
+# the 20 peers of each square
+PEERS = _TABLES["PEERS"]
+
+# each intersection of a block with a row or column (a 'line') is a tuple of
+# (block unit, line unit, the 3 squares in both, the rest of the line, the rest of
+# the block), with the 3 row intersections of each block before its 3 columns
+INTERSECTIONS = _TABLES["INTERSECTIONS"]
+
+# number of candidates in each of the 512 possible masks (see bitmask.py)
+POPCOUNT = tuple(bin(mask).count("1") for mask in range(512))
+
+# NumPy forms for fancy indexing
+ROW_OF_ARRAY = np.array(ROW_OF, dtype=np.intp)
+COL_OF_ARRAY = np.array(COL_OF, dtype=np.intp)
+BLOCK_OF_ARRAY = np.array(BLOCK_OF, dtype=np.intp)
+UNITS_ARRAY = np.array(UNITS, dtype=np.intp)
+SQUARE_UNITS_ARRAY = np.array(SQUARE_UNITS, dtype=np.intp)
+PEERS_ARRAY = np.array(PEERS, dtype=np.intp)
+
+# squares of each intersection (54x3), and the rest of its line and block (54x6)
+INTERSECTION_ARRAY = np.array([x[2] for x in INTERSECTIONS], dtype=np.intp)
+LINE_REST_ARRAY = np.array([x[3] for x in INTERSECTIONS], dtype=np.intp)
+BLOCK_REST_ARRAY = np.array([x[4] for x in INTERSECTIONS], dtype=np.intp)
+
+for _table in (
+    ROW_OF_ARRAY,
+    COL_OF_ARRAY,
+    BLOCK_OF_ARRAY,
+    UNITS_ARRAY,
+    SQUARE_UNITS_ARRAY,
+    PEERS_ARRAY,
+    INTERSECTION_ARRAY,
+    LINE_REST_ARRAY,
+    BLOCK_REST_ARRAY,
+):
+    _table.flags.writeable = False
@@ -0,0 +1,479 @@
+"""!@file trail.py
+@brief Module containing in-place backtracking with a trail of eliminations
+
+@details The backtracking in backtracking.py (and bitmask.py) copies the whole
+candidates grid for every candidate it tries. This module instead works on a
+single masks grid (a Python list of bitmasks, as in bitmask.py) which is
+modified in place. Every time the candidates of a square change, the square and
+its previous mask are pushed onto an undo 'trail'. Before trying a candidate the
+length of the trail is saved as a 'mark', and when backtracking, the trail is
+popped back to the mark, restoring every square that was changed in between.
+The memory used per node of the search is therefore proportional to the number
+of eliminations made at that node, rather than to the size of the grid.
+
+The 81 square masks are followed in the same list by a 'places' index: for each
+unit u and number n, masks[81 + 9 * u + n - 1] is a 9-bit mask of the positions
+(within the unit, see tables.py) where n is still a candidate. 'eliminate' keeps
+the index up to date and records its changes on the trail like any other entry,
+so it stays consistent when backtracking. Hidden singles, pointing pairs/triples
+and box-line reduction are then lookups in the index, rather than scans of units.
+
+@author Created by W.D Knottenbelt
+"""
+
+import numpy as np
+from time import perf_counter
+from .tables import POPCOUNT as _POPCOUNT, UNITS as _UNITS, PEERS as _PEERS
+from .tables import SQUARE_UNITS, INTERSECTIONS
+from .branching import STRATEGIES
+from .elimination import TECHNIQUES, init_elimination_stats, record_technique
+from .scheduling import schedule_techniques
+
+# numbers (from 0 to 8) contained in each of the 512 possible masks
+_NUMBERS = tuple(tuple(n for n in range(9) if mask >> n & 1) for mask in range(512))
+
+# for each square, its 3 units as (index of the unit's places, position bit of the square)
+_SQUARE_PLACES = tuple(
+    tuple((81 + 9 * u, 1 << _UNITS[u].index(s)) for u in SQUARE_UNITS[s])
+    for s in range(81)
+)
+
+# for each entry of the places index, the squares of its unit and its number's bit
+_PLACE_UNIT = tuple(_UNITS[k // 9] for k in range(243))
+_PLACE_BIT = tuple(1 << (k % 9) for k in range(243))
+
+# for each unit, its intersections with other units as (mask of the positions of the
+# intersection within the unit, squares of the other unit outside the intersection)
+_SEGMENTS = tuple(
+    tuple(
+        (
+            sum(1 << _UNITS[u].index(s) for s in squares),
+            line_rest if u == block else block_rest,
+        )
+        for block, line, squares, line_rest, block_rest in INTERSECTIONS
+        if u in (block, line)
+    )
+    for u in range(27)
+)
+
+# for each unit and each of the 512 possible places masks of a number in it, the
+# squares the number can be eliminated from because its places are confined to
+# intersections with other units (empty if the places are not confined)
+_CONFINED = tuple(
+    tuple(
+        tuple(
+            sorted(
+                set().union(
+                    *(rest for segment, rest in _SEGMENTS[u] if places & ~segment == 0)
+                )
+            )
+        )
+        if places
+        else ()
+        for places in range(512)
+    )
+    for u in range(27)
+)
+
+
+def init_places(masks):
+    """!
+    @brief Append the places index to a masks grid
+
+    @param masks (list) The masks grid (list of 81 ints).
+
+    @return List of 324 ints: the masks grid followed by its places index.
+    """
+    masks = list(masks[:81])
+    for unit in _UNITS:
+        for n in range(9):
+            masks.append(
+                sum(1 << pos for pos, s in enumerate(unit) if masks[s] >> n & 1)
+            )
+    return masks
+
+
+def eliminate(masks, trail, square, bits):
+    """!
+    @brief Eliminate candidates from a square, recording the change on the trail
+
+    @details The places index is updated for each number eliminated, and each of
+    its changes is also recorded on the trail.
+
+    @param masks (list) The masks grid with places index (list of 324 ints), modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param square (int) Flat index of the square.
+    @param bits (int) Mask of the candidates to eliminate.
+
+    @return True if the square still has candidates, False otherwise.
+    """
+    mask = masks[square]
+    removed = mask & bits
+    if removed:
+        trail.append((square, mask))
+        masks[square] = mask ^ removed
+        for index, position in _SQUARE_PLACES[square]:
+            for n in _NUMBERS[removed]:
+                trail.append((index + n, masks[index + n]))
+                masks[index + n] &= ~position
+    return masks[square] != 0
+
+
+def undo(masks, trail, mark):
+    """!
+    @brief Roll the masks grid back to the state it was in at a trail mark
+
+    @param masks (list) The masks grid with places index, modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param mark (int) The length of the trail at the state to restore.
+    """
+    while len(trail) > mark:
+        index, mask = trail.pop()
+        masks[index] = mask
+
+
+def naked_singles_elimination(masks, trail, square):
+    """!
+    @brief Eliminate candidates in place using the naked singles technique.
+
+    @details If the square has a single candidate, it is eliminated from all of
+    the square's peers.
+
+    Reference: https://sudoku.com/sudoku-rules/obvious-singles/
+
+    @param masks (list) The masks grid with places index, modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param square (int) Flat index of the square.
+    """
+    mask = masks[square]
+    if _POPCOUNT[mask] == 1:
+        for peer in _PEERS[square]:
+            if masks[peer] & mask:
+                eliminate(masks, trail, peer, mask)
+
+
+def obvious_pairs_elimination(masks, trail, square):
+    """!
+    @brief Eliminate candidates in place using the obvious pairs technique.
+
+    @details If the square has two candidates, and another square in one of its
+    units has the same two candidates, those candidates are eliminated from the
+    other squares of the unit.
+
+    Reference: https://sudoku.com/sudoku-rules/obvious-pairs/
+
+    @param masks (list) The masks grid with places index, modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param square (int) Flat index of the square.
+    """
+    pair = masks[square]
+    if _POPCOUNT[pair] != 2:
+        return
+    for u in SQUARE_UNITS[square]:
+        unit = _UNITS[u]
+        for other in unit:
+            if other != square and masks[other] == pair:
+                # eliminate the pair from the rest of the unit
+                for s in unit:
+                    if s != square and s != other and masks[s] & pair:
+                        eliminate(masks, trail, s, pair)
+                break
+
+
+def hidden_singles_elimination(masks, trail, index):
+    """!
+    @brief Eliminate candidates in place using the hidden singles technique.
+
+    @details If the entry of the places index shows a number has a single place
+    in a unit, the number becomes the only candidate of the square in that place.
+    A square forced to take two numbers is left with no candidates.
+
+    Reference: https://sudoku.com/sudoku-rules/hidden-singles/
+
+    @param masks (list) The masks grid with places index, modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param index (int) Index of the entry of the places index (from 81 to 323).
+    """
+    places = masks[index]
+    if _POPCOUNT[places] == 1:
+        square = _PLACE_UNIT[index - 81][places.bit_length() - 1]
+        others = masks[square] & ~_PLACE_BIT[index - 81]
+        if others:
+            eliminate(masks, trail, square, others)
+
+
+def intersection_elimination(masks, trail, index):
+    """!
+    @brief Eliminate candidates in place using the pointing pairs/triples and
+    box-line reduction techniques.
+
+    @details If the entry of the places index shows every place of a number in
+    a unit lies in the unit's intersection with another unit, the number is
+    eliminated from the rest of the other unit. For a block, this is pointing
+    pairs/triples, and for a row or column, box-line reduction.
+
+    Reference 1: https://sudoku.com/sudoku-rules/pointing-pairs/
+    Reference 2: https://www.sudokuwiki.org/Intersection_Removal
+
+    @param masks (list) The masks grid with places index, modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param index (int) Index of the entry of the places index (from 81 to 323).
+    """
+    u, n = divmod(index - 81, 9)
+    rest = _CONFINED[u][masks[index]]
+    if rest:
+        bit = 1 << n
+        for s in rest:
+            if masks[s] & bit:
+                eliminate(masks, trail, s, bit)
+
+
+# the techniques applied to the squares, and to the entries of the places index
+_SQUARE_TECHNIQUES = (
+    ("naked_singles", naked_singles_elimination),
+    ("obvious_pairs", obvious_pairs_elimination),
+)
+_PLACE_TECHNIQUES = (
+    ("hidden_singles", hidden_singles_elimination),
+    ("pointing", intersection_elimination),
+)
+
+
+def examine(masks, trail, index, stats=None, techniques=TECHNIQUES):
+    """!
+    @brief Apply a selection of the elimination techniques to an entry of the masks grid
+
+    @details Same as the body of the loop in 'propagate', restricted to some techniques,
+    and optionally with each technique timed and its removals counted. Intersections
+    (pointing pairs/triples and box-line reduction) count as "pointing".
+
+    @param masks (list) The masks grid with places index, modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param index (int) Index of the entry of the masks grid (from 0 to 323).
+    @param stats (dict, optional) If provided, each technique applied is recorded (see
+    instrumentation.py).
+    @param techniques (tuple, optional) Names of the techniques to apply (see TECHNIQUES).
+    """
+    for name, technique in _SQUARE_TECHNIQUES if index < 81 else _PLACE_TECHNIQUES:
+        if name not in techniques:
+            continue
+        if stats is None:
+            technique(masks, trail, index)
+            continue
+
+        length = len(trail)
+        start = perf_counter()
+        technique(masks, trail, index)
+        seconds = perf_counter() - start
+
+        # the previous mask of each square changed (the first time it was changed)
+        previous = {}
+        for changed, mask in trail[length:]:
+            if changed < 81:
+                previous.setdefault(changed, mask)
+        removed = sum(
+            _POPCOUNT[mask] - _POPCOUNT[masks[s]] for s, mask in previous.items()
+        )
+        record_technique(stats, name, seconds, removed)
+
+
+def propagate(masks, trail, mark=None, stats=None, techniques=TECHNIQUES):
+    """!
+    @brief Repeated in-place application of the elimination techniques
+
+    @details Equivalent to 'all_elimination' with box-line reduction added, except
+    the masks grid is modified in place and every change is recorded on the trail.
+    The trail also serves as the queue of changes to propagate: each entry of the
+    masks grid which has changed since the mark is examined in turn (squares for
+    naked singles and obvious pairs, and the places index for hidden singles and
+    intersections), and any eliminations made are appended to the trail behind it.
+    The grid has converged when every change on the trail has been examined. If no
+    mark is given, every entry of the grid is examined first.
+
+    @param masks (list) The masks grid with places index, modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param mark (int, optional) Length of the trail when the grid had last converged.
+    @param stats (dict, optional) If provided, each round of examining the changed entries
+    is counted under "iterations", and each technique applied is recorded (see
+    instrumentation.py).
+    @param techniques (tuple, optional) Names of the techniques to apply (see TECHNIQUES).
+    Defaults to all four.
+
+    @return False if a square has no candidates, or a number has no places in a unit
+    (the grid is unsolvable), True otherwise.
+    """
+    if mark is None:
+        indices = list(range(324))
+        mark = len(trail)
+    else:
+        indices = []
+    if stats is not None:
+        init_elimination_stats(stats)
+    every = set(TECHNIQUES) <= set(techniques)
+
+    while True:
+        if stats is not None and indices:
+            stats["iterations"] += 1
+        for index in indices:
+            if masks[index] == 0:
+                return False
+            if stats is not None or not every:
+                examine(masks, trail, index, stats, techniques)
+            elif index < 81:
+                naked_singles_elimination(masks, trail, index)
+                obvious_pairs_elimination(masks, trail, index)
+            else:
+                hidden_singles_elimination(masks, trail, index)
+                intersection_elimination(masks, trail, index)
+
+        if mark == len(trail):
+            return True
+
+        # the entries changed since they were last examined (once each)
+        indices = dict.fromkeys(index for index, _ in trail[mark:])
+        mark = len(trail)
+
+
+def masks_to_puzzle(masks):
+    """!
+    @brief Convert a masks grid where every square has one candidate into a puzzle
+
+    @param masks (list) The masks grid (with or without places index).
+
+    @return A 9x9 numpy array of the values of the squares.
+    """
+    return np.array([mask.bit_length() for mask in masks[:81]]).reshape((9, 9))
+
+
+def iterate(
+    masks, trail, strategy="first", start=0, stats=None, depth=0, scheduler=None
+):
+    """!
+    @brief Recursive generator of the solutions of a Sudoku puzzle using in-place backtracking.
+
+    @details The branching strategy chooses the (square, number) alternatives, which are
+    tried in turn (in random order). The trail is marked before each alternative is tried
+    and, after the eliminations have been propagated and the function has recursed, the
+    grid is rolled back to the mark. The roll back also happens if the generator is closed
+    while suspended, so closing it early leaves the grid as it was found.
+
+    @param masks (list) The masks grid with places index (see 'init_places'), modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param strategy (str, optional) Name of the branching strategy (default is "first").
+    @param start (int, optional) Flat index of the square branched on at the parent node.
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
+    @param depth (int, optional) The number of branching choices made to reach this node.
+    @param scheduler (dict, optional) The scheduler of the elimination techniques applied
+    to the children (see scheduling.py, techniques are never escalated). Defaults to all four.
+
+    @return Generator yielding each solution as soon as it is found.
+    """
+    if stats is not None:
+        stats["nodes"] += 1
+        stats["max_depth"] = max(stats["max_depth"], depth)
+
+    # choose the (square, number) alternatives to branch on
+    branches = STRATEGIES[strategy](masks, start)
+
+    # we only get here if every square has a single candidate
+    if branches is None:
+        yield masks_to_puzzle(masks)
+        return
+
+    np.random.shuffle(branches)  # introduce randomness
+    techniques, _, measure = schedule_techniques(scheduler, depth + 1, stats)
+
+    for square, n in branches:
+        mark = len(trail)
+        try:
+            # eliminate all other candidates of the square, then propagate
+            bits = masks[square] & ~(1 << (n - 1))
+            if eliminate(masks, trail, square, bits) and propagate(
+                masks, trail, mark, measure, techniques
+            ):
+                yield from iterate(
+                    masks, trail, strategy, square, stats, depth + 1, scheduler
+                )
+            elif stats is not None:
+                stats["backtracks"] += 1
+        finally:
+            undo(masks, trail, mark)  # backtrack
+
+
+def solve(
+    masks, trail, solutions, num_solutions=1, strategy="first", start=0, stats=None
+):
+    """!
+    @brief Function to solve a Sudoku puzzle using in-place backtracking.
+
+    @details Collects the solutions generated by 'iterate' until enough are found, then
+    closes the generator, which rolls the grid back to the state it was found in.
+
+    @param masks (list) The masks grid with places index (see 'init_places'), modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param solutions (list) A list to store the solutions found.
+    @param num_solutions (int, optional) The number of solutions to find (default is 1).
+    @param strategy (str, optional) Name of the branching strategy (default is "first").
+    @param start (int, optional) Flat index of the square branched on at the parent node.
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
+
+    @return None. The function modifies the solutions list in place.
+    """
+    if len(solutions) >= num_solutions:
+        return
+
+    generator = iterate(masks, trail, strategy, start, stats)
+    for solution in generator:
+        solutions.append(solution)
+        if len(solutions) >= num_solutions:
+            break
+    generator.close()
+
+
+def count(masks, trail, limit, strategy="mrv", start=0, stats=None, depth=0):
+    """!
+    @brief Recursive function counting the solutions of a Sudoku puzzle, up to a limit.
+
+    @details Identical in structure to 'solve', except the alternatives are tried in
+    the (deterministic) order given by the branching strategy, no solutions are stored,
+    and the search stops as soon as the limit is reached.
+
+    @param masks (list) The masks grid with places index (see 'init_places'), modified in place.
+    @param trail (list) The undo trail of (index, previous mask) pairs.
+    @param limit (int) The maximum number of solutions to count.
+    @param strategy (str, optional) Name of the branching strategy (default is "mrv").
+    @param start (int, optional) Flat index of the square branched on at the parent node.
+    @param stats (dict, optional) If provided, the search counts and elimination costs are
+    added to it (see instrumentation.py).
+    @param depth (int, optional) The number of branching choices made to reach this node.
+
+    @return The number of solutions below this node, capped at limit.
+    """
+    if stats is not None:
+        stats["nodes"] += 1
+        stats["max_depth"] = max(stats["max_depth"], depth)
+
+    branches = STRATEGIES[strategy](masks, start)
+    if branches is None:
+        return 1
+
+    total = 0
+    for square, n in branches:
+        mark = len(trail)
+        bits = masks[square] & ~(1 << (n - 1))
+        if eliminate(masks, trail, square, bits) and propagate(
+            masks, trail, mark, stats
+        ):
+            total += count(
+                masks, trail, limit - total, strategy, square, stats, depth + 1
+            )
+        elif stats is not None:
+            stats["backtracks"] += 1
+        undo(masks, trail, mark)  # backtrack
+
+        if total >= limit:
+            break
+
+    return total
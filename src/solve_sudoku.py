@@ -3,32 +3,197 @@
 """
 
 import sys
+import argparse
 import numpy as np
+from collections import deque
+from itertools import islice
 from time import time
 
-from toolkit.input import load_puzzle
-from toolkit.output import print_puzzle, save_puzzle
-from toolkit.validation import validate_solution
+from toolkit.input import load_puzzle, parse_line
+from toolkit.output import print_puzzle, save_puzzle, puzzle_to_line
+from toolkit.validation import (
+    validate_solution,
+    validate_solution_many,
+    VALID,
+    MESSAGES,
+)
 from engine.basics import init_candidates, filler, solvable
-from engine.elimination import all_elimination
-from engine.backtracking import backtracker
+from engine.elimination import all_elimination, TECHNIQUES, EXTRA_TECHNIQUES
+from engine.backtracking import iter_solutions, count_solutions
+from engine.dlx import iter_dlx_solutions
+from engine.parallel import solve_many
+from engine.instrumentation import format_stats
+from engine.scheduling import POLICIES, SINGLES_DEPTH, new_scheduler
+from engine.grids import iter_grid_solutions, count_grid_solutions
 
 # --------------------------
 # Loading puzzle & Performing Checks
 # --------------------------
 
-assert len(sys.argv) != 1, "No filepath provided"
-assert len(sys.argv) < 4, "Too many arguments provided"
+parser = argparse.ArgumentParser(description="Solve a Sudoku puzzle")
+parser.add_argument(
+    "filepath",
+    help="text file containing the puzzle (with --stream, a file of one-line puzzles, "
+    "or '-' for stdin)",
+)
+parser.add_argument(
+    "num_solutions",
+    nargs="?",
+    type=int,
+    default=1,
+    help="number of solutions to find (default is 1)",
+)
+parser.add_argument(
+    "--backend",
+    choices=["sets", "bitmask", "trail", "dlx"],
+    help="solver used after candidate elimination: backtracking on the candidates "
+    "grid of sets, on the masks grid, in place with an undo trail, or Dancing Links "
+    "exact cover (default is sets, or trail with --stream)",
+)
+parser.add_argument(
+    "--count",
+    nargs="?",
+    type=int,
+    const=2,
+    metavar="LIMIT",
+    help="count the solutions (up to LIMIT, default is 2) instead of solving",
+)
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="solve one-line puzzles (81 characters, '0' or '.' for empty squares), "
+    "writing one solution line per puzzle line to stdout",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="number of worker processes solving puzzles with --stream (default is 1)",
+)
+parser.add_argument(
+    "--stats",
+    nargs="?",
+    const="text",
+    choices=["text", "json"],
+    help="write search and elimination statistics (nodes, backtracks, maximum depth, "
+    "and the calls, time and removals of each technique) to stderr, as a table or "
+    "as JSON (default is text)",
+)
+parser.add_argument(
+    "--schedule",
+    choices=POLICIES,
+    default="fixed",
+    help="scheduling of the elimination techniques during backtracking: all of them "
+    "in a fixed order, cheapest first with escalation, only singles deep in the "
+    "search, or skipping techniques that do not pay off (default is fixed)",
+)
+parser.add_argument(
+    "--singles-depth",
+    type=int,
+    default=SINGLES_DEPTH,
+    metavar="DEPTH",
+    help=f"with --schedule depth, the search depth below which only singles are "
+    f"applied (default is {SINGLES_DEPTH})",
+)
+parser.add_argument(
+    "--extra",
+    nargs="+",
+    choices=EXTRA_TECHNIQUES + ("all",),
+    default=[],
+    metavar="TECHNIQUE",
+    help="extra elimination techniques to apply, with the sets backend: "
+    + ", ".join(EXTRA_TECHNIQUES)
+    + " (or all)",
+)
+args = parser.parse_args()
 
-# filepath is passed as argument
-filepath = sys.argv[1]
+filepath = args.filepath
+num_solutions = args.num_solutions
+if num_solutions < 1:
+    parser.error("the number of solutions must be at least 1")
 
-# num_solutions is (optionally) passed as argument (otherwise, default is 1)
-if len(sys.argv) == 3:
-    assert sys.argv[2].isdigit(), "2nd argument, <num_solutions>, must be an integer"
-    num_solutions = int(sys.argv[2])
-else:
-    num_solutions = 1
+# statistics collected by the solver (see engine/instrumentation.py)
+stats = None if args.stats is None else {}
+
+# scheduler of the elimination techniques applied during search (see engine/scheduling.py)
+if args.singles_depth < 0:
+    parser.error("the --singles-depth must not be negative")
+techniques = TECHNIQUES + tuple(
+    name for name in EXTRA_TECHNIQUES if name in args.extra or "all" in args.extra
+)
+scheduler = new_scheduler(args.schedule, args.singles_depth, techniques=techniques)
+
+
+def print_stats():
+    if stats is not None:
+        print(format_stats(stats, args.stats), file=sys.stderr)
+
+
+# ------------------------
+# Streaming One-Line Puzzles
+# ------------------------
+
+if args.stream:
+    if args.backend == "dlx":
+        parser.error("the dlx backend is not supported with --stream")
+    if args.workers < 1:
+        parser.error("the number of --workers must be at least 1")
+    if stats is not None:
+        parser.error("--stats is not supported with --stream")
+    if args.extra and args.backend != "sets":
+        parser.error("--extra is only supported with the sets backend")
+
+    # output line of each puzzle line read, or None while its solution is pending
+    # (lines with an invalid format are never sent to the solver)
+    pending = deque()
+
+    def read_puzzles(file):
+        for line in file:
+            if not line.strip():
+                continue  # skip blank lines
+            puzzle = parse_line(line)
+            if isinstance(puzzle, str):
+                pending.append("INVALID")
+            else:
+                pending.append(None)
+                yield puzzle
+
+    file = sys.stdin if filepath == "-" else open(filepath, "r")
+    with file:
+        # solutions arrive in the order of the puzzles, and only a bounded window of
+        # puzzles is read ahead, so memory use does not grow with the input
+        results = solve_many(
+            read_puzzles(file),
+            workers=args.workers,
+            method=args.backend or "trail",
+            schedule=scheduler,
+        )
+        for _, solution, _ in results:
+            # invalid lines read before this puzzle
+            while pending[0] is not None:
+                print(pending.popleft(), flush=True)
+            pending.popleft()
+
+            if isinstance(solution, str):
+                print(solution, flush=True)  # UNSOLVABLE
+            else:
+                print(puzzle_to_line(solution), flush=True)
+
+        # invalid lines after the last puzzle
+        while pending:
+            print(pending.popleft(), flush=True)
+    sys.exit()
+
+if args.backend is None:
+    args.backend = "sets"
+if args.backend == "dlx" and stats is not None:
+    parser.error("--stats is not supported with the dlx backend")
+if args.backend == "dlx" and args.schedule != "fixed":
+    parser.error("--schedule is not supported with the dlx backend")
+if args.extra and (args.backend != "sets" or args.count is not None):
+    parser.error(
+        "--extra is only supported with the sets backend (and not with --count)"
+    )
 
 # load puzzle
 puzzle = load_puzzle(filepath)
@@ -41,65 +206,107 @@ filename = filepath.split(".txt")[0].split("/")[-1]
 
 orig_puzzle = puzzle.copy()  # taking copy in case puzzle is modified
 
+# puzzles of other sizes (Eg. 16x16) are solved in place on bitmasks (see engine/grids.py)
+other_size = puzzle.shape != (9, 9)
+if other_size and (args.backend != "sets" or args.schedule != "fixed" or args.extra):
+    parser.error("--backend, --schedule and --extra are only supported for 9x9 puzzles")
+
 start = time()  # timing
 
 # ------------------------
-# Initial Candidate Elimination
+# Counting Solutions
 # ------------------------
 
-# initialise candidates grid
-candidates = init_candidates(puzzle)
+if args.count is not None:
+    if args.count < 1:
+        parser.error("the limit for --count must be at least 1")
 
-# perform candidate elimination techniques
-candidates = all_elimination(candidates)
+    if other_size:
+        count = count_grid_solutions(puzzle, args.count, stats=stats)
+    else:
+        count = count_solutions(puzzle, args.count, stats=stats)
+    end = time()
 
-# check if puzzle is solvable
-if not solvable(candidates):
-    print("Puzzle is Unsolvable")
+    if count == args.count:
+        print(f"At least {count} Solution(s) Found in {end - start: .3}s")
+    else:
+        print(f"{count} Solution(s) Found in {end - start: .3}s")
+    print_stats()
     sys.exit()
 
-# fill in puzzle as much as possible
-filled_puzzle = filler(puzzle, candidates)
-post_elimination = time()
+# ------------------------
+# Initial Candidate Elimination
+# ------------------------
 
-# check if solution has been already found
-message = validate_solution(puzzle, filled_puzzle)
-if message == "Valid":
-    # print solution
-    print(f"Solution Found in {post_elimination - start: .3}s\n")
-    print("Using candidate elimination alone\n")
-    print_puzzle(filled_puzzle)
-    # save solution
-    savepath = "./solutions/" + filename + "_solution.txt"
-    save_puzzle(savepath, filled_puzzle)
-    print(f"Solution saved in {savepath}")
-    sys.exit()  # stop running if solution found
+if not other_size:
+    # initialise candidates grid
+    candidates = init_candidates(puzzle)
+
+    # perform candidate elimination techniques
+    candidates = all_elimination(candidates, techniques=techniques, stats=stats)
 
-# if we get here, filled_puzzle should contain empty squares
-# but should be valid / compatible with original puzzle
-assert (
-    message == "Solution is Unfilled"
-), f"Puzzle after candidate elimination is invalid: {message}"
+    # check if puzzle is solvable
+    if not solvable(candidates):
+        print("Puzzle is Unsolvable")
+        print_stats()
+        sys.exit()
+
+    # fill in puzzle as much as possible
+    filled_puzzle = filler(puzzle, candidates)
+    post_elimination = time()
+
+    # check if solution has been already found
+    message = validate_solution(puzzle, filled_puzzle)
+    if message == "Valid":
+        # print solution
+        print(f"Solution Found in {post_elimination - start: .3}s\n")
+        print("Using candidate elimination alone\n")
+        print_puzzle(filled_puzzle)
+        # save solution
+        savepath = "./solutions/" + filename + "_solution.txt"
+        save_puzzle(savepath, filled_puzzle)
+        print(f"Solution saved in {savepath}")
+        print_stats()
+        sys.exit()  # stop running if solution found
+
+    # if we get here, filled_puzzle should contain empty squares
+    # but should be valid / compatible with original puzzle
+    assert (
+        message == "Solution is Unfilled"
+    ), f"Puzzle after candidate elimination is invalid: {message}"
 
 # ------------------------
-# Backtracking (Brute force search)
+# Backtracking (Brute force search) or Dancing Links
 # ------------------------
 
-# perform backtracking
-solutions = backtracker(puzzle, candidates, num_solutions)
-post_backtracking = time()
+# perform search, seeded with the reduced candidates grid
+# (solutions are generated lazily, so each one can be saved as soon as it is found)
+if other_size:
+    # singles, pointing and claiming are propagated at every node instead
+    solutions = iter_grid_solutions(puzzle, stats)
+    searcher = "backtracking"
+elif args.backend == "dlx":
+    solutions = iter_dlx_solutions(puzzle, candidates)
+    searcher = "dancing links"
+else:
+    solutions = iter_solutions(
+        puzzle, candidates, method=args.backend, stats=stats, schedule=scheduler
+    )
+    searcher = "backtracking"
 
-# check if puzzle is unsolvable
-if isinstance(solutions, str) and solutions == "UNSOLVABLE":
-    print("Puzzle is Unsolvable")
-    sys.exit()
+if num_solutions == 1:
+    solution = next(solutions, None)
+    solutions.close()
+    post_backtracking = time()
 
-# assert original puzzle has not been modified
-assert np.array_equal(puzzle, orig_puzzle), "Original puzzle has been modified"
+    # check if puzzle is unsolvable
+    if solution is None:
+        print("Puzzle is Unsolvable")
+        print_stats()
+        sys.exit()
 
-# if we get here, solution(s) must have been found
-if num_solutions == 1:
-    solution = solutions
+    # assert original puzzle has not been modified
+    assert np.array_equal(puzzle, orig_puzzle), "Original puzzle has been modified"
 
     # assert solution is valid
     message = validate_solution(puzzle, solution)
@@ -107,7 +314,7 @@ if num_solutions == 1:
 
     # print solution
     print(f"Solution Found in {post_backtracking - start: .3}s\n")
-    print("Using candidate elimination and backtracking\n")
+    print(f"Using candidate elimination and {searcher}\n")
     print_puzzle(solution)
     # save solution
     savepath = "./solutions/" + filename + "_solution.txt"
@@ -115,17 +322,46 @@ if num_solutions == 1:
     print(f"Solution saved in {savepath}\n")
 
 else:
-    # print & save all solutions
-    print(f"{len(solutions)} Solution(s) Found in {post_backtracking - start: .3}s\n")
-    print("Using candidate elimination and backtracking\n")
-    for i, solution in enumerate(solutions):
-        # assert solution is valid
-        message = validate_solution(puzzle, solution)
-        assert message == "Valid", f"Solution incorrect: {message}"
+    # solutions are validated in batches (see validate_solution_many) before they are
+    # printed & saved, rather than validating each one several times; the batches
+    # double in size up to 'check_batch', so the first solutions are still printed
+    # as soon as they are found
+    check_batch = 1024
+    batch_size = 1
 
-        # print solution
-        print_puzzle(solution)
-        # save solution
-        savepath = "./solutions/" + filename + "_solution" + str(i + 1) + ".txt"
-        save_puzzle(savepath, solution)
-        print(f"Solution saved in {savepath}\n")
+    found = 0
+    while found < num_solutions:
+        batch = list(islice(solutions, min(batch_size, num_solutions - found)))
+        if not batch:
+            break
+        batch_size = min(2 * batch_size, check_batch)
+
+        codes = validate_solution_many(puzzle, np.array(batch))
+        for solution, code in zip(batch, codes):
+            found += 1
+
+            # assert solution is valid
+            assert code == VALID, f"Solution incorrect: {MESSAGES[code]}"
+
+            # print solution
+            print_puzzle(solution, check_validity=False)
+            # save solution
+            savepath = "./solutions/" + filename + "_solution" + str(found) + ".txt"
+            save_puzzle(savepath, solution, check_validity=False)
+            print(f"Solution saved in {savepath}\n", flush=True)
+    solutions.close()
+    post_backtracking = time()
+
+    # check if puzzle is unsolvable
+    if found == 0:
+        print("Puzzle is Unsolvable")
+        print_stats()
+        sys.exit()
+
+    # assert original puzzle has not been modified
+    assert np.array_equal(puzzle, orig_puzzle), "Original puzzle has been modified"
+
+    print(f"{found} Solution(s) Found in {post_backtracking - start: .3}s\n")
+    print(f"Using candidate elimination and {searcher}")
+
+print_stats()
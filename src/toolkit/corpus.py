@@ -0,0 +1,241 @@
+"""!@file corpus.py
+@brief Module for storing large collections of puzzles in a packed binary file.
+
+@details A corpus file is a 32-byte header followed by one fixed-size record per
+puzzle. The header holds (little-endian): the magic bytes b"SDKC", the format
+version, the number of bits per square (4 or 8), the record size in bytes and the
+number of puzzles. Records list the 81 squares row by row (0 for empty squares):
+- 4 bits per square: two squares per byte (the first in the high nibble), so each
+  record is 41 bytes (the last low nibble is unused)
+- 8 bits per square: one square per byte, so each record is 81 bytes
+
+Since records have a fixed size, puzzle k starts at byte HEADER_SIZE + k * record size,
+so the offset of any puzzle is known without reading the file. Corpora are read by
+memory-mapping the records ('read_corpus'), so opening one costs nothing however many
+puzzles it holds, and slicing only touches the pages of the puzzles sliced. Unpacking
+4-bit records makes a copy, while 8-bit records can be viewed as an (N, 9, 9) array
+with no copy (trading twice the file size for zero-copy access).
+
+@author Created by W.D Knottenbelt
+"""
+
+import struct
+import numpy as np
+from itertools import islice
+from .input import load_puzzle, parse_line
+from .output import puzzle_to_line
+
+MAGIC = b"SDKC"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHQ16x")
+HEADER_SIZE = HEADER.size  # 32 bytes
+
+# size of a record (in bytes) for each number of bits per square
+RECORD_SIZE = {4: 41, 8: 81}
+
+
+def pack_puzzles(puzzles, bits=4):
+    """!
+    @brief Pack puzzles into corpus records
+
+    @param puzzles (numpy.ndarray) An (N, 9, 9) array of puzzles.
+    @param bits (int, optional) The number of bits per square, 4 or 8 (default is 4).
+
+    @return Array of shape (N, record size) of uint8 records.
+    """
+    assert bits in RECORD_SIZE, "Number of bits per square must be 4 or 8"
+    puzzles = np.asarray(puzzles)
+    assert puzzles.ndim == 3 and puzzles.shape[1:] == (9, 9)
+    assert np.all((puzzles >= 0) & (puzzles <= 9)), "Squares must contain 0-9"
+
+    squares = puzzles.reshape(len(puzzles), 81).astype(np.uint8)
+    if bits == 8:
+        return squares
+
+    # pad to an even number of squares, and pack pairs of squares into each byte
+    squares = np.pad(squares, ((0, 0), (0, 1)))
+    return (squares[:, 0::2] << 4) | squares[:, 1::2]
+
+
+def unpack_puzzles(records):
+    """!
+    @brief Unpack corpus records into puzzles
+
+    @details The number of bits per square is given by the record size. 8-bit records
+    are returned as a view (no copy is made, so a memory-mapped corpus stays on disk).
+
+    @param records (numpy.ndarray) Array of shape (N, 41) or (N, 81) of uint8 records.
+
+    @return An (N, 9, 9) array of uint8 puzzles.
+    """
+    assert records.ndim == 2 and records.shape[1] in RECORD_SIZE.values()
+
+    if records.shape[1] == RECORD_SIZE[8]:
+        return records.reshape(len(records), 9, 9)
+
+    squares = np.empty((len(records), 82), dtype=np.uint8)
+    squares[:, 0::2] = records >> 4
+    squares[:, 1::2] = records & 15
+    return squares[:, :81].reshape(len(records), 9, 9)
+
+
+def write_corpus(filepath, puzzles, bits=4, chunk_size=65536):
+    """!
+    @brief Write puzzles to a corpus file
+
+    @details The puzzles are packed and written in chunks, so an iterable (Eg. a
+    generator reading another file) is never held in memory in full. The number of
+    puzzles is written into the header once all of them have been written.
+
+    @param filepath (str) The path of the corpus file (overwritten if it exists).
+    @param puzzles (iterable) The puzzles, as an (N, 9, 9) numpy array or an iterable of
+    9x9 numpy arrays.
+    @param bits (int, optional) The number of bits per square, 4 or 8 (default is 4).
+    @param chunk_size (int, optional) The number of puzzles packed at once.
+
+    @return The number of puzzles written.
+    """
+    assert bits in RECORD_SIZE, "Number of bits per square must be 4 or 8"
+
+    if isinstance(puzzles, np.ndarray):
+        chunks = (
+            puzzles[k : k + chunk_size] for k in range(0, len(puzzles), chunk_size)
+        )
+    else:
+        iterator = iter(puzzles)
+        chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+
+    count = 0
+    with open(filepath, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, bits, RECORD_SIZE[bits], 0))
+        for chunk in chunks:
+            file.write(pack_puzzles(np.asarray(chunk), bits).tobytes())
+            count += len(chunk)
+
+        # fill in the number of puzzles
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, bits, RECORD_SIZE[bits], count))
+
+    return count
+
+
+def read_header(filepath):
+    """!
+    @brief Read and check the header of a corpus file
+
+    @param filepath (str) The path of the corpus file.
+
+    @return Tuple of the number of bits per square, the record size and the number of puzzles.
+    """
+    with open(filepath, "rb") as file:
+        header = file.read(HEADER_SIZE)
+    assert len(header) == HEADER_SIZE, "File is too short to be a corpus"
+
+    magic, version, bits, record_size, count = HEADER.unpack(header)
+    assert magic == MAGIC, "File is not a corpus"
+    assert version == VERSION, f"Unsupported corpus version {version}"
+    assert RECORD_SIZE.get(bits) == record_size, "Corpus header is corrupted"
+
+    return bits, record_size, count
+
+
+def read_corpus(filepath):
+    """!
+    @brief Memory-map the records of a corpus file
+
+    @details No puzzles are read when the file is opened: slicing the returned array
+    (Eg. 'unpack_puzzles(records[1000:2000])') reads only the records sliced.
+
+    @param filepath (str) The path of the corpus file.
+
+    @return Read-only array of shape (N, record size) of uint8 records.
+    """
+    _, record_size, count = read_header(filepath)
+    if count == 0:
+        # a mapping cannot be empty
+        return np.zeros((0, record_size), dtype=np.uint8)
+
+    return np.memmap(
+        filepath,
+        dtype=np.uint8,
+        mode="r",
+        offset=HEADER_SIZE,
+        shape=(count, record_size),
+    )
+
+
+def iter_corpus(filepath, chunk_size=65536):
+    """!
+    @brief Generator of the puzzles of a corpus file, in chunks
+
+    @param filepath (str) The path of the corpus file.
+    @param chunk_size (int, optional) The number of puzzles in each chunk.
+
+    @return Generator yielding (k, 9, 9) arrays of at most chunk_size puzzles.
+    """
+    records = read_corpus(filepath)
+    for k in range(0, len(records), chunk_size):
+        yield unpack_puzzles(records[k : k + chunk_size])
+
+
+def lines_to_corpus(text_path, corpus_path, bits=4):
+    """!
+    @brief Convert a text file of one-line puzzles into a corpus file
+
+    @details Each line lists the 81 squares with '0' or '.' for empty squares (see
+    'parse_line' in input.py). Blank lines are skipped.
+
+    @param text_path (str) The path of the text file.
+    @param corpus_path (str) The path of the corpus file to write.
+    @param bits (int, optional) The number of bits per square, 4 or 8 (default is 4).
+
+    @return The number of puzzles written.
+    """
+
+    def puzzles(file):
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            puzzle = parse_line(line)
+            assert isinstance(puzzle, np.ndarray), f"Line {number}: {puzzle}"
+            yield puzzle
+
+    with open(text_path, "r") as file:
+        return write_corpus(corpus_path, puzzles(file), bits)
+
+
+def corpus_to_lines(corpus_path, text_path):
+    """!
+    @brief Convert a corpus file into a text file of one-line puzzles
+
+    @param corpus_path (str) The path of the corpus file.
+    @param text_path (str) The path of the text file to write.
+
+    @return The number of puzzles written.
+    """
+    count = 0
+    with open(text_path, "w") as file:
+        for chunk in iter_corpus(corpus_path):
+            file.writelines(puzzle_to_line(puzzle) + "\n" for puzzle in chunk)
+            count += len(chunk)
+    return count
+
+
+def files_to_corpus(filepaths, corpus_path, bits=4):
+    """!
+    @brief Convert puzzle text files (as saved by 'save_puzzle') into a corpus file
+
+    @param filepaths (iterable) The paths of the puzzle files, in order.
+    @param corpus_path (str) The path of the corpus file to write.
+    @param bits (int, optional) The number of bits per square, 4 or 8 (default is 4).
+
+    @return The number of puzzles written.
+    """
+
+    def puzzles():
+        for filepath in filepaths:
+            puzzle = load_puzzle(filepath)
+            assert puzzle is not None, f"Could not load puzzle from {filepath}"
+            yield puzzle
+
+    return write_corpus(corpus_path, puzzles(), bits)
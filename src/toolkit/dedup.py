@@ -0,0 +1,198 @@
+"""!@file dedup.py
+@brief Module for removing equivalent puzzles from a corpus.
+
+@details Two puzzles are equivalent if one is a relabelled, permuted or transposed copy
+of the other (see engine/canonical.py). The fingerprint of a puzzle is a 64-bit hash of
+its canonical form, so equivalent puzzles share a fingerprint (and, with 64 bits,
+different classes only share one with negligible probability).
+
+Deduplication is a single pass over a corpus (see corpus.py): the fingerprint of each
+puzzle is looked up in a hash index, and a puzzle whose fingerprint has not been seen
+before starts a new class, and is written out as its representative. The index is an
+open-addressing hash table of fixed capacity, stored in two NumPy arrays (12 bytes per
+slot), so memory use is set by the number of classes allowed rather than the size of
+the corpus, and no puzzles are held in memory. If the corpus has more classes than the
+index can hold, an 'IndexFullError' is raised and no output is left behind.
+
+@author Created by W.D Knottenbelt
+"""
+
+import hashlib
+import os
+import numpy as np
+from itertools import islice
+from multiprocessing import Pool
+from .corpus import read_header, iter_corpus, write_corpus
+from ..engine.canonical import canonical_form
+
+# the index is considered full beyond this fraction of its slots
+MAX_LOAD = 0.75
+
+
+class IndexFullError(Exception):
+    """!
+    @brief Error raised when a corpus has more classes than the hash index can hold
+    """
+
+
+def fingerprint(puzzle):
+    """!
+    @brief Fingerprint of the equivalence class of a puzzle
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+
+    @return Non-zero 64-bit integer, the same for all equivalent puzzles.
+    """
+    canonical, _ = canonical_form(puzzle)
+    digest = hashlib.blake2b(canonical.astype(np.uint8).tobytes(), digest_size=8)
+    return int.from_bytes(digest.digest(), "little") or 1  # 0 marks empty slots
+
+
+def fingerprints(puzzles):
+    """!
+    @brief Fingerprints of many puzzles (run by the workers of the pool)
+
+    @param puzzles (numpy.ndarray) An (N, 9, 9) array of puzzles.
+
+    @return List of the N fingerprints.
+    """
+    return [fingerprint(puzzle) for puzzle in puzzles]
+
+
+def new_index(capacity):
+    """!
+    @brief Create an empty hash index
+
+    @param capacity (int) The number of slots, a power of 2.
+
+    @return Tuple of the arrays of keys (fingerprints, 0 for an empty slot) and values
+    (class numbers) of each slot.
+    """
+    assert (
+        capacity > 0 and capacity & (capacity - 1) == 0
+    ), "Capacity must be a power of 2"
+    return np.zeros(capacity, dtype=np.uint64), np.zeros(capacity, dtype=np.uint32)
+
+
+def index_insert(index, key, value):
+    """!
+    @brief Look up a key in a hash index, inserting it if it is not found
+
+    @details Collisions are resolved by linear probing from the slot given by the low
+    bits of the key.
+
+    @param index (tuple) The hash index (see 'new_index'), modified in place.
+    @param key (int) A non-zero 64-bit key.
+    @param value (int) The value to insert if the key is not found.
+
+    @return The value of the key (equal to 'value' if it has just been inserted).
+    """
+    keys, values = index
+    mask = len(keys) - 1
+    slot = key & mask
+    while keys[slot]:
+        if keys[slot] == key:
+            return int(values[slot])
+        slot = (slot + 1) & mask
+
+    keys[slot] = key
+    values[slot] = value
+    return value
+
+
+def iter_fingerprints(chunks, workers=1):
+    """!
+    @brief Generator of the fingerprints of chunks of puzzles, in order
+
+    @details With several workers, chunks are read and fingerprinted a few per worker at
+    a time, so memory use does not grow with the number of chunks.
+
+    @param chunks (iterable) The (k, 9, 9) arrays of puzzles.
+    @param workers (int, optional) The number of worker processes (default is 1).
+
+    @return Generator yielding a tuple of each chunk and the list of its fingerprints.
+    """
+    assert workers >= 1, "There must be at least one worker"
+
+    if workers == 1:
+        for chunk in chunks:
+            yield chunk, fingerprints(chunk)
+        return
+
+    chunks = iter(chunks)
+    with Pool(workers) as pool:
+        while True:
+            window = list(islice(chunks, 2 * workers))
+            if not window:
+                break
+            yield from zip(window, pool.imap(fingerprints, window))
+
+
+def dedup_corpus(
+    corpus_path,
+    output_path,
+    mapping_path,
+    capacity=1 << 22,
+    workers=1,
+    chunk_size=4096,
+):
+    """!
+    @brief Keep one representative of each class of equivalent puzzles in a corpus
+
+    @details The representative of each class is its first puzzle in the corpus, and
+    classes are numbered in order of their representatives. The representatives are
+    written (in that order) to a new corpus, and the class of every puzzle of the input
+    to the mapping file: line k holds the class number of puzzle k.
+
+    @param corpus_path (str) The path of the corpus to deduplicate.
+    @param output_path (str) The path of the corpus of representatives to write.
+    @param mapping_path (str) The path of the mapping text file to write.
+    @param capacity (int, optional) The number of slots in the hash index, a power of 2
+    (default is 2^22, using 48MB, for up to about 3 million classes).
+    @param workers (int, optional) The number of worker processes computing fingerprints
+    (default is 1).
+    @param chunk_size (int, optional) The number of puzzles read at once.
+
+    @return Tuple of the number of puzzles read and the number of classes found.
+
+    @exception IndexFullError If there are more classes than MAX_LOAD * capacity (the
+    output corpus and mapping file are then not written).
+    """
+    index = new_index(capacity)
+    bits, _, _ = read_header(corpus_path)
+    read = 0
+
+    def representatives(mapping):
+        nonlocal read
+        classes = 0
+        chunks = iter_corpus(corpus_path, chunk_size)
+        for chunk, keys in iter_fingerprints(chunks, workers):
+            lines = []
+            for puzzle, key in zip(chunk, keys):
+                number = index_insert(index, key, classes)
+                if number == classes:
+                    classes += 1
+                    if classes > MAX_LOAD * capacity:
+                        raise IndexFullError(
+                            f"The corpus has more than {classes - 1} classes, the most a hash index "
+                            f"of {capacity} slots can hold"
+                        )
+                    yield puzzle
+                lines.append(f"{number}\n")
+            mapping.writelines(lines)
+            read += len(chunk)
+
+    # write to temporary files, renamed once complete
+    temporary = [output_path + ".tmp", mapping_path + ".tmp"]
+    try:
+        with open(temporary[1], "w") as mapping:
+            classes = write_corpus(temporary[0], representatives(mapping), bits)
+    except BaseException:
+        for path in temporary:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    os.replace(temporary[0], output_path)
+    os.replace(temporary[1], mapping_path)
+    return read, classes
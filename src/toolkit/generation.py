@@ -1,37 +1,126 @@
 """!@file generation.py
 @brief Module containing functionality for generating Sudoku puzzles.
 
-@details This module contains only a function to generate Sudoku puzzles
-containing only 'Naked Singles'.
+@details This module contains a function to generate Sudoku puzzles
+containing only 'Naked Singles', and the tools it uses to check proposed puzzles.
+
+It also contains a pipeline generating puzzles with a unique solution, a given range
+of clues and a given difficulty, on a pool of worker processes. The difficulty of a
+puzzle is the first of the following classes whose techniques (from elimination.py)
+solve it by candidate elimination alone:
+- "singles": Naked Singles
+- "hidden_singles": Naked and Hidden Singles
+- "obvious_pairs": Naked and Hidden Singles, Obvious Pairs
+- "pointing": all four techniques (including Pointing Pairs/Triples)
+- "backtracking": not solved by the four techniques, so backtracking is needed
+
+Puzzles of other sizes (4x4 up to 25x25, see engine/grids.py) are generated by
+'generate_grid', without difficulty classes.
 
 @author Created by W.D Knottenbelt
 """
 
-from .validation import validate_solution, validate_puzzle
-from ..engine.backtracking import backtracker
-from ..engine.basics import singles_filler
+from ..engine.backtracking import count_solutions
+from ..engine.basics import init_candidates
+from ..engine.elimination import all_elimination, TECHNIQUES
+from ..engine.grids import sample_grid, count_grid_solutions, BOX_SIZES
+from ..engine.rating import rate, DIFFICULTIES
+from ..engine.sampler import random_grid
+from ..engine.tables import SQUARE_UNITS, PEERS
+from multiprocessing import Pool
 import numpy as np
+import os
 import random
 
+# default number of full boards dug by 'generate_puzzle' before giving up (puzzles in
+# reachable targets are typically found within 20)
+MAX_ATTEMPTS = 1000
+
+
+def unit_masks(values):
+    """!
+    @brief Masks of the numbers given in each unit of a puzzle
+
+    @param values (list) The 81 squares of the puzzle (0 for empty squares).
+
+    @return List of 27 masks, where bit n - 1 of a unit's mask is set if n is given in it.
+    """
+    used = [0] * 27
+    for square, n in enumerate(values):
+        if n:
+            for unit in SQUARE_UNITS[square]:
+                used[unit] |= 1 << (n - 1)
+    return used
+
+
+def fills_by_singles(values, used, square):
+    """!
+    @brief Check whether repeatedly filling in 'Naked Singles' fills a given square
+
+    @details Empty squares are examined from a worklist: a square whose candidates (the
+    numbers not given in its units) are a single number is filled, and its empty peers
+    are examined again. The search stops as soon as 'square' is filled. The puzzle is
+    assumed to be consistent with a solution, so no square runs out of candidates.
+
+    @param values (list) The 81 squares of the puzzle (0 for empty squares).
+    @param used (list) The masks of each unit (see 'unit_masks').
+    @param square (int) The (empty) square to fill.
+
+    @return True if the square is filled, and False if the naked singles run out first.
+    """
+    values, used = values.copy(), used.copy()
+    queue = [s for s in range(81) if not values[s]]
+
+    while queue:
+        s = queue.pop()
+        if values[s]:
+            continue
+
+        row, col, block = SQUARE_UNITS[s]
+        candidates = ~(used[row] | used[col] | used[block]) & 511
+        if candidates & (candidates - 1):
+            continue  # more than one candidate
+
+        if s == square:
+            return True
+
+        values[s] = candidates.bit_length()
+        used[row] |= candidates
+        used[col] |= candidates
+        used[block] |= candidates
+        queue.extend(peer for peer in PEERS[s] if not values[peer])
+
+    return False
+
 
 def generate_singles():
     """!
     @brief Generates a Sudoku puzzle, solvable using only 'Naked Singles' technique.
 
     @details This function creates a puzzle by starting with a full board
-    generated through backtracking. It then randomly proposes to empty certain squares
+    generated by the random grid sampler. It then randomly proposes to empty certain squares
     and accepts these changes if the resulting puzzle can still be solved by filling
     in the naked singles. The process stops after 100 consecutive rejections
     of proposed changes.
 
+    The masks of the numbers given in each unit are updated as each clue is removed (and
+    restored if the proposal is rejected), rather than recomputing the candidates grid.
+    Since the current puzzle can be solved by naked singles, removing a clue keeps it
+    solvable exactly when the naked singles fill that square again (after which the
+    original fill order completes the puzzle), so the check stops there. The givens are
+    always a subset of the full board, so they never need to be validated.
+
     Reference: https://sudoku.com/sudoku-rules/obvious-singles/
 
     @return A 9x9 numpy array representing the generated puzzle.
     """
 
-    # get random full board by filling empty board using backtracking
-    empty = np.zeros((9, 9), dtype=int)
-    puzzle = backtracker(empty)
+    # get random full board
+    solution = random_grid()
+
+    values = solution.flatten().tolist()
+    used = unit_masks(values)
+    filled = list(range(81))  # the squares which are still given
 
     # ------------------------------------
     # We propose that a random square is made empty
@@ -40,38 +129,250 @@ def generate_singles():
     # Carry on until 100 consecutive rejections
     # ------------------------------------
     n_subsequent_rejects = 0  # number of consecutive rejects
-    n_accepts = 0  # number of empty squares created
     while n_subsequent_rejects < 100:
-        # get indices of filled squares
-        indices = np.nonzero(puzzle)
-        paired_indices = list(zip(indices[0], indices[1]))
+        # choose filled square at random, and make it empty
+        k = random.randrange(len(filled))
+        square = filled[k]
+        bit = 1 << (values[square] - 1)
+        values[square] = 0
+        for unit in SQUARE_UNITS[square]:
+            used[unit] &= ~bit
 
-        # choose filled square at random
-        idx = random.choice(paired_indices)
+        if fills_by_singles(values, used, square):
+            # accept
+            filled[k] = filled[-1]
+            filled.pop()
+            n_subsequent_rejects = 0
+        else:
+            # reject, restoring the clue
+            values[square] = bit.bit_length()
+            for unit in SQUARE_UNITS[square]:
+                used[unit] |= bit
+            n_subsequent_rejects += 1
 
-        # attempt to make square empty
-        puzzle_copy = puzzle.copy()
-        puzzle_copy[idx] = 0
+    puzzle = np.array(values).reshape((9, 9))
 
-        # fill in singles and check if this yields solution
-        solution = singles_filler(puzzle_copy)
-        message = validate_solution(puzzle_copy, solution)
+    # the givens are those of the full board which were never removed
+    assert np.sum(puzzle > 0) == len(filled)
+    assert np.all((puzzle == 0) | (puzzle == solution))
 
-        # either the solution should be valid or it should contain empty squares
-        assert message == "Valid" or message == "Solution is Unfilled"
+    return puzzle
 
-        # if the singles_filler found solution then we accept the empty square
-        if message == "Valid":
-            puzzle[idx] = 0  # accept
-            n_subsequent_rejects = 0
-            n_accepts += 1
-        else:  # reject
-            n_subsequent_rejects += 1
 
-    # the number of empty squares in the final puzzle
-    # should be the same as the number of times we accepted an empty square
-    assert np.sum(puzzle == 0) == n_accepts
+def solved_by(puzzle, techniques):
+    """!
+    @brief Check whether candidate elimination with some techniques solves a puzzle
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the puzzle.
+    @param techniques (tuple) Names of the elimination techniques (see elimination.py).
+
+    @return True if every square is left with a single candidate.
+    """
+    candidates = all_elimination(init_candidates(puzzle), techniques=techniques)
+    return all(len(cell) == 1 for cell in candidates.flat)
+
+
+def difficulty(puzzle):
+    """!
+    @brief Difficulty class of a puzzle (see the module description)
+
+    @details The class is found by the rating engine (see engine/rating.py), which
+    applies the techniques one step at a time, so the puzzle is only solved once.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing a puzzle with a unique solution.
+
+    @return Name of the difficulty class.
+    """
+    return rate(puzzle)["difficulty"]
+
+
+def dig(solution, target, min_clues=17, max_clues=81, rng=None):
+    """!
+    @brief Remove clues from a full board, keeping to a difficulty class
+
+    @details The squares are visited once in random order, and each clue is removed if the
+    puzzle stays no harder than the target: solved by the techniques of the target class,
+    or (for "backtracking") with a unique solution. Since elimination only ever finds the
+    solution, every puzzle solved by elimination has a unique solution. Removing stops
+    once 'min_clues' remain. The result is only kept if it is exactly in the target class
+    (not easier) and has at most 'max_clues' clues.
 
-    assert validate_puzzle(puzzle) == "Valid"  # assert puzzle is valid
+    @param solution (numpy.ndarray) A 9x9 numpy array of the full board.
+    @param target (str) Name of the difficulty class.
+    @param min_clues (int, optional) The minimum number of clues (default is 17).
+    @param max_clues (int, optional) The maximum number of clues (default is 81).
+    @param rng (numpy.random.Generator, optional) Random generator for the order of the squares.
+
+    @return 9x9 numpy array of the puzzle, or None if it misses the target.
+    """
+    assert target in DIFFICULTIES, f"Unknown difficulty '{target}'"
+    level = DIFFICULTIES.index(target)
+    rng = np.random.default_rng() if rng is None else rng
+
+    puzzle = solution.copy()
+    clues = 81
+    for square in rng.permutation(81):
+        if clues <= min_clues:
+            break
+
+        value = puzzle.flat[square]
+        puzzle.flat[square] = 0
+        if target == "backtracking":
+            keep = count_solutions(puzzle, 2) == 1
+        else:
+            keep = solved_by(puzzle, TECHNIQUES[: level + 1])
+
+        if keep:
+            clues -= 1
+        else:
+            puzzle.flat[square] = value
+
+    # too many clues, or too easy
+    if clues > max_clues:
+        return None
+    if level > 0 and solved_by(puzzle, TECHNIQUES[:level]):
+        return None
+
+    return puzzle
+
+
+def generate_puzzle(
+    target="singles", min_clues=17, max_clues=81, rng=None, max_attempts=MAX_ATTEMPTS
+):
+    """!
+    @brief Generate a puzzle with a unique solution, in a difficulty class and range of clues
+
+    @details Full boards are sampled by randomised search (see sampler.py), and dug (see 'dig') until one
+    gives a puzzle meeting the requirements. Note that some requirements can never be met
+    (Eg. a "backtracking" puzzle with 60 clues), so the search gives up after
+    'max_attempts' full boards.
+
+    @param target (str, optional) Name of the difficulty class (default is "singles").
+    @param min_clues (int, optional) The minimum number of clues (default is 17).
+    @param max_clues (int, optional) The maximum number of clues (default is 81).
+    @param rng (numpy.random.Generator, optional) Random generator.
+    @param max_attempts (int, optional) The number of full boards dug before giving up
+    (default is MAX_ATTEMPTS).
+
+    @return 9x9 numpy array of the puzzle, or None if no puzzle meeting the requirements
+    was found.
+    """
+    assert 17 <= min_clues <= max_clues <= 81, "Invalid range of clues"
+    assert max_attempts >= 1, "There must be at least one attempt"
+    rng = np.random.default_rng() if rng is None else rng
+    rand = random.Random(int(rng.integers(2**32)))
+
+    for _ in range(max_attempts):
+        solution = random_grid(rng=rand)
+        puzzle = dig(solution, target, min_clues, max_clues, rng)
+        if puzzle is not None:
+            return puzzle
+    return None
+
+
+def generate_grid(box, clues, unique=False, rng=None):
+    """!
+    @brief Generate a puzzle of any size, with a given number of clues
+
+    @details A complete grid is sampled (see 'sample_grid' in grids.py), and its squares
+    are emptied in random order until 'clues' remain. If 'unique' is set, a square is only
+    emptied if the puzzle keeps a unique solution, so the puzzle can be left with more clues
+    when no more can be removed. Checking uniqueness solves the puzzle at every step, which
+    is slow on 25x25 grids with few clues, so the default is a puzzle with at least one
+    solution (the sampled grid).
+
+    @param box (int) The box size of the grid (Eg. 4 for 16x16 puzzles).
+    @param clues (int) The number of clues.
+    @param unique (bool, optional) Whether the puzzle must have a unique solution
+    (default is False).
+    @param rng (numpy.random.Generator, optional) Random generator.
+
+    @return n x n numpy array of the puzzle.
+    """
+    assert box in BOX_SIZES, f"Unsupported box size {box}"
+    n = box * box
+    assert 0 <= clues <= n * n, "Invalid number of clues"
+    rng = np.random.default_rng() if rng is None else rng
+
+    puzzle = sample_grid(box, rng)
+    filled = n * n
+    for square in rng.permutation(n * n):
+        if filled <= clues:
+            break
+
+        value = puzzle.flat[square]
+        puzzle.flat[square] = 0
+        if unique and count_grid_solutions(puzzle, 2) != 1:
+            puzzle.flat[square] = value
+        else:
+            filled -= 1
 
     return puzzle
+
+
+def generate_task(task):
+    """!
+    @brief Generate one puzzle (run by the workers of the pool)
+
+    @details Workers are forked with the same random state, so each task seeds its own.
+
+    @param task (tuple) Tuple of the seed, the difficulty class, the range of clues and
+    the number of attempts.
+
+    @return 9x9 numpy array of the puzzle, or None if no puzzle was found.
+    """
+    seed, target, min_clues, max_clues, max_attempts = task
+    rng = np.random.default_rng(seed)
+    return generate_puzzle(target, min_clues, max_clues, rng, max_attempts)
+
+
+def iter_generate(
+    count,
+    target="singles",
+    min_clues=17,
+    max_clues=81,
+    workers=None,
+    seed=None,
+    max_attempts=MAX_ATTEMPTS,
+):
+    """!
+    @brief Generator of many puzzles, generated on a pool of worker processes
+
+    @details Each puzzle is yielded as soon as a worker has generated it (so not in the
+    order of the tasks). The puzzles are reproducible for a given seed and number of
+    workers, up to their order. A task which finds no puzzle within 'max_attempts' full
+    boards yields None instead (see 'generate_puzzle'), which usually means the
+    requirements cannot be met, so the caller can stop there (closing the generator
+    stops the workers).
+
+    @param count (int) The number of puzzles.
+    @param target (str, optional) Name of the difficulty class (default is "singles").
+    @param min_clues (int, optional) The minimum number of clues (default is 17).
+    @param max_clues (int, optional) The maximum number of clues (default is 81).
+    @param workers (int, optional) The number of worker processes (default is the number of cores).
+    @param seed (int, optional) Seed of the random generators (default is None, for a random seed).
+    @param max_attempts (int, optional) The number of full boards dug for each puzzle before
+    giving up (default is MAX_ATTEMPTS).
+
+    @return Generator yielding 9x9 numpy arrays of puzzles (or None for each puzzle not found).
+    """
+    assert target in DIFFICULTIES, f"Unknown difficulty '{target}'"
+    assert 17 <= min_clues <= max_clues <= 81, "Invalid range of clues"
+    if workers is None:
+        workers = os.cpu_count() or 1
+    assert workers >= 1, "There must be at least one worker"
+    assert max_attempts >= 1, "There must be at least one attempt"
+
+    base = np.random.SeedSequence(seed).generate_state(1)[0]
+    tasks = (
+        ((int(base) + k) % 2**32, target, min_clues, max_clues, max_attempts)
+        for k in range(count)
+    )
+
+    if workers == 1:
+        for task in tasks:
+            yield generate_task(task)
+        return
+
+    with Pool(workers) as pool:
+        yield from pool.imap_unordered(generate_task, tasks)
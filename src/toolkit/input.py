@@ -6,7 +6,11 @@
 @author Created by William Knottenbelt
 """
 import numpy as np
-from .validation import validate_puzzle
+from math import isqrt
+from .validation import validate_puzzle, BOX_SIZES
+
+# sizes of the puzzles supported by the token format (4x4 up to 25x25)
+SIZES = tuple(box * box for box in BOX_SIZES)
 
 
 def parse_sudoku_string(sudoku_str):
@@ -79,6 +83,111 @@ def parse_sudoku_string(sudoku_str):
     return puzzle
 
 
+def parse_line(line):
+    """!
+    @brief Parse a Sudoku puzzle written on a single line into numpy array
+
+    @details The one-line format (used, for example, by Peter Norvig's puzzle sets)
+    lists the 81 squares row by row, with '0' or '.' for empty squares. Surrounding
+    whitespace (such as the trailing newline) is ignored. As with 'parse_sudoku_string',
+    the puzzle is not checked against Sudoku rules.
+
+    @param line (str) The line to be parsed.
+
+    @return 9x9 numpy array representing puzzle if the line is in a valid format,
+    or error message if not.
+    """
+    assert isinstance(line, str), "Parameter line must be a string"
+
+    line = line.strip().replace(".", "0")
+
+    if len(line) != 81:
+        return f"Line must contain 81 squares, but {len(line)} were given."
+
+    for char in line:
+        if not char.isdigit():
+            return f"Found unrecognised character '{char}'"
+
+    return np.array([int(char) for char in line]).reshape((9, 9))
+
+
+def parse_tokens(text):
+    """!
+    @brief Parse a Sudoku puzzle of any size, written as tokens, into numpy array
+
+    @details In the token format, each square is a token (a number, with '0' or '.'
+    for an empty square), so numbers above 9 can be written (Eg. for 16x16 puzzles).
+    The format is defined as follows:
+    - An n x n grid of tokens, for n = 4, 9, 16 or 25
+    - Rows must be separated by new-lines
+    - Tokens (within rows) are separated by spaces, or any of the symbols: | ,
+    - Rows can be separated by empty lines, or lines containing only the symbols: | - + ,
+
+    As with 'parse_sudoku_string', the puzzle is not checked against Sudoku rules.
+
+    @param text (str) The input string to be parsed.
+
+    @return n x n numpy array representing puzzle if the string is in a valid format,
+    or error message if not.
+    """
+    assert isinstance(text, str), "Parameter text must be a string"
+
+    rows = []
+    for line in text.split("\n"):
+        tokens = line.replace("|", " ").replace(",", " ").split()
+        # ignore empty lines and row-separating lines
+        if all(char in "-+" for char in "".join(tokens)):
+            continue
+        rows.append(tokens)
+
+    n = len(rows)
+    if n not in SIZES:
+        return f"Number of rows must be one of {SIZES}, but {n} were given."
+
+    for row in rows:
+        if len(row) != n:
+            return f"Every row must contain {n} squares."
+        for token in row:
+            if not (token == "." or token.isdigit()):
+                return f"Found unrecognised token '{token}'"
+
+    return np.array(
+        [[0 if token == "." else int(token) for token in row] for row in rows]
+    )
+
+
+def parse_token_line(line):
+    """!
+    @brief Parse a Sudoku puzzle of any size, written as tokens on a single line
+
+    @details The one-line token format lists the n * n squares row by row, as tokens
+    separated by spaces or commas, with '0' or '.' for empty squares (Eg. for corpora of
+    16x16 puzzles, one puzzle per line). The puzzle is not checked against Sudoku rules.
+
+    @param line (str) The line to be parsed.
+
+    @return n x n numpy array representing puzzle if the line is in a valid format,
+    or error message if not.
+    """
+    assert isinstance(line, str), "Parameter line must be a string"
+
+    tokens = line.replace(",", " ").split()
+    n = isqrt(len(tokens))
+    if n not in SIZES or n * n != len(tokens):
+        squares = ", ".join(str(size * size) for size in SIZES)
+        return (
+            f"Line must contain one of {squares} squares, but {len(tokens)} were given."
+        )
+
+    for token in tokens:
+        if not (token == "." or token.isdigit()):
+            return f"Found unrecognised token '{token}'"
+
+    return np.array([0 if token == "." else int(token) for token in tokens]).reshape(
+        (n, n)
+    )
+
+
 def load_puzzle(filepath, check_validity=True):
     """!
     @brief Load a Sudoku puzzle from a text file into a numpy array.
@@ -88,7 +197,9 @@ def load_puzzle(filepath, check_validity=True):
     adhere to specific formatting criteria: each row must contain 9 digits,
     separated by '|', '+', '-', ',', or a space ' '. Rows are separated by
     newline characters, and they may also be separated by lines containing
-    only the specified separators. The function has an option to validate the
+    only the specified separators. Files which are not in this format are
+    parsed in the token format (see 'parse_tokens'), so puzzles of other
+    sizes (Eg. 16x16) are loaded into n x n arrays. The function has an option to validate the
     Sudoku puzzle against standard Sudoku rules. If the puzzle format is invalid
     or does not conform to Sudoku rules (when validation is enabled), the function
     returns 'None'.
@@ -97,7 +208,7 @@ def load_puzzle(filepath, check_validity=True):
     @param check_validity (bool, optional) Flag to indicate whether to validate
     the Sudoku puzzle against standard Sudoku rules. Defaults to True.
 
-    @return A 9x9 numpy array representing the Sudoku puzzle if the file
+    @return An n x n numpy array representing the Sudoku puzzle if the file
     format and puzzle are valid; otherwise, returns 'None'.
     """
     # ensuring the file provided is a text file
@@ -109,6 +220,11 @@ def load_puzzle(filepath, check_validity=True):
     # parse text in file
     # if valid format, output is 9x9 array containing puzzle
     output = parse_sudoku_string(text)
+    if not isinstance(output, np.ndarray):
+        # other sizes (or numbers above 9) are written in the token format
+        tokens_output = parse_tokens(text)
+        if isinstance(tokens_output, np.ndarray):
+            output = tokens_output
     if isinstance(output, np.ndarray):
         # output is array containing puzzle
         puzzle = output
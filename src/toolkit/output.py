@@ -8,6 +8,7 @@ and candidate grids.
 """
 import numpy as np
 import os
+from math import isqrt
 from .validation import validate_puzzle
 
 
@@ -21,7 +22,10 @@ def puzzle_to_string(puzzle, check_validity=True):
     - Separator '|' added after every third digit in a row
     - Row separator '---+---+---' added after every third row
 
-    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    Puzzles of other sizes are written in the token format read by 'parse_tokens'
+    in input.py (see 'puzzle_to_tokens').
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the Sudoku puzzle.
     @param check_validity (bool, optional) Flag to indicate whether the puzzle
     should be validated before conversion. Defaults to True.
 
@@ -35,6 +39,9 @@ def puzzle_to_string(puzzle, check_validity=True):
             validate_puzzle(puzzle) == "Valid"
         ), "The provided puzzle is not a valid sudoku puzzle"
 
+    if puzzle.shape != (9, 9):
+        return puzzle_to_tokens(puzzle)
+
     # convert the numpy array into the sudoku string format
     puzzle_str = ""
     for i, row in enumerate(puzzle):
@@ -49,6 +56,66 @@ def puzzle_to_string(puzzle, check_validity=True):
     return puzzle_str
 
 
+def puzzle_to_line(puzzle):
+    """!
+    @brief Convert a Sudoku puzzle from a numpy array to a single line of 81 digits.
+
+    @details The squares are listed row by row, with 0 for empty squares (the format
+    read by 'parse_line' in input.py). The line does not end with a newline.
+
+    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+
+    @return A string of 81 digits.
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.shape == (9, 9)
+    return "".join(map(str, puzzle.ravel().tolist()))
+
+
+def puzzle_to_tokens(puzzle):
+    """!
+    @brief Convert a Sudoku puzzle of any size to a string in the token format.
+
+    @details Each row is written on a line, as tokens aligned in columns with '.' for
+    empty squares, with a separator '|' between the blocks of a row and a row separator
+    (Eg. '---+---') between the blocks of rows. This is the format read by 'parse_tokens'
+    in input.py.
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the Sudoku puzzle.
+
+    @return A string representation of the Sudoku puzzle, ending with a newline.
+    """
+    n = puzzle.shape[0]
+    box = isqrt(n)
+    width = len(str(n))
+
+    lines = []
+    for i, row in enumerate(puzzle.tolist()):
+        tokens = [
+            str(value).rjust(width) if value else ".".rjust(width) for value in row
+        ]
+        blocks = [" ".join(tokens[j : j + box]) for j in range(0, n, box)]
+        if i and i % box == 0:
+            lines.append("-+-".join("-" * len(block) for block in blocks))
+        lines.append(" | ".join(blocks))
+    return "\n".join(lines) + "\n"
+
+
+def puzzle_to_token_line(puzzle):
+    """!
+    @brief Convert a Sudoku puzzle of any size to a single line of tokens.
+
+    @details The squares are listed row by row, separated by spaces, with 0 for empty
+    squares (the format read by 'parse_token_line' in input.py). The line does not end
+    with a newline.
+
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the Sudoku puzzle.
+
+    @return A string of n * n tokens.
+    """
+    assert isinstance(puzzle, np.ndarray) and puzzle.ndim == 2
+    return " ".join(map(str, puzzle.ravel().tolist()))
+
+
 def save_puzzle(filepath, puzzle, check_validity=True):
     """!
     @brief Save a Sudoku puzzle as a numpy array to a given file.
@@ -58,7 +125,7 @@ def save_puzzle(filepath, puzzle, check_validity=True):
     created if they do not exist.
 
     @param filepath (str) The file path where the Sudoku puzzle will be saved. Must end with '.txt'.
-    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the Sudoku puzzle.
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the Sudoku puzzle.
     @param check_validity (bool, optional) Flag to indicate whether the puzzle should be
     validated before saving. Defaults to True.
     """
@@ -78,16 +145,22 @@ def save_puzzle(filepath, puzzle, check_validity=True):
         file.write(puzzle_str)
 
 
-def print_puzzle(puzzle):
+def print_puzzle(puzzle, check_validity=True):
     """!
     @brief Prints numpy array representing a Sudoku puzzle in a visually intuitive way.
 
     @details The function prints the puzzle in the format given by puzzle_to_string,
-    except with spaces added after each digit for better readability.
+    except with spaces added after each digit for better readability. Puzzles of other
+    sizes are printed in the token format, which is spaced already.
 
-    @param puzzle (numpy.ndarray): A 9x9 numpy array representing the Sudoku puzzle.
+    @param puzzle (numpy.ndarray): An n x n numpy array representing the Sudoku puzzle.
+    @param check_validity (bool, optional) Flag to indicate whether the puzzle should be
+    validated before printing. Defaults to True.
     """
-    puzzle_str = puzzle_to_string(puzzle)
+    puzzle_str = puzzle_to_string(puzzle, check_validity)
+    if puzzle.shape != (9, 9):
+        print(puzzle_str)
+        return
 
     # add spaces after all digits
     puzzle_str = "".join(
@@ -5,9 +5,42 @@
 which is either "Valid" or an error message explaining why
 the validation failed.
 
+The batch validators (ending in '_many') check many grids at once, given
+as an (N, n, n) numpy array, and return an array of N status codes instead
+of a string per grid. The message of each code is given by MESSAGES.
+
 @author Created by William Knottenbelt
 """
 import numpy as np
+from math import isqrt
+
+# box sizes of the puzzles supported (4x4 up to 25x25 grids, see engine/grids.py)
+BOX_SIZES = (2, 3, 4, 5)
+
+# status codes of the batch validators, and their messages
+VALID = 0
+INVALID_DIMENSIONS = 1
+INVALID_ENTRIES = 2
+DUPLICATE_ROWS = 3
+DUPLICATE_COLUMNS = 4
+DUPLICATE_BLOCKS = 5
+UNFILLED = 6
+PUZZLE_INVALID = 7
+INCONSISTENT_GIVENS = 8
+MESSAGES = (
+    "Valid",
+    "Invalid dimensions",
+    "Invalid entries",
+    "Duplicate numbers in row(s)",
+    "Duplicate numbers in column(s)",
+    "Duplicate numbers in block(s)",
+    "Unfilled",
+    "Puzzle Invalid",
+    "Solution not consistent with given squares in puzzle",
+)
+
+# number of grids checked at once by the batch validators (bounds the memory used)
+CHUNK = 16384
 
 
 def is_unique(arr):
@@ -22,19 +55,38 @@ def is_unique(arr):
     return len(arr) == len(np.unique(arr))
 
 
+def unique_rows(units):
+    """!
+    @brief Checks, for each row of a 2D array, if all its non-zero numbers are unique.
+
+    @details Vectorised version of 'is_unique', which sorts every row at once and
+    looks for equal non-zero neighbours.
+
+    @param units (numpy.ndarray) A 2D numpy array (Eg. the rows of a puzzle)
+
+    @return 1D boolean numpy array, True for the rows whose non-zero numbers are unique.
+    """
+    ordered = np.sort(units, axis=1)
+    return ~np.any((ordered[:, 1:] == ordered[:, :-1]) & (ordered[:, 1:] > 0), axis=1)
+
+
 def validate_puzzle(puzzle):
     """!
-    @brief Check if a 9x9 numpy array is a valid Sudoku puzzle
+    @brief Check if a numpy array is a valid Sudoku puzzle
 
     @details
     This function checks for correct dimensions, valid entries, and
-    whether there are duplicate numbers in each row, column or 3x3
-    block of the puzzle.
+    whether there are duplicate numbers in each row, column or block
+    of the puzzle.
+
+    Puzzles are 9x9 with 3x3 blocks, or n x n with blocks of box x box
+    squares and numbers 1 to n, where n = box * box for box = 2 to 5
+    (Eg. 16x16 puzzles with 4x4 blocks).
 
     Note:
     The function does not check if the puzzle is solvable
 
-    @param sudoku_arr (numpy.ndarray) A 9x9 numpy array representing a Sudoku puzzle.
+    @param sudoku_arr (numpy.ndarray) An n x n numpy array representing a Sudoku puzzle.
 
     @return Returns "Valid" if the puzzle adheres to Sudoku rules;
     otherwise, it returns an error message explaining why the validation failed.
@@ -42,33 +94,33 @@ def validate_puzzle(puzzle):
     # check puzzle is numpy array
     assert isinstance(puzzle, np.ndarray)
 
-    # check if the puzzle is 9x9
-    if puzzle.shape != (9, 9):
+    # check if the puzzle is n x n, with n a square from 4 to 25
+    box = isqrt(puzzle.shape[0]) if puzzle.ndim == 2 else 0
+    n = box * box
+    if box not in BOX_SIZES or puzzle.shape != (n, n):
         return "Invalid dimensions"
 
-    # check if puzzle contains only integers from 0 to 9
-    if not np.all(np.isin(puzzle, range(10))):
+    # check if puzzle contains only integers from 0 to n
+    if not np.all(np.isin(puzzle, range(n + 1))):
         return "Invalid entries"
 
-    # check each row, column, and 3x3 block
-    for n in range(9):
-        row = puzzle[n, :]  # n-th row
-        col = puzzle[:, n]  # n-th column
+    # rows, columns and blocks as the rows of n x n arrays
+    # (the blocks are formed by a reshape, rather than slicing each block)
+    blocks = puzzle.reshape(box, box, box, box).swapaxes(1, 2).reshape(n, n)
 
-        # indices of the top left square in n-th block
-        block_i = 3 * (n // 3)  # row index
-        block_j = 3 * (n % 3)  # column index
+    rows_ok = unique_rows(puzzle)
+    cols_ok = unique_rows(puzzle.T)
+    blocks_ok = unique_rows(blocks)
 
-        block = puzzle[block_i : block_i + 3, block_j : block_j + 3]
-        block = block.flatten()
-
-        if not is_unique(row):
+    # check each row, column, and block
+    for i in range(n):
+        if not rows_ok[i]:
             return "Duplicate numbers in row(s)"
 
-        if not is_unique(col):
+        if not cols_ok[i]:
             return "Duplicate numbers in column(s)"
 
-        if not is_unique(block):
+        if not blocks_ok[i]:
             return "Duplicate numbers in block(s)"
 
     return "Valid"
@@ -81,7 +133,7 @@ def validate_filled(puzzle):
     @details This function uses 'validate_puzzle' to ensure that the puzzle is
     valid and then checks for the presence of any empty cells (denoted by 0).
 
-    @param puzzle (numpy.ndarray) A 9x9 numpy array representing a Sudoku puzzle.
+    @param puzzle (numpy.ndarray) An n x n numpy array representing a Sudoku puzzle.
 
     @return str: Returns "Valid" if the puzzle is completely filled and adheres to Sudoku rules;
     Returns "Unfilled" if the puzzle adheres to Sudoku rules but contains empty squares;
@@ -108,8 +160,8 @@ def validate_solution(puzzle, solution):
     filled puzzle using 'validate_filled'. Then it confirms the 'given' squares in the puzzle
     match those in the solution.
 
-    @param puzzle (numpy.ndarray) A 9x9 numpy array representing the original Sudoku puzzle.
-    @param solution (numpy.ndarray) A 9x9 numpy array representing the proposed solution to the puzzle.
+    @param puzzle (numpy.ndarray) An n x n numpy array representing the original Sudoku puzzle.
+    @param solution (numpy.ndarray) An n x n numpy array representing the proposed solution to the puzzle.
 
     @return Returns "Valid" if the solution is valid; otherwise, returns an error message.
     """
@@ -123,6 +175,10 @@ def validate_solution(puzzle, solution):
     if filled_message != "Valid":
         return "Solution is " + filled_message
 
+    # a solution of another size cannot match the puzzle
+    if solution.shape != puzzle.shape:
+        return "Solution not consistent with given squares in puzzle"
+
     # indices of 'givens' - filled squares in puzzle
     given_indices = np.nonzero(puzzle)
 
@@ -133,3 +189,153 @@ def validate_solution(puzzle, solution):
 
     # all conditions for valid solution are satisfied if we get here
     return "Valid"
+
+
+def batch_box_size(grids):
+    """!
+    @brief Get the box size of a batch of grids from its shape
+
+    @param grids (numpy.ndarray) An (N, n, n) numpy array of grids.
+
+    @return The box size (int), or None if the grids are not n x n with n = box * box
+    for a supported box size.
+    """
+    assert isinstance(grids, np.ndarray)
+    if grids.ndim != 3:
+        return None
+    box = isqrt(grids.shape[1])
+    if box not in BOX_SIZES or grids.shape[1:] != (box * box, box * box):
+        return None
+    return box
+
+
+def duplicate_units(values, box):
+    """!
+    @brief Find the units with duplicate numbers, in a batch of grids with valid entries
+
+    @details Each number k is mapped to the bit k - 1 (and empty squares to 0), and the
+    bits of every unit are both added up and ORed together. A unit has no duplicate
+    numbers exactly when the sum has no carries, that is when it is equal to the OR.
+    The squares of each unit are accumulated one position at a time, with a few NumPy
+    operations on all the units of all the grids.
+
+    @param values (numpy.ndarray) An (N, n, n) numpy array of grids, with entries 0 to n.
+    @param box (int) The box size of the grids.
+
+    @return (N, 3, n) boolean numpy array, True for the rows, columns and blocks (in this
+    order) containing duplicate numbers.
+    """
+    n = box * box
+    dtype = np.uint16 if n <= 9 else np.uint32  # no overflow of the sums of n bits
+    bit = np.array([0] + [1 << k for k in range(n)], dtype=dtype)
+
+    bits = bit[values]
+    blocks = bits.reshape(-1, box, box, box, box).swapaxes(2, 3).reshape(-1, n, n)
+    units = np.stack([bits, bits.swapaxes(1, 2), blocks], axis=1)  # (N, 3, n, n)
+
+    total = units[..., 0].copy()
+    union = units[..., 0].copy()
+    for j in range(1, n):
+        total += units[..., j]
+        union |= units[..., j]
+    return total != union
+
+
+def validate_puzzle_many(puzzles):
+    """!
+    @brief Check if each of a batch of numpy arrays is a valid Sudoku puzzle
+
+    @details Vectorised version of 'validate_puzzle', which checks the entries and the
+    units of all the puzzles with a few NumPy operations (see 'duplicate_units'), in
+    chunks of CHUNK puzzles. The code of each puzzle is that of the message returned by
+    'validate_puzzle': the first of its rows, columns or blocks with duplicate numbers
+    is found in the same order.
+
+    @param puzzles (numpy.ndarray) An (N, n, n) numpy array of puzzles.
+
+    @return 1D numpy array of the N status codes (VALID, INVALID_DIMENSIONS,
+    INVALID_ENTRIES, DUPLICATE_ROWS, DUPLICATE_COLUMNS or DUPLICATE_BLOCKS).
+    """
+    assert isinstance(puzzles, np.ndarray) and puzzles.ndim >= 1
+    codes = np.full(len(puzzles), VALID, dtype=np.int8)
+
+    box = batch_box_size(puzzles)
+    if box is None:
+        codes[:] = INVALID_DIMENSIONS
+        return codes
+    n = box * box
+
+    for start in range(0, len(puzzles), CHUNK):
+        chunk = puzzles[start : start + CHUNK]
+
+        # entries must be integers from 0 to n
+        valid = (chunk >= 0) & (chunk <= n)
+        if not np.issubdtype(chunk.dtype, np.integer):
+            valid &= chunk == np.floor(chunk)
+        entries_ok = valid.all(axis=(1, 2))
+        values = np.where(entries_ok[:, None, None], chunk, 0).astype(np.intp)
+
+        # first unit with duplicates, in the order row 0, column 0, block 0, row 1...
+        duplicates = duplicate_units(values, box).swapaxes(1, 2).reshape(-1, 3 * n)
+        first = duplicates.argmax(axis=1)
+        unit_codes = np.where(duplicates.any(axis=1), DUPLICATE_ROWS + first % 3, VALID)
+
+        codes[start : start + CHUNK] = np.where(entries_ok, unit_codes, INVALID_ENTRIES)
+    return codes
+
+
+def validate_filled_many(grids):
+    """!
+    @brief Evaluate whether each of a batch of grids is entirely filled and valid
+
+    @details Vectorised version of 'validate_filled'.
+
+    @param grids (numpy.ndarray) An (N, n, n) numpy array of grids.
+
+    @return 1D numpy array of the N status codes: the code of 'validate_puzzle_many' for
+    invalid grids, UNFILLED for valid grids containing empty squares, otherwise VALID.
+    """
+    codes = validate_puzzle_many(grids)
+    if batch_box_size(grids) is not None:
+        unfilled = (grids == 0).any(axis=(1, 2))
+        codes[(codes == VALID) & unfilled] = UNFILLED
+    return codes
+
+
+def validate_solution_many(puzzles, solutions):
+    """!
+    @brief Validate whether each of a batch of solutions is a valid solution of its puzzle
+
+    @details Vectorised version of 'validate_solution'. A single puzzle can be given for
+    all the solutions (Eg. the solutions found for one puzzle), in which case it is only
+    validated once.
+
+    @param puzzles (numpy.ndarray) An (N, n, n) numpy array of the puzzles, or an n x n
+    numpy array of a puzzle shared by all the solutions.
+    @param solutions (numpy.ndarray) An (N, n, n) numpy array of the proposed solutions.
+
+    @return 1D numpy array of the N status codes: PUZZLE_INVALID if the puzzle is invalid,
+    the code of 'validate_filled_many' if the solution is invalid or unfilled,
+    INCONSISTENT_GIVENS if it does not match the given squares of the puzzle, otherwise
+    VALID.
+    """
+    assert isinstance(puzzles, np.ndarray) and isinstance(solutions, np.ndarray)
+    if puzzles.ndim == 2:
+        puzzle_codes = validate_puzzle_many(puzzles[np.newaxis])
+        puzzle_codes = np.repeat(puzzle_codes, len(solutions))
+    else:
+        assert len(puzzles) == len(solutions), "There must be one puzzle per solution"
+        puzzle_codes = validate_puzzle_many(puzzles)
+
+    codes = validate_filled_many(solutions)
+    codes[puzzle_codes != VALID] = PUZZLE_INVALID
+
+    # a solution of another size cannot match the puzzle
+    if puzzles.shape[-2:] != solutions.shape[-2:]:
+        codes[codes == VALID] = INCONSISTENT_GIVENS
+        return codes
+
+    # given squares must be the same in the solutions
+    consistent = ((puzzles == 0) | (puzzles == solutions)).all(axis=(-2, -1))
+    codes[(codes == VALID) & ~consistent] = INCONSISTENT_GIVENS
+    return codes
@@ -5,7 +5,7 @@ Robust testing for the backtracking algorithm
 from src.toolkit.validation import validate_solution, validate_filled
 from src.toolkit.input import load_puzzle
 
-from src.engine.backtracking import backtracker
+from src.engine.backtracking import backtracker, count_solutions, iter_solutions
 import numpy as np
 
 # load puzzle with one solution
@@ -69,3 +69,52 @@ def test_unsolvability():
     for file in ["01.txt", "02.txt", "03.txt"]:
         puzzle = load_puzzle(path + file)
         assert backtracker(puzzle) == "UNSOLVABLE"
+
+
+def test_count_solutions():
+    """
+    Tests for counting solutions (up to a limit)
+    """
+    assert count_solutions(puzzle_one) == 1
+    assert count_solutions(puzzle_many) == 2
+    assert count_solutions(puzzle_many, limit=100) == 10
+    assert count_solutions(puzzle_many, limit=4) == 4
+    assert count_solutions(puzzle_one, limit=1) == 1
+
+    puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+    assert count_solutions(puzzle) == 0
+
+    # the count is deterministic, and so is the search
+    stats, stats_again = {}, {}
+    puzzle = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+    assert count_solutions(puzzle, stats=stats) == 1
+    assert count_solutions(puzzle, stats=stats_again) == 1
+    assert stats["nodes"] == stats_again["nodes"] >= 1
+
+    # the empty puzzle has (very) many solutions
+    assert count_solutions(np.zeros((9, 9), dtype=int), limit=50) == 50
+
+
+def test_iter_solutions():
+    """
+    Tests for generating solutions lazily
+    """
+    for method in ["sets", "bitmask", "trail"]:
+        solutions = iter_solutions(puzzle_many, method=method)
+
+        # solutions are generated one at a time
+        first = next(solutions)
+        assert validate_solution(puzzle_many, first) == "Valid"
+
+        rest = list(solutions)
+        assert len(rest) == 9
+        assert len({tuple(s.flatten()) for s in [first] + rest}) == 10
+
+    # the generator can be closed before the search is complete
+    solutions = iter_solutions(puzzle_many, method="trail")
+    next(solutions)
+    solutions.close()
+    assert next(solutions, None) is None
+
+    puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+    assert list(iter_solutions(puzzle)) == []
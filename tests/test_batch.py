@@ -0,0 +1,93 @@
+"""
+Robust testing for vectorised batch elimination (engine/batch.py)
+"""
+
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution
+from src.engine.basics import init_candidates
+from src.engine.bitmask import candidates_to_masks
+from src.engine.batch import (
+    init_candidates_batch,
+    naked_singles_batch,
+    hidden_singles_batch,
+    pointing_batch,
+    batch_elimination,
+    cands_to_masks,
+    solve_batch,
+    STUCK,
+    SOLVED,
+    CONTRADICTION,
+)
+
+# batch of puzzles: easy (solvable by elimination), hardest (needs backtracking)
+# and unsolvable
+filepaths = [
+    "tests/test_puzzles/easy/easy_01.txt",
+    "tests/test_puzzles/singles_only/01.txt",
+    "tests/test_puzzles/hardest/hardest_02.txt",
+    "tests/test_puzzles/unsolvable/unsolvable_01.txt",
+]
+puzzles = np.array([load_puzzle(filepath) for filepath in filepaths])
+
+
+def test_init_candidates_batch():
+    """
+    Test init_candidates_batch agrees with init_candidates
+    """
+    cands = init_candidates_batch(puzzles)
+    assert cands.shape == (4, 9, 9, 9) and cands.dtype == bool
+
+    for k, puzzle in enumerate(puzzles):
+        expected = candidates_to_masks(init_candidates(puzzle))
+        assert np.array_equal(cands_to_masks(cands)[k], expected)
+
+
+def test_batch_techniques():
+    """
+    Test naked singles, hidden singles and pointing on a batch of empty puzzles
+    """
+    cands = init_candidates_batch(np.zeros((2, 9, 9), dtype=int))
+
+    # naked single 3 at (0, 0) in the first puzzle only
+    cands[0, 0, 0] = False
+    cands[0, 0, 0, 2] = True
+    cands = naked_singles_batch(cands)
+    assert not cands[0, 0, 1:, 2].any() and not cands[0, 1:, 0, 2].any()
+    assert not cands[0, :3, :3, 2].flatten()[1:].any()
+    assert cands[1].all(), "Other puzzles must not be affected"
+
+    # hidden single 4 at (2, 8) in the second puzzle
+    cands[1, 2, :8, 3] = False
+    cands = hidden_singles_batch(cands)
+    assert cands[1, 2, 8].sum() == 1 and cands[1, 2, 8, 3]
+
+    # pointing triple of 5 along the first row of the first block
+    cands[1, 1:3, :3, 4] = False
+    cands = pointing_batch(cands)
+    assert not cands[1, 0, 3:, 4].any() and cands[1, 0, :3, 4].all()
+
+
+def test_batch_elimination():
+    """
+    Test batch_elimination and the status of each puzzle
+    """
+    cands, status = batch_elimination(init_candidates_batch(puzzles))
+    assert list(status) == [SOLVED, SOLVED, STUCK, CONTRADICTION]
+
+
+def test_solve_batch():
+    """
+    Test solve_batch, with and without backtracking for stuck puzzles
+    """
+    solutions, status = solve_batch(puzzles, chunk_size=3)
+    assert list(status) == [SOLVED, SOLVED, STUCK, CONTRADICTION]
+    for k in [0, 1]:
+        assert validate_solution(puzzles[k], solutions[k]) == "Valid"
+
+    # every backtracking method solves the stuck puzzle
+    for method in ["sets", "bitmask", "trail"]:
+        solutions, status = solve_batch(puzzles, method=method)
+        assert list(status) == [SOLVED, SOLVED, SOLVED, CONTRADICTION], method
+        for k in [0, 1, 2]:
+            assert validate_solution(puzzles[k], solutions[k]) == "Valid"
@@ -0,0 +1,180 @@
+"""
+Robust testing for the bitmask candidates grid in engine/bitmask.py
+"""
+
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution
+from src.engine.basics import init_candidates
+from src.engine.backtracking import backtracker
+from src.engine.bitmask import (
+    BIT,
+    candidates_to_masks,
+    masks_to_candidates,
+    init_masks,
+    naked_singles_elimination,
+    hidden_singles_elimination,
+    obvious_pairs_elimination,
+    pointing_elimination,
+    all_elimination,
+    solvable,
+    filler,
+)
+
+
+def test_adapters():
+    """
+    Test conversion between candidates grids of sets and masks grids
+    """
+    puzzle = load_puzzle("tests/test_puzzles/hardest/hardest_01.txt")
+    candidates = init_candidates(puzzle)
+
+    # initialising masks directly must agree with converting the candidates grid
+    masks = init_masks(puzzle)
+    assert masks.shape == (81,) and masks.dtype == np.uint16
+    assert np.array_equal(masks, candidates_to_masks(candidates))
+
+    # converting back must recover the candidates grid
+    assert np.array_equal(masks_to_candidates(masks), candidates)
+
+
+def test_naked_singles():
+    """
+    Test naked_singles_elimination (bitmask version)
+    """
+    masks = init_masks(np.zeros((9, 9), dtype=int))
+
+    # manually insert naked single at (0, 0)
+    masks[0] = BIT[3]
+
+    masks = naked_singles_elimination(masks)
+    candidates = masks_to_candidates(masks)
+
+    rest_of_row = set().union(*candidates[0, 1:])
+    rest_of_col = set().union(*candidates[1:, 0])
+    rest_of_block = set().union(*candidates[:3, :3].flatten()[1:])
+
+    assert {3}.isdisjoint(rest_of_row), "Single not eliminated from rest of row"
+    assert {3}.isdisjoint(rest_of_col), "Single not eliminated from rest of column"
+    assert {3}.isdisjoint(rest_of_block), "Single not eliminated from rest of block"
+    assert candidates[0, 0] == {3}
+
+
+def test_hidden_singles():
+    """
+    Test hidden_singles_elimination (bitmask version)
+    """
+    candidates = init_candidates(np.zeros((9, 9), dtype=int))
+
+    # hidden single at (0, 0) in its column
+    for i in range(1, 9):
+        candidates[i, 0].discard(3)
+
+    # hidden single at (2, 8) in its row
+    for j in range(0, 8):
+        candidates[2, j].discard(4)
+
+    # hidden single at (8, 8) in its block
+    for i in range(6, 9):
+        for j in range(6, 9):
+            if (i, j) != (8, 8):
+                candidates[i, j].discard(6)
+
+    masks = hidden_singles_elimination(candidates_to_masks(candidates))
+    candidates = masks_to_candidates(masks)
+
+    assert candidates[0, 0] == {3}, "Failed to process hidden single in column"
+    assert candidates[2, 8] == {4}, "Failed to process hidden single in row"
+    assert candidates[8, 8] == {6}, "Failed to process hidden single in block"
+
+
+def test_obvious_pairs():
+    """
+    Test obvious_pairs_elimination (bitmask version)
+    """
+    masks = init_masks(np.zeros((9, 9), dtype=int))
+
+    # manually insert obvious pair (in first block & row)
+    masks[0] = masks[1] = BIT[3] | BIT[4]
+
+    masks = obvious_pairs_elimination(masks)
+    candidates = masks_to_candidates(masks)
+
+    rest_of_row = set().union(*candidates[0, 2:])
+    rest_of_block = set().union(*candidates[1:3, :3].flatten())
+
+    assert {3, 4}.isdisjoint(rest_of_row), "Pair not eliminated from rest of row"
+    assert {3, 4}.isdisjoint(rest_of_block), "Pair not eliminated from rest of block"
+    assert candidates[0, 0] == candidates[0, 1] == {3, 4}, "Pair must be kept"
+
+
+def test_pointing():
+    """
+    Test pointing_elimination (bitmask version)
+    """
+    candidates = init_candidates(np.zeros((9, 9), dtype=int))
+
+    # pointing triple along first row
+    for i in range(1, 3):
+        for j in range(3):
+            candidates[i, j].discard(3)
+
+    # pointing triple along last column
+    for i in range(6, 9):
+        for j in range(6, 8):
+            candidates[i, j].discard(4)
+
+    masks = pointing_elimination(candidates_to_masks(candidates))
+    candidates = masks_to_candidates(masks)
+
+    rest_of_row = set().union(*candidates[0, 3:])
+    rest_of_col = set().union(*candidates[:6, 8])
+
+    assert {3}.isdisjoint(rest_of_row), "Number not eliminated from rest of row"
+    assert {4}.isdisjoint(rest_of_col), "Number not eliminated from rest of column"
+    assert 3 in candidates[0, 0] and 4 in candidates[8, 8]
+
+
+def test_all_elimination():
+    """
+    Test all_elimination (bitmask version)
+    """
+    # all 3 easy puzzles can be solved using only elimination techniques
+    for file in ["01.txt", "02.txt", "03.txt"]:
+        puzzle = load_puzzle("tests/test_puzzles/easy/easy_" + file)
+        masks = init_masks(puzzle)
+        solution = filler(puzzle, all_elimination(masks))
+
+        # asserting the masks grid has not been modified
+        assert np.array_equal(masks, init_masks(puzzle))
+
+        assert validate_solution(puzzle, solution) == "Valid"
+
+    # test on unsolvable puzzle
+    puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+    assert not solvable(all_elimination(init_masks(puzzle)))
+
+
+def test_bitmask_backtracker():
+    """
+    Test backtracking on the masks grid
+    """
+    for file in ["hard/hard_01.txt", "hardest/hardest_02.txt"]:
+        puzzle = load_puzzle("tests/test_puzzles/" + file)
+        solution = backtracker(puzzle, method="bitmask")
+        assert validate_solution(puzzle, solution) == "Valid"
+
+        # the candidates grid of sets is converted if provided
+        solution = backtracker(puzzle, init_candidates(puzzle), method="bitmask")
+        assert validate_solution(puzzle, solution) == "Valid"
+
+    # multiple solutions
+    puzzle = load_puzzle("tests/test_puzzles/10_solutions.txt")
+    solutions = backtracker(puzzle, num_solutions=10, method="bitmask")
+    assert isinstance(solutions, list) and len(solutions) == 10
+    assert all(validate_solution(puzzle, s) == "Valid" for s in solutions)
+
+    # unsolvable puzzles
+    for file in ["01.txt", "02.txt", "03.txt"]:
+        puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_" + file)
+        assert backtracker(puzzle, method="bitmask") == "UNSOLVABLE"
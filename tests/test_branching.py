@@ -0,0 +1,91 @@
+"""
+Robust testing for the branching strategies in engine/branching.py
+"""
+
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution
+from src.engine.backtracking import backtracker
+from src.engine.branching import (
+    select_first,
+    select_mrv,
+    select_mrv_degree,
+    select_hidden,
+    STRATEGIES,
+)
+
+# masks grid where every square is solved (the numbers are irrelevant here)
+solved = [1] * 81
+
+
+def test_select_first():
+    """
+    Test select_first
+    """
+    masks = solved.copy()
+    masks[10] = 0b111
+    masks[40] = 0b11
+
+    assert select_first(masks) == [(10, 1), (10, 2), (10, 3)]
+
+    # squares before 'start' are not searched
+    assert select_first(masks, start=11) == [(40, 1), (40, 2)]
+
+    assert select_first(solved) is None
+
+
+def test_select_mrv():
+    """
+    Test select_mrv and select_mrv_degree
+    """
+    masks = solved.copy()
+    masks[0] = 0b111
+    masks[30] = 0b11000  # fewest candidates
+    masks[80] = 0b11  # same number of candidates, but more unsolved peers
+    masks[79] = masks[78] = 0b111
+
+    assert select_mrv(masks) == [(30, 4), (30, 5)]
+    assert select_mrv_degree(masks) == [(80, 1), (80, 2)]
+
+    assert select_mrv(solved) is None
+    assert select_mrv_degree(solved) is None
+
+
+def test_select_hidden():
+    """
+    Test select_hidden
+    """
+    # every unsolved square has 3 candidates
+    masks = solved.copy()
+    for square in range(9):
+        masks[square] = 0b111 << 3
+    assert len(select_hidden(masks)) == 3
+
+    # in the first row, 7 (bit 6) is only possible in two squares
+    masks[2] |= 1 << 6
+    masks[5] |= 1 << 6
+    assert select_hidden(masks) == [(2, 7), (5, 7)]
+
+    assert select_hidden(solved) is None
+
+
+def test_strategies_backtracker():
+    """
+    Test backtracking with every branching strategy, and node counting
+    """
+    puzzle = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+    puzzle_many = load_puzzle("tests/test_puzzles/10_solutions.txt")
+
+    for method in ["sets", "bitmask", "trail"]:
+        for strategy in STRATEGIES:
+            stats = {}
+            solution = backtracker(
+                puzzle, method=method, strategy=strategy, stats=stats
+            )
+            assert validate_solution(puzzle, solution) == "Valid"
+            assert stats["nodes"] >= 1
+
+            solutions = backtracker(
+                puzzle_many, num_solutions=10, method=method, strategy=strategy
+            )
+            assert len(solutions) == 10
+            assert all(validate_solution(puzzle_many, s) == "Valid" for s in solutions)
@@ -0,0 +1,88 @@
+"""
+Robust testing for the solution cache (engine/cache.py)
+"""
+
+import numpy as np
+from collections import OrderedDict
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution
+from src.engine.canonical import LINE_ORDERS, apply_transform
+from src.engine.cache import cached_backtracker, hit_rate, MIN_CLUES
+
+puzzle = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+puzzle_easy = load_puzzle("tests/test_puzzles/easy/easy_01.txt")
+puzzle_unsolvable = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+
+# an equivalent puzzle: transposed, rows and columns permuted, numbers relabelled
+transform = (
+    True,
+    LINE_ORDERS[100],
+    LINE_ORDERS[900],
+    np.array([0, 5, 3, 1, 9, 2, 8, 7, 6, 4]),
+)
+puzzle_copy = apply_transform(puzzle, transform)
+
+
+def test_cached_backtracker():
+    """
+    Test that equivalent puzzles hit the cache, and are solved correctly
+    """
+    cache, stats = OrderedDict(), {}
+
+    solution = cached_backtracker(puzzle, cache, stats=stats)
+    assert validate_solution(puzzle, solution) == "Valid"
+    assert stats["misses"] == 1 and stats["hits"] == 0
+
+    # the equivalent puzzle is a hit, and its solution is mapped back
+    solution = cached_backtracker(puzzle_copy, cache, stats=stats)
+    assert validate_solution(puzzle_copy, solution) == "Valid"
+    assert stats["lookups"] == 2 and stats["hits"] == 1
+    assert hit_rate(stats) == 0.5
+    assert stats["lookup_seconds"] > 0
+
+    # unsolvable results are cached
+    for _ in range(2):
+        assert cached_backtracker(puzzle_unsolvable, cache, stats=stats) == "UNSOLVABLE"
+    assert stats["misses"] == 2 and stats["hits"] == 2
+
+    assert hit_rate({}) == 0.0
+
+
+def test_cache_eviction():
+    """
+    Test that the memory tier is bounded, and backed by the disk tier
+    """
+    cache, disk, stats = OrderedDict(), {}, {}
+
+    cached_backtracker(puzzle, cache, maxsize=2, disk=disk, stats=stats)
+    cached_backtracker(puzzle_easy, cache, maxsize=2, disk=disk, stats=stats)
+    cached_backtracker(puzzle_copy, cache, maxsize=2, disk=disk, stats=stats)  # hit
+    cached_backtracker(puzzle_unsolvable, cache, maxsize=2, disk=disk, stats=stats)
+
+    # the least recently used puzzle (puzzle_easy) was evicted from memory only
+    assert len(cache) == 2 and len(disk) == 3
+    assert stats["misses"] == 3 and stats["hits"] == 1
+
+    solution = cached_backtracker(puzzle_easy, cache, maxsize=2, disk=disk, stats=stats)
+    assert validate_solution(puzzle_easy, solution) == "Valid"
+    assert stats["disk_hits"] == 1
+    assert hit_rate(stats) == 0.4
+
+    # a new memory tier is filled from the disk tier
+    cache, stats = OrderedDict(), {}
+    solution = cached_backtracker(puzzle_copy, cache, disk=disk, stats=stats)
+    assert validate_solution(puzzle_copy, solution) == "Valid"
+    assert stats["disk_hits"] == 1 and len(cache) == 1
+
+
+def test_sparse_puzzles():
+    """
+    Test that puzzles with fewer than MIN_CLUES givens are solved without the cache
+    """
+    cache, stats = OrderedDict(), {}
+    sparse = puzzle.copy()
+    sparse.flat[np.flatnonzero(sparse)[MIN_CLUES - 1 :]] = 0
+    for _ in range(2):
+        solution = cached_backtracker(sparse, cache, stats=stats)
+        assert validate_solution(sparse, solution) == "Valid"
+    assert stats["skipped"] == 2 and len(cache) == 0 and hit_rate(stats) == 0.0
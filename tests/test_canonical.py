@@ -0,0 +1,103 @@
+"""
+Robust testing for the canonical form of puzzles (engine/canonical.py)
+"""
+
+import numpy as np
+from time import perf_counter
+from src.toolkit.input import load_puzzle
+from src.engine.backtracking import backtracker
+from src.engine.canonical import (
+    LINE_ORDERS,
+    apply_transform,
+    invert_transform,
+    canonical_form,
+)
+
+filepaths = [
+    "tests/test_puzzles/easy/easy_01.txt",
+    "tests/test_puzzles/hard/hard_01.txt",
+    "tests/test_puzzles/hardest/hardest_01.txt",
+    "tests/test_puzzles/unsolvable/unsolvable_01.txt",
+]
+puzzles = [load_puzzle(filepath) for filepath in filepaths]
+
+
+def random_transform(rng):
+    """
+    A random transformation of the grid
+    """
+    relabel = np.concatenate([[0], rng.permutation(9) + 1])
+    rows = LINE_ORDERS[rng.integers(len(LINE_ORDERS))]
+    cols = LINE_ORDERS[rng.integers(len(LINE_ORDERS))]
+    return (bool(rng.integers(2)), rows, cols, relabel)
+
+
+def test_line_orders():
+    """
+    Test the orders of rows (or columns) keeping bands (or stacks) together
+    """
+    assert LINE_ORDERS.shape == (1296, 9)
+    assert len({tuple(order) for order in LINE_ORDERS}) == 1296
+    for order in LINE_ORDERS:
+        assert sorted(order) == list(range(9))
+        bands = order.reshape(3, 3) // 3
+        assert np.all(bands == bands[:, :1])
+
+
+def test_transforms():
+    """
+    Test applying and inverting transformations
+    """
+    rng = np.random.default_rng(0)
+    for puzzle in puzzles:
+        transform = random_transform(rng)
+        transformed = apply_transform(puzzle, transform)
+        assert np.array_equal(
+            transformed > 0, apply_transform((puzzle > 0).astype(int), transform) > 0
+        )
+        assert np.array_equal(invert_transform(transformed, transform), puzzle)
+
+
+def test_canonical_form():
+    """
+    Test that equivalent puzzles have the same canonical form
+    """
+    rng = np.random.default_rng(1)
+    forms = []
+    for puzzle in puzzles:
+        canonical, transform = canonical_form(puzzle)
+        assert np.array_equal(apply_transform(puzzle, transform), canonical)
+        assert sorted(transform[3]) == list(range(10))
+
+        # givens are relabelled in order of first appearance
+        givens = canonical[canonical > 0]
+        assert list(dict.fromkeys(givens)) == list(range(1, len(set(givens)) + 1))
+
+        for _ in range(5):
+            equivalent = apply_transform(puzzle, random_transform(rng))
+            assert np.array_equal(canonical_form(equivalent)[0], canonical)
+        forms.append(tuple(canonical.flatten()))
+
+    # different puzzles have different canonical forms
+    assert len(set(forms)) == len(puzzles)
+
+
+def test_sparse_canonical_form():
+    """
+    Test that sparse puzzles, whose transformations mostly tie, are canonicalised quickly
+    """
+    rng = np.random.default_rng(2)
+    solution = backtracker(puzzles[1])
+    for clues in (0, 1, 3, 8):
+        puzzle = np.zeros((9, 9), dtype=int)
+        squares = rng.choice(81, clues, replace=False)
+        puzzle.flat[squares] = solution.flat[squares]
+
+        start = perf_counter()
+        canonical, transform = canonical_form(puzzle)
+        assert perf_counter() - start < 2
+        assert np.array_equal(apply_transform(puzzle, transform), canonical)
+
+        for _ in range(3):
+            equivalent = apply_transform(puzzle, random_transform(rng))
+            assert np.array_equal(canonical_form(equivalent)[0], canonical)
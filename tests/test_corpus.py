@@ -0,0 +1,95 @@
+"""
+Robust testing for toolkit/corpus.py
+"""
+
+import numpy as np
+import os
+from src.toolkit.corpus import (
+    HEADER_SIZE,
+    pack_puzzles,
+    unpack_puzzles,
+    write_corpus,
+    read_header,
+    read_corpus,
+    iter_corpus,
+    lines_to_corpus,
+    corpus_to_lines,
+    files_to_corpus,
+)
+from src.toolkit.input import load_puzzle
+import pytest
+
+filepaths = [
+    "tests/test_puzzles/easy/easy_01.txt",
+    "tests/test_puzzles/hard/hard_01.txt",
+    "tests/test_puzzles/hardest/hardest_01.txt",
+]
+puzzles = np.array([load_puzzle(filepath) for filepath in filepaths])
+
+
+def test_pack_puzzles():
+    """
+    Test pack_puzzles and unpack_puzzles
+    """
+    for bits, size in [(4, 41), (8, 81)]:
+        records = pack_puzzles(puzzles, bits)
+        assert records.shape == (3, size) and records.dtype == np.uint8
+        assert np.array_equal(unpack_puzzles(records), puzzles)
+
+    # two squares per byte, the first in the high nibble
+    puzzle = np.zeros((1, 9, 9), dtype=int)
+    puzzle[0, 0, :3] = [1, 2, 3]
+    puzzle[0, 8, 8] = 9
+    records = pack_puzzles(puzzle)
+    assert records[0, 0] == 0x12 and records[0, 1] == 0x30 and records[0, 40] == 0x90
+
+    # 8-bit records are unpacked without a copy
+    records = pack_puzzles(puzzles, 8)
+    assert np.shares_memory(unpack_puzzles(records), records)
+
+    with pytest.raises(AssertionError):
+        pack_puzzles(puzzles, 2)
+    with pytest.raises(AssertionError):
+        pack_puzzles(puzzles + 10)
+
+
+def test_corpus_files():
+    """
+    Test writing, reading and converting corpus files
+    """
+    corpus_path = "tests/test_puzzles/corpus_test.sdkc"
+    text_path = "tests/test_puzzles/corpus_test.txt"
+
+    for bits, size in [(4, 41), (8, 81)]:
+        # write from an array and from a generator (in several chunks)
+        assert write_corpus(corpus_path, puzzles, bits) == 3
+        assert os.path.getsize(corpus_path) == HEADER_SIZE + 3 * size
+        assert read_header(corpus_path) == (bits, size, 3)
+
+        records = read_corpus(corpus_path)
+        assert isinstance(records, np.memmap)
+        assert np.array_equal(unpack_puzzles(records), puzzles)
+        assert np.array_equal(unpack_puzzles(records[1:2])[0], puzzles[1])
+
+        assert write_corpus(corpus_path, iter(puzzles), bits, chunk_size=2) == 3
+        chunks = list(iter_corpus(corpus_path, chunk_size=2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert np.array_equal(np.concatenate(chunks), puzzles)
+
+    # conversions to and from text formats
+    assert corpus_to_lines(corpus_path, text_path) == 3
+    assert lines_to_corpus(text_path, corpus_path) == 3
+    assert np.array_equal(unpack_puzzles(read_corpus(corpus_path)), puzzles)
+    assert files_to_corpus(filepaths, corpus_path) == 3
+    assert np.array_equal(unpack_puzzles(read_corpus(corpus_path)), puzzles)
+
+    # empty corpus
+    assert write_corpus(corpus_path, []) == 0
+    assert len(read_corpus(corpus_path)) == 0
+
+    # text files are not corpora
+    with pytest.raises(AssertionError):
+        read_corpus(text_path)
+
+    os.remove(corpus_path)
+    os.remove(text_path)
@@ -0,0 +1,111 @@
+"""
+Robust testing for toolkit/dedup.py
+"""
+
+import numpy as np
+import os
+import subprocess
+from src.toolkit.input import load_puzzle
+from src.toolkit.corpus import write_corpus, read_corpus, unpack_puzzles
+from src.toolkit.dedup import (
+    fingerprint,
+    new_index,
+    index_insert,
+    dedup_corpus,
+    IndexFullError,
+)
+from src.engine.canonical import LINE_ORDERS, apply_transform
+import pytest
+
+puzzle1 = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+puzzle2 = load_puzzle("tests/test_puzzles/easy/easy_01.txt")
+
+
+def copy_of(puzzle, k):
+    """
+    An equivalent copy of a puzzle (transposed, permuted and relabelled)
+    """
+    relabel = np.concatenate([[0], np.roll(np.arange(1, 10), k)])
+    transform = (k % 2 == 1, LINE_ORDERS[37 * k], LINE_ORDERS[101 * k], relabel)
+    return apply_transform(puzzle, transform)
+
+
+def test_fingerprint():
+    """
+    Test that fingerprints are shared by equivalent puzzles only
+    """
+    assert fingerprint(puzzle1) == fingerprint(copy_of(puzzle1, 3))
+    assert fingerprint(puzzle1) != fingerprint(puzzle2)
+    assert 0 < fingerprint(puzzle1) < 2**64
+
+
+def test_index():
+    """
+    Test the hash index, including collisions
+    """
+    index = new_index(8)
+    assert index_insert(index, 5, 0) == 0
+    assert index_insert(index, 13, 1) == 1  # same slot as 5
+    assert index_insert(index, 2**64 - 3, 2) == 2  # same slot as 5 and 13
+    assert index_insert(index, 13, 3) == 1
+    assert index_insert(index, 2**64 - 3, 3) == 2
+    assert np.count_nonzero(index[0]) == 3
+
+    with pytest.raises(AssertionError):
+        new_index(12)
+
+
+def test_dedup_corpus():
+    """
+    Test deduplicating a corpus, with the function and the script
+    """
+    corpus_path = "tests/test_puzzles/dedup_test.sdkc"
+    output_path = "tests/test_puzzles/dedup_test_output.sdkc"
+    mapping_path = "tests/test_puzzles/dedup_test_mapping.txt"
+
+    puzzles = [puzzle1, copy_of(puzzle1, 1), puzzle2, copy_of(puzzle1, 2)]
+    puzzles += [copy_of(puzzle2, 5), puzzle2]
+    write_corpus(corpus_path, np.array(puzzles))
+
+    for workers in [1, 2]:
+        assert dedup_corpus(
+            corpus_path, output_path, mapping_path, workers=workers, chunk_size=4
+        ) == (6, 2)
+
+        representatives = unpack_puzzles(read_corpus(output_path))
+        assert np.array_equal(representatives, [puzzle1, puzzle2])
+        with open(mapping_path, "r") as file:
+            assert file.read().split() == ["0", "0", "1", "0", "1", "1"]
+
+    # the index is full: the previous output is left untouched, and no files are added
+    with open(mapping_path, "r") as file:
+        mapping = file.read()
+    with pytest.raises(IndexFullError):
+        dedup_corpus(corpus_path, output_path, mapping_path, capacity=2)
+    with open(mapping_path, "r") as file:
+        assert file.read() == mapping
+    assert np.array_equal(unpack_puzzles(read_corpus(output_path)), [puzzle1, puzzle2])
+    assert not os.path.exists(output_path + ".tmp")
+    assert not os.path.exists(mapping_path + ".tmp")
+
+    for path in [output_path, mapping_path]:
+        os.remove(path)
+    result = subprocess.run(
+        ["python", "dedup_corpus.py", corpus_path, output_path, mapping_path]
+        + ["--capacity", "2"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0 and "Traceback" not in result.stderr
+    assert "try a larger --capacity" in result.stderr
+    assert not os.path.exists(output_path) and not os.path.exists(mapping_path)
+
+    result = subprocess.run(
+        ["python", "dedup_corpus.py", corpus_path, output_path, mapping_path],
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.startswith("6 Puzzle(s) in 2 Class(es) Found")
+
+    for path in [corpus_path, output_path, mapping_path]:
+        os.remove(path)
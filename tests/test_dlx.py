@@ -0,0 +1,91 @@
+"""
+Robust testing for the Dancing Links exact cover solver (engine/dlx.py)
+"""
+
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution, validate_filled
+from src.engine.basics import init_candidates
+from src.engine.elimination import all_elimination
+from src.engine.bitmask import init_masks
+from src.engine.dlx import (
+    matrix_row,
+    build_links,
+    cover,
+    uncover,
+    iterate,
+    dlx_solver,
+    iter_dlx_solutions,
+)
+
+
+def test_links():
+    """
+    Test building the exact cover matrix, and covering/uncovering columns
+    """
+    # every placement covers one column in each group of 81 columns
+    assert matrix_row(0, 0, 1) == [1, 82, 163, 244]
+    assert matrix_row(8, 8, 9) == [81, 162, 243, 324]
+
+    # empty puzzle: all 729 rows, each column has 9 nodes
+    links = build_links(init_candidates(np.zeros((9, 9), dtype=int)))
+    L, R, U, D, C, S, P = links
+    assert len(L) == 325 + 4 * 729
+    assert all(size == 9 for size in S[1:])
+
+    # covering then uncovering a column restores every link
+    before = [list(x) for x in links[:6]]
+    cover(links, 1)
+    assert R[0] == 2 and all(S[col] == 8 for col in matrix_row(0, 0, 1)[1:])
+    uncover(links, 1)
+    assert [list(x) for x in links[:6]] == before
+
+
+def test_dlx_solver():
+    """
+    Test dlx_solver on single, multiple and no solutions
+    """
+    for file in ["easy/easy_01.txt", "hard/hard_01.txt", "hardest/hardest_01.txt"]:
+        puzzle = load_puzzle("tests/test_puzzles/" + file)
+        solution = dlx_solver(puzzle)
+        assert validate_solution(puzzle, solution) == "Valid"
+
+        # seeding with a reduced candidates grid (sets or masks)
+        candidates = all_elimination(init_candidates(puzzle))
+        solution = dlx_solver(puzzle, candidates)
+        assert validate_solution(puzzle, solution) == "Valid"
+        solution = dlx_solver(puzzle, init_masks(puzzle))
+        assert validate_solution(puzzle, solution) == "Valid"
+
+    # all 10 solutions are found (and no more)
+    puzzle = load_puzzle("tests/test_puzzles/10_solutions.txt")
+    solutions = dlx_solver(puzzle, num_solutions=20)
+    assert isinstance(solutions, list) and len(solutions) == 10
+    assert len(set(tuple(s.flatten()) for s in solutions)) == 10
+    assert all(validate_solution(puzzle, s) == "Valid" for s in solutions)
+
+    # multiple full boards from an empty puzzle
+    solutions = dlx_solver(np.zeros((9, 9), dtype=int), num_solutions=3)
+    assert all(validate_filled(s) == "Valid" for s in solutions)
+
+    for file in ["01.txt", "02.txt", "03.txt"]:
+        puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_" + file)
+        assert dlx_solver(puzzle) == "UNSOLVABLE"
+
+
+def test_iter_dlx_solutions():
+    """
+    Test generating solutions lazily, and closing the generator early
+    """
+    puzzle = load_puzzle("tests/test_puzzles/10_solutions.txt")
+    solutions = list(iter_dlx_solutions(puzzle))
+    assert len(solutions) == 10
+    assert all(validate_solution(puzzle, s) == "Valid" for s in solutions)
+
+    # closing the generator leaves the links as they were found
+    links = build_links(init_candidates(puzzle))
+    original = [list(link) for link in links]
+    generator = iterate(links, [])
+    next(generator)
+    generator.close()
+    assert [list(link) for link in links] == original
@@ -11,8 +11,15 @@ from src.engine.elimination import (
     hidden_singles_elimination,
     obvious_pairs_elimination,
     pointing_elimination,
+    unit_elimination,
+    grid_elimination,
     all_elimination,
+    TECHNIQUES,
+    EXTRA_TECHNIQUES,
 )
+from src.engine.backtracking import backtracker
+from src.engine.scheduling import new_scheduler
+import pytest
 
 
 def test_naked_singles():
@@ -176,3 +183,171 @@ def test_all_elimination():
     candidates = init_candidates(puzzle)
     candidates = all_elimination(candidates)
     assert not solvable(candidates)
+
+
+def test_unit_elimination():
+    """
+    Test unit_elimination, applying the techniques within a single unit
+    """
+    candidates = init_candidates(np.zeros((9, 9), dtype=int))
+    cells = list(candidates.flat)
+
+    # naked single 3 at (0, 0): only removed from the first row (unit 0)
+    cells[0].intersection_update({3})
+    changed = unit_elimination(cells, 0)
+    assert sorted(changed) == list(range(1, 9))
+    assert all(3 not in cells[s] for s in range(1, 9))
+    assert all(3 in cells[9 * r] for r in range(1, 9))
+
+    # in the first block (unit 18), 5 is confined to the first column
+    for s in [1, 2, 10, 11, 19, 20]:
+        cells[s].discard(5)
+    unit_elimination(cells, 18)
+    assert all(5 not in cells[9 * r] for r in range(3, 9))
+    assert all(5 in cells[9 * r + 1] for r in range(3, 9))
+
+
+def test_all_elimination_squares():
+    """
+    Test all_elimination only propagating from the given squares
+    """
+    puzzle = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+    candidates = all_elimination(init_candidates(puzzle))
+
+    # choosing a candidate of a square, then propagating from that square only,
+    # must give the same grid as propagating from every unit
+    i, j = next((i, j) for i in range(9) for j in range(9) if len(candidates[i, j]) > 1)
+    candidates[i, j] = {min(candidates[i, j])}
+    before = [set(cell) for cell in candidates.flat]
+    partial = all_elimination(candidates, squares=[9 * i + j])
+    full = all_elimination(candidates)
+    assert np.array_equal(partial, full)
+
+    # the input grid is not modified
+    assert list(candidates.flat) == before
+    assert not np.array_equal(partial, candidates)
+
+
+def test_all_elimination_techniques():
+    """
+    Test all_elimination with a selection of the techniques
+    """
+    puzzle = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+    candidates = init_candidates(puzzle)
+
+    def count(grid):
+        return sum(len(cell) for cell in grid.flat)
+
+    # more techniques eliminate more candidates, and all four solve this puzzle
+    counts = [
+        count(all_elimination(candidates, techniques=TECHNIQUES[:k])) for k in range(5)
+    ]
+    assert counts[0] == count(candidates)
+    assert all(a >= b for a, b in zip(counts, counts[1:]))
+    assert counts[3] > counts[4] == 81
+
+    with pytest.raises(AssertionError):
+        all_elimination(candidates, techniques=("unknown",))
+
+
+def empty_cells():
+    """
+    The candidate sets of an empty grid, as used by the techniques within units
+    """
+    return list(init_candidates(np.zeros((9, 9), dtype=int)).flat)
+
+
+def test_claiming_and_subsets():
+    """
+    Test the extra techniques within a unit: claiming, and naked and hidden subsets
+    """
+    # in the first row (unit 0), 5 is confined to the first block
+    cells = empty_cells()
+    for s in range(3, 9):
+        cells[s].discard(5)
+    assert unit_elimination(cells, 0) == []  # not with the four techniques
+    changed = unit_elimination(cells, 0, ("claiming",))
+    assert sorted(changed) == [9, 10, 11, 18, 19, 20]
+    assert all(5 not in cells[s] for s in changed)
+    assert all(5 in cells[s] for s in range(3))
+
+    # naked triple {1, 2, 3} in the first row
+    cells = empty_cells()
+    for s, numbers in zip(range(3), [{1, 2}, {2, 3}, {1, 3}]):
+        cells[s].intersection_update(numbers)
+    unit_elimination(cells, 0, ("naked_triples",))
+    assert all(cells[s] == set(range(4, 10)) for s in range(3, 9))
+    assert cells[9] == set(range(1, 10))  # other units are unchanged
+
+    # hidden quad {6, 7, 8, 9} in the first column (unit 9)
+    cells = empty_cells()
+    for s in range(36, 81, 9):
+        cells[s].difference_update({6, 7, 8, 9})
+    unit_elimination(cells, 9, ("hidden_triples",))
+    assert cells[0] == set(range(1, 10))  # not a triple
+    unit_elimination(cells, 9, ("hidden_quads",))
+    assert all(cells[s] == {6, 7, 8, 9} for s in range(0, 36, 9))
+
+
+def test_grid_techniques():
+    """
+    Test the extra techniques over the whole grid: X-Wing, Swordfish and XY-Wing
+    """
+    # X-Wing: in rows 0 and 4, 4 can only go in columns 1 and 6
+    cells = empty_cells()
+    for row in (0, 4):
+        for col in (0, 2, 3, 4, 5, 7, 8):
+            cells[9 * row + col].discard(4)
+    changed = grid_elimination(cells, ("x_wing",))
+    assert sorted(changed) == sorted(
+        9 * row + col for row in (1, 2, 3, 5, 6, 7, 8) for col in (1, 6)
+    )
+    assert all(4 in cells[9 * row + col] for row in (0, 4) for col in (1, 6))
+
+    # Swordfish: in columns 0, 3 and 6, 5 can only go in rows 1, 4 and 7
+    cells = empty_cells()
+    for col, rows in zip((0, 3, 6), ({1, 4}, {4, 7}, {1, 7})):
+        for row in set(range(9)) - rows:
+            cells[9 * row + col].discard(5)
+    assert grid_elimination(cells, ("x_wing",)) == []
+    changed = grid_elimination(cells, ("x_wing", "swordfish"))
+    assert len(changed) == 3 * 6
+    assert all(5 not in cells[9 * row + col] for row in (1, 4, 7) for col in (1, 8))
+
+    # XY-Wing: pivot {1, 2} at (0, 0), pincers {1, 3} at (0, 4) and {2, 3} at (2, 0)
+    cells = empty_cells()
+    for s, numbers in [(0, {1, 2}), (4, {1, 3}), (18, {2, 3})]:
+        cells[s].intersection_update(numbers)
+    changed = grid_elimination(cells, ("xy_wing",))
+    assert sorted(changed) == [1, 2, 21, 22, 23]
+    assert all(3 not in cells[s] for s in changed)
+
+
+def test_extra_techniques():
+    """
+    Test that the extra techniques never remove the solution, and remove more candidates
+    """
+    puzzle = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+    solution = backtracker(puzzle)
+    candidates = init_candidates(puzzle)
+    basic = all_elimination(candidates)
+
+    for extra in [(name,) for name in EXTRA_TECHNIQUES] + [EXTRA_TECHNIQUES]:
+        stats = {}
+        reduced = all_elimination(
+            candidates, techniques=TECHNIQUES + extra, stats=stats
+        )
+        assert all(n in cell for n, cell in zip(solution.flat, reduced.flat)), extra
+        assert all(cell <= other for cell, other in zip(reduced.flat, basic.flat))
+        assert set(extra) <= set(stats["calls"])
+
+    # all together, they make progress where the four techniques are stuck
+    assert sum(len(cell) for cell in reduced.flat) < sum(
+        len(cell) for cell in basic.flat
+    )
+
+    # the search with every technique finds the solution, with the sets method only
+    scheduler = new_scheduler("escalate", techniques=TECHNIQUES + EXTRA_TECHNIQUES)
+    assert np.array_equal(backtracker(puzzle, schedule=scheduler), solution)
+    with pytest.raises(AssertionError):
+        backtracker(puzzle, method="trail", schedule=scheduler)
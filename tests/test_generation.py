@@ -1,6 +1,23 @@
-from src.toolkit.generation import generate_singles
+import numpy as np
+import os
+import subprocess
+from src.toolkit.input import load_puzzle, parse_line
+from src.toolkit.generation import (
+    generate_singles,
+    unit_masks,
+    fills_by_singles,
+    difficulty,
+    dig,
+    iter_generate,
+    generate_puzzle,
+    generate_grid,
+    DIFFICULTIES,
+)
 from src.toolkit.validation import validate_solution
 from src.engine.basics import singles_filler
+from src.engine.backtracking import backtracker, count_solutions
+from src.engine.grids import count_grid_solutions
+import pytest
 
 
 def test_generate_singles():
@@ -17,3 +34,148 @@ def test_generate_singles():
     assert (
         validate_solution(puzzle, solution) == "Valid"
     ), "Solution not found by 'singles_filler'"
+
+
+def test_fills_by_singles():
+    """
+    Test unit_masks and fills_by_singles against singles_filler
+    """
+    puzzle = load_puzzle("tests/test_puzzles/singles_only/01.txt")
+    values = puzzle.flatten().tolist()
+    used = unit_masks(values)
+
+    # masks of the first row, column and block
+    assert used[0] == sum(1 << (n - 1) for n in puzzle[0] if n)
+    assert used[9] == sum(1 << (n - 1) for n in puzzle[:, 0] if n)
+    assert used[18] == sum(1 << (n - 1) for n in puzzle[:3, :3].flatten() if n)
+
+    # every empty square is filled by naked singles
+    empty = [s for s in range(81) if not values[s]]
+    assert all(fills_by_singles(values, used, s) for s in empty)
+    assert values == puzzle.flatten().tolist()  # not modified
+
+    # agrees with singles_filler on a hard puzzle (where singles run out)
+    puzzle = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+    filled = singles_filler(puzzle)
+    values = puzzle.flatten().tolist()
+    used = unit_masks(values)
+    solution = backtracker(puzzle)
+    assert np.all((filled == 0) | (filled == solution))
+    for s in range(81):
+        if not values[s]:
+            assert fills_by_singles(values, used, s) == bool(filled.flat[s])
+
+
+def test_difficulty():
+    """
+    Test the difficulty classes of puzzles
+    """
+    for filepath, expected in [
+        ("tests/test_puzzles/singles_only/01.txt", "singles"),
+        ("tests/test_puzzles/easy/easy_01.txt", "singles"),
+        ("tests/test_puzzles/easy/easy_02.txt", "hidden_singles"),
+        ("tests/test_puzzles/hard/hard_01.txt", "pointing"),
+        ("tests/test_puzzles/hardest/hardest_02.txt", "backtracking"),
+    ]:
+        assert difficulty(load_puzzle(filepath)) == expected, filepath
+
+
+def test_dig():
+    """
+    Test digging clues from a full board
+    """
+    solution = backtracker(np.zeros((9, 9), dtype=int), method="trail")
+    rng = np.random.default_rng(0)
+
+    puzzle = dig(solution, "hidden_singles", rng=rng)
+    if puzzle is not None:
+        assert difficulty(puzzle) == "hidden_singles"
+        assert np.all((puzzle == 0) | (puzzle == solution))
+
+    # digging stops at the minimum number of clues
+    puzzle = dig(solution, "backtracking", min_clues=60, rng=rng)
+    assert puzzle is None or np.sum(puzzle > 0) == 60
+
+    # too many clues are rejected
+    assert dig(solution, "singles", max_clues=17, rng=rng) is None
+
+    with pytest.raises(AssertionError):
+        dig(solution, "unknown")
+
+
+def test_iter_generate():
+    """
+    Test generating puzzles with each difficulty, on one or more workers
+    """
+    for target in DIFFICULTIES[:2] + DIFFICULTIES[-1:]:
+        puzzles = list(iter_generate(2, target, max_clues=30, workers=1, seed=0))
+        assert len(puzzles) == 2
+        for puzzle in puzzles:
+            assert difficulty(puzzle) == target
+            assert count_solutions(puzzle) == 1
+            assert 17 <= np.sum(puzzle > 0) <= 30
+
+    # workers give different puzzles, reproducibly
+    puzzles = list(iter_generate(4, workers=2, seed=1))
+    assert len({tuple(p.flatten()) for p in puzzles}) == 4
+    again = list(iter_generate(4, workers=2, seed=1))
+    assert {tuple(p.flatten()) for p in puzzles} == {tuple(p.flatten()) for p in again}
+
+    # script streams the puzzles to a file
+    output = "tests/test_puzzles/generate_test.txt"
+    result = subprocess.run(
+        ["python", "generate_puzzles.py", output, "3", "--workers", "2", "--seed", "2"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.startswith("3 Puzzle(s) Generated")
+    with open(output, "r") as file:
+        lines = file.read().splitlines()
+    assert len(lines) == 3
+    assert all(difficulty(parse_line(line)) == "singles" for line in lines)
+    os.remove(output)
+
+
+def test_unreachable_target():
+    """
+    Test that generating a puzzle gives up on requirements which cannot be met
+    """
+    rng = np.random.default_rng(0)
+    assert generate_puzzle("backtracking", 60, 81, rng, max_attempts=3) is None
+    assert generate_puzzle("singles", 40, 81, rng, max_attempts=3) is not None
+
+    puzzles = list(iter_generate(2, "backtracking", 60, workers=1, max_attempts=2))
+    assert puzzles == [None, None]
+
+    # script stops and reports the target
+    output = "tests/test_puzzles/generate_test.txt"
+    result = subprocess.run(
+        ["python", "generate_puzzles.py", output, "5", "--difficulty", "backtracking"]
+        + ["--min-clues", "60", "--max-attempts", "2", "--workers", "1"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert result.stderr.startswith("No backtracking puzzle with 60-81 clues")
+    os.remove(output)
+
+
+def test_generate_grid():
+    """
+    Test generating puzzles of other sizes, with or without a unique solution
+    """
+    rng = np.random.default_rng(0)
+    puzzle = generate_grid(4, 120, rng=rng)
+    assert puzzle.shape == (16, 16) and np.sum(puzzle > 0) == 120
+    assert count_grid_solutions(puzzle, 1) == 1
+
+    # with a unique solution, some clues may be kept
+    puzzle = generate_grid(2, 0, unique=True, rng=rng)
+    assert np.sum(puzzle > 0) >= 4
+    assert count_grid_solutions(puzzle) == 1
+
+    puzzle = generate_grid(3, 30, unique=True, rng=rng)
+    assert np.sum(puzzle > 0) >= 30 and count_solutions(puzzle) == 1
+
+    with pytest.raises(AssertionError):
+        generate_grid(6, 10)
@@ -0,0 +1,146 @@
+"""
+Robust testing for engine/grids.py, the solver for grids of any size
+"""
+
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_puzzle, validate_solution, validate_filled
+from src.engine.backtracking import backtracker
+from src.engine.grids import (
+    box_size,
+    init_masks,
+    masks_to_puzzle,
+    propagate,
+    intersection_removal,
+    setup,
+    iter_grid_solutions,
+    solve_grid,
+    count_grid_solutions,
+    sample_grid,
+    BOX_SIZES,
+)
+from src.engine.tables import grid_tables
+import pytest
+
+puzzle_16 = load_puzzle("tests/test_puzzles/sizes/16x16_01.txt")
+puzzle_25 = load_puzzle("tests/test_puzzles/sizes/25x25_01.txt")
+
+
+def test_sample_grid():
+    """
+    Test that the sampled grids are complete and valid, for every box size
+    """
+    rng = np.random.default_rng(0)
+    for box in BOX_SIZES:
+        grid = sample_grid(box, rng)
+        assert grid.shape == (box * box, box * box) and box_size(grid) == box
+        assert validate_filled(grid) == "Valid"
+
+    # different grids are sampled
+    assert not np.array_equal(sample_grid(4, rng), sample_grid(4, rng))
+
+    with pytest.raises(AssertionError):
+        sample_grid(6)
+
+
+def test_masks():
+    """
+    Test initialising the masks grid, and converting it back to a puzzle
+    """
+    masks = init_masks(puzzle_16)
+    assert len(masks) == 256
+    given = puzzle_16 > 0
+    assert np.array_equal(masks_to_puzzle(masks)[given], puzzle_16[given])
+    grid = sample_grid(4, np.random.default_rng(2))
+    assert np.array_equal(masks_to_puzzle(init_masks(grid)), grid)
+
+    # the first square is empty, and its candidates are not in its row, column or block
+    tables = grid_tables(4)
+    given = {puzzle_16.flat[p] for p in tables["PEERS"][0]} - {0}
+    assert {n + 1 for n in range(16) if masks[0] >> n & 1} == set(range(1, 17)) - given
+
+
+def test_propagate():
+    """
+    Test that propagation only removes candidates, and fails on contradictions
+    """
+    masks = init_masks(puzzle_16)
+    tables = grid_tables(4)
+    before = list(masks)
+    trail = []
+    singles = [s for s, mask in enumerate(masks) if mask & (mask - 1) == 0]
+    assert propagate(masks, trail, tables, singles, set(range(48)))
+    assert all(mask & old == mask for mask, old in zip(masks, before))
+
+    # the trail restores the grid
+    for square, mask in reversed(trail):
+        masks[square] = mask
+    assert masks == before
+
+    # two equal values in a row
+    puzzle = sample_grid(2, np.random.default_rng(1))
+    puzzle[0, 1] = 0
+    puzzle[0, 0] = puzzle[0, 2]
+    assert setup(puzzle) is None
+
+
+def test_intersection_removal():
+    """
+    Test Pointing and Claiming on an intersection of a row and a block
+    """
+    tables = grid_tables(2)
+    full = 0b1111
+    masks = [full] * 16
+
+    # 1 has no place in the rest of the first block, so it is removed from the rest of row 0
+    for s in (4, 5):
+        masks[s] = 0b1110
+    assert intersection_removal(masks, [], tables, [], set())
+    assert masks[2] & 1 == masks[3] & 1 == 0
+    assert masks[0] & 1 and masks[1] & 1
+
+
+def test_solve_grid():
+    """
+    Test solving puzzles of every size
+    """
+    for filepath in (
+        "tests/test_puzzles/hard/hard_01.txt",
+        "tests/test_puzzles/hardest/hardest_02.txt",
+    ):
+        puzzle = load_puzzle(filepath)
+        stats = {}
+        solution = solve_grid(puzzle, stats=stats)
+        assert np.array_equal(solution, backtracker(puzzle))
+        assert stats["nodes"] >= 1
+
+    for puzzle in (puzzle_16, puzzle_25):
+        assert validate_puzzle(puzzle) == "Valid"
+        solution = solve_grid(puzzle)
+        assert validate_solution(puzzle, solution) == "Valid"
+
+    # a puzzle given twice the same number in a row has no solutions
+    puzzle = puzzle_16.copy()
+    puzzle[0, 0] = 10
+    assert solve_grid(puzzle) == "UNSOLVABLE"
+
+
+def test_multiple_grid_solutions():
+    """
+    Test finding and counting several solutions
+    """
+    empty = np.zeros((4, 4), dtype=int)
+    assert count_grid_solutions(empty, 1000) == 288  # number of 4x4 grids
+    assert count_grid_solutions(puzzle_16, 5) == 1
+
+    solutions = solve_grid(empty, 3)
+    assert len({tuple(s.flatten()) for s in solutions}) == 3
+    assert all(validate_filled(s) == "Valid" for s in solutions)
+
+    # the generator can be closed before the search ends
+    generator = iter_grid_solutions(empty)
+    next(generator)
+    generator.close()
+
+    with pytest.raises(AssertionError):
+        solve_grid(empty, 0)
@@ -0,0 +1,95 @@
+"""
+Robust testing for engine/instrumentation.py, and the stats collected by the solvers
+"""
+
+import json
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.engine.basics import init_candidates
+from src.engine.elimination import all_elimination, TECHNIQUES
+from src.engine import bitmask, trail
+from src.engine.backtracking import backtracker, count_solutions
+from src.engine.instrumentation import init_stats, merge_stats, format_stats
+import pytest
+
+puzzle = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+puzzle_hard = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+
+
+def test_elimination_stats():
+    """
+    Test that the candidates removed by each technique add up, for every representation
+    """
+    candidates = init_candidates(puzzle)
+    initial = sum(len(cell) for cell in candidates.flat)
+
+    # candidates grid of sets
+    stats = {}
+    reduced = all_elimination(candidates, stats=stats)
+    assert sum(stats["removed"].values()) == initial - sum(len(c) for c in reduced.flat)
+    assert stats["iterations"] >= 27
+    assert all(stats["calls"][name] >= 1 for name in TECHNIQUES)
+
+    # masks grid
+    stats = {}
+    masks = bitmask.all_elimination(bitmask.init_masks(puzzle), stats)
+    assert sum(stats["removed"].values()) == initial - 81
+    assert np.array_equal(bitmask.masks_to_candidates(masks), reduced)
+
+    # masks grid with an undo trail
+    stats = {}
+    masks = trail.init_places(bitmask.init_masks(puzzle).tolist())
+    assert trail.propagate(masks, [], stats=stats)
+    assert sum(stats["removed"].values()) == initial - 81
+    assert all(seconds >= 0 for seconds in stats["seconds"].values())
+
+
+@pytest.mark.parametrize("method", ["sets", "bitmask", "trail"])
+def test_search_stats(method):
+    """
+    Test the search counts, and that collecting stats does not change the solution
+    """
+    stats = {}
+    solution = backtracker(puzzle_hard, method=method, stats=stats)
+    assert np.array_equal(solution, backtracker(puzzle_hard, method=method))
+
+    assert stats["nodes"] >= 1
+    assert stats["backtracks"] >= 1  # the puzzle needs backtracking
+    assert 1 <= stats["max_depth"] < stats["nodes"] + stats["backtracks"]
+
+    # search counts are reset by each search, elimination counts are added to
+    calls = sum(stats["calls"].values())
+    backtracker(puzzle_hard, method=method, stats=stats)
+    assert sum(stats["calls"].values()) > calls
+    assert stats["max_depth"] <= 81
+
+
+def test_count_stats():
+    """
+    Test the search counts of counting solutions are repeatable
+    """
+    stats, stats_again = {}, {}
+    assert count_solutions(puzzle_hard, stats=stats) == 1
+    assert count_solutions(puzzle_hard, stats=stats_again) == 1
+    for name in ("nodes", "backtracks", "max_depth", "iterations"):
+        assert stats[name] == stats_again[name], name
+    assert stats["removed"] == stats_again["removed"]
+
+
+def test_merge_and_format():
+    """
+    Test merging stats, and formatting them as text and JSON
+    """
+    first = init_stats({"nodes": 3, "max_depth": 2})
+    second = init_stats({"nodes": 4, "max_depth": 5, "backtracks": 1})
+    second["removed"]["pointing"] = 7
+
+    total = merge_stats(merge_stats({}, first), second, depth=2)
+    assert total["nodes"] == 7 and total["backtracks"] == 1
+    assert total["max_depth"] == 7
+    assert total["removed"]["pointing"] == 7
+
+    assert json.loads(format_stats(total, "json")) == total
+    text = format_stats(total)
+    assert "Search nodes: 7" in text
+    assert all(name in text for name in TECHNIQUES)
@@ -4,8 +4,20 @@ Robust testing for toolkit/input.py and toolkit/output.py
 
 import numpy as np
 import os
-from src.toolkit.input import load_puzzle, parse_sudoku_string
-from src.toolkit.output import save_puzzle, puzzle_to_string
+from src.toolkit.input import (
+    load_puzzle,
+    parse_sudoku_string,
+    parse_line,
+    parse_tokens,
+    parse_token_line,
+)
+from src.toolkit.output import (
+    save_puzzle,
+    puzzle_to_string,
+    puzzle_to_line,
+    puzzle_to_tokens,
+    puzzle_to_token_line,
+)
 import pytest
 
 
@@ -111,6 +123,23 @@ def test_puzzle_to_string():
     assert puzzle_to_string(puzzle) == content
 
 
+def test_parse_line():
+    """
+    Test parse_line and puzzle_to_line
+    """
+    puzzle = load_puzzle("tests/test_puzzles/easy/easy_01.txt")
+    line = "003020600900305001001806400008102900700000008006708200002609500800203009005010300"
+
+    assert puzzle_to_line(puzzle) == line
+    assert np.array_equal(parse_line(line + "\n"), puzzle)
+    assert np.array_equal(parse_line(line.replace("0", ".")), puzzle)
+
+    # invalid formats return an error message
+    assert isinstance(parse_line(line[:-1]), str)
+    assert isinstance(parse_line(line + "0"), str)
+    assert isinstance(parse_line(line[:-1] + "x"), str)
+
+
 def test_save_puzzle():
     """
     Test save_puzzle
@@ -155,3 +184,47 @@ def test_save_puzzle():
     # should raise an error when attempting to save an invalid puzzle
     with pytest.raises(AssertionError):
         save_puzzle(valid_savepath, invalid_puzzle)
+
+
+def test_parse_tokens():
+    """
+    Test parse_tokens and puzzle_to_tokens, on puzzles of several sizes
+    """
+    filepath = "tests/test_puzzles/sizes/16x16_01.txt"
+    puzzle = load_puzzle(filepath)
+    assert puzzle.shape == (16, 16) and puzzle[0, 8] == 10 and puzzle[0, 0] == 0
+
+    with open(filepath, "r") as file:
+        content = file.read()
+    assert puzzle_to_string(puzzle) == puzzle_to_tokens(puzzle) == content
+    assert np.array_equal(parse_tokens(content), puzzle)
+
+    # 9x9 puzzles can be written as tokens too
+    puzzle = load_puzzle("tests/test_puzzles/easy/easy_01.txt")
+    assert np.array_equal(parse_tokens(puzzle_to_tokens(puzzle)), puzzle)
+
+    # tokens separated by commas, with '0' or '.' for empty squares
+    text = "1, ., 3, 4\n3, 4, 1, 0\n\n--+--\n2, 1, 4, 3\n4, 3, 2, 1\n"
+    assert parse_tokens(text)[1, 3] == 0 and parse_tokens(text)[0, 1] == 0
+
+    # invalid formats return an error message
+    assert isinstance(parse_tokens("1 2\n2 1"), str)  # 2x2
+    assert isinstance(parse_tokens(text.replace("4, 3, 2, 1", "4, 3, 2")), str)
+    assert isinstance(parse_tokens(text.replace("2, 1, 4", "2, x, 4")), str)
+
+
+def test_parse_token_line():
+    """
+    Test parse_token_line and puzzle_to_token_line
+    """
+    puzzle = load_puzzle("tests/test_puzzles/sizes/25x25_01.txt")
+    assert puzzle.shape == (25, 25)
+
+    line = puzzle_to_token_line(puzzle)
+    assert len(line.split()) == 625
+    assert np.array_equal(parse_token_line(line + "\n"), puzzle)
+    assert np.array_equal(parse_token_line(line.replace(" ", ",")), puzzle)
+
+    # invalid formats return an error message
+    assert isinstance(parse_token_line(line + " 0"), str)
+    assert isinstance(parse_token_line(line.replace("0", "x")), str)
@@ -0,0 +1,102 @@
+"""
+Robust testing for solving on multiple cores (engine/parallel.py)
+"""
+
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution
+from src.engine.backtracking import backtracker
+from src.engine.bitmask import init_masks, all_elimination, filler
+from src.engine.parallel import split, search_subproblem, parallel_search, solve_many
+
+puzzle_hard = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+puzzle_many = load_puzzle("tests/test_puzzles/10_solutions.txt")
+
+
+def test_split():
+    """
+    Test splitting a search tree into subproblems
+    """
+    masks = all_elimination(init_masks(puzzle_many))
+    subproblems, solved = split(masks, 6)
+    assert len(subproblems) + len(solved) >= 1
+
+    for assignment, node in subproblems:
+        # the choices made are reflected in the masks grid of the subproblem
+        assert all(node[square] == 1 << (n - 1) for square, n in assignment)
+        assert all(node)
+
+    # the subproblems cover every solution between them
+    found = []
+    for _, node in subproblems:
+        found += search_subproblem(
+            (puzzle_many, node, 10, "trail", "first", False, None)
+        )[0]
+    found += [filler(puzzle_many, node) for node in solved]
+    assert len({tuple(s.flatten()) for s in found}) == 10
+
+
+def test_parallel_search():
+    """
+    Test the parallel search, for one and multiple solutions
+    """
+    for method in ["sets", "bitmask", "trail"]:
+        stats = {}
+        solutions = parallel_search(puzzle_hard, method=method, workers=2, stats=stats)
+        assert len(solutions) == 1 and stats["nodes"] >= 1
+        assert validate_solution(puzzle_hard, solutions[0]) == "Valid"
+
+    solutions = parallel_search(puzzle_many, num_solutions=4, workers=2)
+    assert len(solutions) == 4
+    assert len({tuple(s.flatten()) for s in solutions}) == 4
+
+    # the empty puzzle has too many solutions to find them all
+    solutions = parallel_search(np.zeros((9, 9), dtype=int), num_solutions=20)
+    assert len({tuple(s.flatten()) for s in solutions}) == 20
+
+    puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+    assert parallel_search(puzzle, workers=2) == []
+
+
+def test_parallel_backtracker():
+    """
+    Test backtracking with multiple workers
+    """
+    solution = backtracker(puzzle_hard, method="trail", workers=2)
+    assert validate_solution(puzzle_hard, solution) == "Valid"
+
+    solutions = backtracker(puzzle_many, num_solutions=10, workers=3)
+    assert len(solutions) == 10
+    assert all(validate_solution(puzzle_many, s) == "Valid" for s in solutions)
+
+    puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_02.txt")
+    assert backtracker(puzzle, workers=2) == "UNSOLVABLE"
+
+
+def test_solve_many():
+    """
+    Test solving many puzzles, in order and as they complete
+    """
+    puzzle_unsolvable = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+    puzzles = [puzzle_hard, puzzle_unsolvable, puzzle_many] * 5
+
+    for workers, ordered in [(1, True), (2, True), (2, False)]:
+        results = list(solve_many(puzzles, workers, chunksize=2, ordered=ordered))
+        assert len(results) == len(puzzles)
+
+        indices = [index for index, _, _ in results]
+        if ordered:
+            assert indices == list(range(len(puzzles)))
+        else:
+            assert sorted(indices) == list(range(len(puzzles)))
+
+        for index, solution, seconds in results:
+            assert seconds >= 0
+            if index % 3 == 1:
+                assert isinstance(solution, str) and solution == "UNSOLVABLE"
+            else:
+                assert validate_solution(puzzles[index], solution) == "Valid"
+
+    # an (N, 9, 9) array of puzzles
+    results = list(solve_many(np.array(puzzles[:3]), workers=2))
+    assert [index for index, _, _ in results] == [0, 1, 2]
@@ -0,0 +1,80 @@
+"""
+Robust testing for engine/rating.py
+"""
+
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.engine.rating import rate, rate_many, DIFFICULTIES
+from src.engine.elimination import TECHNIQUES
+from src.engine.basics import init_candidates
+import pytest
+
+easy = load_puzzle("tests/test_puzzles/easy/easy_02.txt")
+hard = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+hardest = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+unsolvable = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+
+
+def test_rate_classes():
+    """
+    Test the difficulty class, status and rating of puzzles of each kind
+    """
+    for filepath, expected, status in [
+        ("tests/test_puzzles/singles_only/01.txt", "singles", "solved"),
+        ("tests/test_puzzles/easy/easy_01.txt", "singles", "solved"),
+        ("tests/test_puzzles/easy/easy_02.txt", "hidden_singles", "solved"),
+        ("tests/test_puzzles/hard/hard_01.txt", "pointing", "solved"),
+        ("tests/test_puzzles/hardest/hardest_02.txt", "backtracking", "stuck"),
+        (
+            "tests/test_puzzles/unsolvable/unsolvable_01.txt",
+            "backtracking",
+            "unsolvable",
+        ),
+    ]:
+        rating = rate(load_puzzle(filepath))
+        assert rating["difficulty"] == expected, filepath
+        assert rating["status"] == status, filepath
+
+        # the integer part of the rating gives the class
+        assert int(rating["rating"]) == DIFFICULTIES.index(expected) + 1, filepath
+
+
+def test_rate_trace():
+    """
+    Test that the trace is consistent with its summary, and removes every extra candidate
+    """
+    rating = rate(hard)
+    assert rating["steps"]
+    assert set(rating["fired"]) == set(TECHNIQUES) == set(rating["removed"])
+
+    for name in TECHNIQUES:
+        steps = [removed for technique, removed in rating["steps"] if technique == name]
+        assert rating["fired"][name] == len(steps)
+        assert rating["removed"][name] == sum(steps)
+        assert all(removed > 0 for removed in steps)
+
+    # the puzzle is solved, so every candidate but the solution was removed
+    initial = sum(len(cell) for cell in init_candidates(hard).flat)
+    assert sum(rating["removed"].values()) == initial - 81
+
+
+def test_rate_order():
+    """
+    Test that ratings order puzzles by difficulty class
+    """
+    ratings = [rate(puzzle)["rating"] for puzzle in (easy, hard, hardest)]
+    assert ratings == sorted(ratings)
+    assert 1 <= ratings[0] and ratings[-1] < 6
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rate_many(workers):
+    """
+    Test rating many puzzles, in order, in this process or on a pool
+    """
+    puzzles = np.stack([easy, hard, hardest, unsolvable] * 5)
+    results = list(rate_many(puzzles, workers=workers, chunksize=3))
+
+    assert [index for index, _ in results] == list(range(len(puzzles)))
+    for (index, rating), puzzle in zip(results, puzzles):
+        assert rating == rate(puzzle)
@@ -0,0 +1,67 @@
+"""
+Robust testing for the random grid samplers (engine/sampler.py)
+"""
+
+import random
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_filled, validate_solution
+from src.engine.sampler import random_grid, random_grids, transform_grids, sample_grids
+import pytest
+
+
+def test_random_grid():
+    """
+    Test sampling complete grids by randomised search
+    """
+    rand = random.Random(0)
+    grids = random_grids(20, rand)
+    assert grids.shape == (20, 9, 9)
+    assert all(validate_filled(grid) == "Valid" for grid in grids)
+    assert len({tuple(grid.flatten()) for grid in grids}) == 20
+
+    # same seed, same grids
+    assert np.array_equal(
+        random_grids(3, random.Random(1)), random_grids(3, random.Random(1))
+    )
+
+    # completing a puzzle
+    puzzle = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+    assert validate_solution(puzzle, random_grid(puzzle, rand)) == "Valid"
+
+    # unsolvable puzzles
+    puzzle = np.zeros((9, 9), dtype=int)
+    puzzle[0, 0] = puzzle[0, 8] = 5
+    assert random_grid(puzzle, rand) is None
+    puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+    assert random_grid(puzzle, rand) is None
+
+
+def test_transform_grids():
+    """
+    Test sampling complete grids by transforming a pool of grids
+    """
+    pool = random_grids(2, random.Random(2))
+    grids = transform_grids(pool, 200, np.random.default_rng(0))
+    assert grids.shape == (200, 9, 9)
+    assert all(validate_filled(grid) == "Valid" for grid in grids)
+    assert len({tuple(grid.flatten()) for grid in grids}) == 200
+
+    # the pool is not modified
+    assert all(validate_filled(grid) == "Valid" for grid in pool)
+
+
+def test_sample_grids():
+    """
+    Test the generator of complete grids, in both modes
+    """
+    for mode in ["search", "transform"]:
+        chunks = list(sample_grids(10, mode, pool_size=4, seed=0, chunk_size=4))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+        assert all(validate_filled(grid) == "Valid" for grid in np.concatenate(chunks))
+
+        again = list(sample_grids(10, mode, pool_size=4, seed=0, chunk_size=4))
+        assert np.array_equal(np.concatenate(chunks), np.concatenate(again))
+
+    with pytest.raises(AssertionError):
+        next(sample_grids(1, "unknown"))
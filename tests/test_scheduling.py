@@ -0,0 +1,124 @@
+"""
+Robust testing for engine/scheduling.py, and the scheduled elimination of the solvers
+"""
+
+import numpy as np
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution
+from src.engine.basics import init_candidates
+from src.engine.elimination import all_elimination, TECHNIQUES
+from src.engine import bitmask, trail
+from src.engine.backtracking import backtracker
+from src.engine.scheduling import (
+    new_scheduler,
+    schedule_techniques,
+    POLICIES,
+    SINGLES,
+    WARMUP_CALLS,
+    PROBE_INTERVAL,
+)
+import pytest
+
+puzzle = load_puzzle("tests/test_puzzles/hard/hard_01.txt")
+puzzle_hard = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+
+
+def test_escalate_fixpoint():
+    """
+    Test that escalating the techniques reaches the same candidates as applying them all
+    """
+    candidates = init_candidates(puzzle_hard)
+    fixed = all_elimination(candidates)
+    escalated = all_elimination(candidates, escalate=True)
+    assert np.array_equal(fixed, escalated)
+
+    masks = bitmask.init_masks(puzzle_hard)
+    fixed = bitmask.all_elimination(masks)
+    stats = {}
+    escalated = bitmask.all_elimination(masks, stats, escalate=True)
+    assert np.array_equal(fixed, escalated)
+    assert np.array_equal(
+        bitmask.masks_to_candidates(fixed), all_elimination(candidates)
+    )
+
+    # the most expensive technique is applied less often
+    fixed_stats = {}
+    bitmask.all_elimination(masks, fixed_stats)
+    assert stats["calls"]["pointing"] <= fixed_stats["calls"]["pointing"]
+
+
+def test_subset_of_techniques():
+    """
+    Test applying only some techniques, in every representation
+    """
+    candidates = all_elimination(init_candidates(puzzle), techniques=SINGLES)
+    masks = bitmask.all_elimination(bitmask.init_masks(puzzle), techniques=SINGLES)
+    assert np.array_equal(bitmask.masks_to_candidates(masks), candidates)
+
+    places = trail.init_places(bitmask.init_masks(puzzle).tolist())
+    stats = {}
+    assert trail.propagate(places, [], stats=stats, techniques=SINGLES)
+    assert np.array_equal(np.array(places[:81], dtype=np.uint16), masks)
+    assert stats["calls"]["obvious_pairs"] == stats["calls"]["pointing"] == 0
+
+    # the singles alone do not solve the puzzle
+    assert sum(len(cell) for cell in candidates.flat) > 81
+
+
+def test_schedule_policies():
+    """
+    Test the techniques chosen by each policy
+    """
+    assert schedule_techniques(None) == (TECHNIQUES, False, None)
+    assert schedule_techniques(new_scheduler("escalate"), 40) == (
+        TECHNIQUES,
+        True,
+        None,
+    )
+
+    scheduler = new_scheduler("depth", singles_depth=3)
+    assert schedule_techniques(scheduler, 3)[0] == TECHNIQUES
+    assert schedule_techniques(scheduler, 4)[0] == SINGLES
+
+    with pytest.raises(AssertionError):
+        new_scheduler("unknown")
+
+
+def test_adaptive_skips():
+    """
+    Test that the adaptive policy skips a technique which does not pay off, and measures
+    the techniques at probe nodes only
+    """
+    scheduler = new_scheduler("adaptive")
+    rates = scheduler["stats"]
+    for name in TECHNIQUES:
+        rates["calls"][name] = WARMUP_CALLS
+        rates["seconds"][name] = 1.0
+        rates["removed"][name] = 100
+    rates["removed"]["pointing"] = 0
+
+    # probe node: every technique, measured in the scheduler
+    techniques, escalate, measure = schedule_techniques(scheduler, 5)
+    assert techniques == TECHNIQUES and escalate and measure is rates
+
+    # other nodes: pointing is skipped, and nothing is measured
+    for _ in range(PROBE_INTERVAL - 1):
+        techniques, escalate, measure = schedule_techniques(scheduler, 5)
+        assert techniques == TECHNIQUES[:3] and measure is None
+
+    # the singles are never skipped
+    rates["removed"]["hidden_singles"] = 0
+    assert schedule_techniques(scheduler, 5)[0] == TECHNIQUES  # probe node
+    assert "hidden_singles" in schedule_techniques(scheduler, 5)[0]
+
+
+@pytest.mark.parametrize("method", ["sets", "bitmask", "trail"])
+@pytest.mark.parametrize("policy", POLICIES)
+def test_scheduled_search(method, policy):
+    """
+    Test that every policy finds the solution with every search method
+    """
+    scheduler = new_scheduler(policy, singles_depth=1)
+    for grid in (puzzle, puzzle_hard):
+        solution = backtracker(grid, method=method, schedule=scheduler)
+        assert validate_solution(grid, solution) == "Valid"
@@ -1,6 +1,7 @@
 """
 Robust testing for main script: solve_sudoku.py
 """
+import json
 import subprocess
 import os
 
@@ -62,7 +63,10 @@ def test_multiple_solution():
         capture_output=True,
         text=True,
     )
-    assert result.stdout.startswith("4 Solution(s) Found")
+    assert "4 Solution(s) Found" in result.stdout
+
+    # solutions are printed (and saved) as soon as they are found
+    assert result.stdout.index("Solution saved") < result.stdout.index("Found")
 
     # remove files created
     for n in range(1, 5):
@@ -73,6 +77,93 @@ def test_multiple_solution():
         os.rmdir("solutions/")
 
 
+def test_solver_backends():
+    """
+    Test that solver finds solutions with every backend
+    """
+    filepath = "tests/test_puzzles/10_solutions.txt"
+    for backend in ["sets", "bitmask", "trail", "dlx"]:
+        result = subprocess.run(
+            ["python", path_to_solver, filepath, "2", "--backend", backend],
+            capture_output=True,
+            text=True,
+        )
+        assert "2 Solution(s) Found" in result.stdout, backend
+
+        for n in range(1, 3):
+            os.remove("solutions/10_solutions_solution" + str(n) + ".txt")
+
+    if not os.listdir("solutions/"):
+        os.rmdir("solutions/")
+
+    # unknown backend
+    result = subprocess.run(
+        ["python", path_to_solver, filepath, "--backend", "unknown"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+
+
+def test_solver_count():
+    """
+    Test that solver can count solutions, up to a limit
+    """
+    filepath = "tests/test_puzzles/10_solutions.txt"
+    for args, expected in [
+        (["--count"], "At least 2 Solution(s) Found"),
+        (["--count", "4"], "At least 4 Solution(s) Found"),
+        (["--count", "20"], "10 Solution(s) Found"),
+    ]:
+        result = subprocess.run(
+            ["python", path_to_solver, filepath] + args,
+            capture_output=True,
+            text=True,
+        )
+        assert result.stdout.startswith(expected), args
+
+    # unsolvable puzzle
+    result = subprocess.run(
+        ["python", path_to_solver, unsolvable_filepaths[0], "--count"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.startswith("0 Solution(s) Found")
+
+
+def test_solver_stream():
+    """
+    Test that solver can stream one-line puzzles from stdin, one solution line each
+    """
+    lines = [
+        "003020600900305001001806400008102900700000008006708200002609500800203009005010300",
+        "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+        "not a puzzle",
+        "11" + "." * 79,
+    ]
+    for args in [["--stream", "-"], ["--stream", "-", "--workers", "2"]]:
+        result = subprocess.run(
+            ["python", path_to_solver] + args,
+            input="\n".join(lines) + "\n",
+            capture_output=True,
+            text=True,
+        )
+        output = result.stdout.splitlines()
+        assert len(output) == len(lines), args
+        assert output[0].startswith("483921657")
+        assert output[1].startswith("417369825")
+        assert output[2:] == ["INVALID", "UNSOLVABLE"]
+
+    # dlx backend cannot be streamed
+    result = subprocess.run(
+        ["python", path_to_solver, "--stream", "-", "--backend", "dlx"],
+        input=lines[0],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+
+
 def test_solver_on_unsolvable():
     """
     Test that solver can determine when puzzles are unsolvable
@@ -128,3 +219,125 @@ def test_solver_error_raising():
         ["python", path_to_solver, filepath1, filepath2], capture_output=True, text=True
     )
     assert result.returncode != 0, "No errors raised when passing two sudoku files"
+
+    # asking for a number of solutions below 1
+    for count in ("0", "-1"):
+        result = subprocess.run(
+            ["python", path_to_solver, "tests/test_puzzles/10_solutions.txt", count],
+            capture_output=True,
+            text=True,
+        )
+        assert (
+            result.returncode != 0
+        ), f"No errors raised when asking for {count} solutions"
+        assert "the number of solutions must be at least 1" in result.stderr
+
+
+def test_solver_stats():
+    """
+    Test that solver writes statistics to stderr, as text or JSON
+    """
+    result = subprocess.run(
+        ["python", path_to_solver, hardest + "02.txt", "--backend", "trail", "--stats"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.startswith("Solution Found")
+    assert result.stderr.startswith("Search nodes:")
+
+    result = subprocess.run(
+        ["python", path_to_solver, hardest + "02.txt", "--count", "--stats", "json"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.startswith("1 Solution(s) Found")
+    stats = json.loads(result.stderr)
+    assert stats["nodes"] >= 1 and stats["backtracks"] >= 1
+    assert set(stats["removed"]) == {
+        "naked_singles",
+        "hidden_singles",
+        "obvious_pairs",
+        "pointing",
+    }
+
+    # no stats without the option
+    result = subprocess.run(
+        ["python", path_to_solver, hardest + "02.txt"], capture_output=True, text=True
+    )
+    assert result.stderr == ""
+
+
+def test_solver_schedule():
+    """
+    Test that solver finds the solution with every scheduling policy
+    """
+    for policy in ["fixed", "escalate", "depth", "adaptive"]:
+        result = subprocess.run(
+            [
+                "python",
+                path_to_solver,
+                hardest + "02.txt",
+                "--backend",
+                "bitmask",
+                "--schedule",
+                policy,
+                "--singles-depth",
+                "2",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.stdout.startswith("Solution Found"), policy
+        os.remove("solutions/hardest_02_solution.txt")
+
+    if not os.listdir("solutions/"):
+        os.rmdir("solutions/")
+
+    # not supported by dlx
+    result = subprocess.run(
+        ["python", path_to_solver, hardest + "02.txt", "--backend", "dlx"]
+        + ["--schedule", "escalate"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+
+
+def test_solver_other_sizes():
+    """
+    Test that solver solves and counts the solutions of 16x16 and 25x25 puzzles
+    """
+    for filepath in [
+        "tests/test_puzzles/sizes/16x16_01.txt",
+        "tests/test_puzzles/sizes/25x25_01.txt",
+    ]:
+        result = subprocess.run(
+            ["python", path_to_solver, filepath], capture_output=True, text=True
+        )
+        assert result.stdout.startswith("Solution Found"), filepath
+
+        # the solution is saved in the token format
+        filename = filepath.split(".txt")[0].split("/")[-1]
+        savepath = "solutions/" + filename + "_solution.txt"
+        with open(savepath, "r") as file:
+            assert "|" in file.read()
+        os.remove(savepath)
+
+    if not os.listdir("solutions/"):
+        os.rmdir("solutions/")
+
+    result = subprocess.run(
+        ["python", path_to_solver, "tests/test_puzzles/sizes/16x16_01.txt", "--count"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.startswith("1 Solution(s) Found")
+
+    # the backends are 9x9 only
+    result = subprocess.run(
+        ["python", path_to_solver, "tests/test_puzzles/sizes/16x16_01.txt"]
+        + ["--backend", "dlx"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
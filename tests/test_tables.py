@@ -0,0 +1,92 @@
+"""
+Robust testing for the lookup tables in engine/tables.py
+"""
+
+import numpy as np
+import pytest
+from src.engine.tables import (
+    ROW_OF,
+    COL_OF,
+    BLOCK_OF,
+    SQUARE,
+    UNITS,
+    SQUARE_UNITS,
+    PEERS,
+    INTERSECTIONS,
+    POPCOUNT,
+    UNITS_ARRAY,
+    PEERS_ARRAY,
+    INTERSECTION_ARRAY,
+    LINE_REST_ARRAY,
+    BLOCK_REST_ARRAY,
+    grid_tables,
+)
+
+
+def test_square_maps():
+    """
+    Test the maps between flat indices and (row, column, block)
+    """
+    for i in range(9):
+        for j in range(9):
+            s = SQUARE[i][j]
+            assert s == 9 * i + j
+            assert (ROW_OF[s], COL_OF[s]) == (i, j)
+            assert BLOCK_OF[s] == 3 * (i // 3) + j // 3
+
+
+def test_units_and_peers():
+    """
+    Test the units, the units of each square and the peers of each square
+    """
+    assert len(UNITS) == 27
+    assert all(sorted(unit) == sorted(set(unit)) and len(unit) == 9 for unit in UNITS)
+
+    # the squares of block 4 (the centre block)
+    assert UNITS[22] == (30, 31, 32, 39, 40, 41, 48, 49, 50)
+
+    for s in range(81):
+        assert all(s in UNITS[unit] for unit in SQUARE_UNITS[s])
+        assert len(PEERS[s]) == 20 and s not in PEERS[s]
+        assert set(PEERS[s]) == set().union(*(UNITS[u] for u in SQUARE_UNITS[s])) - {s}
+
+    assert np.array_equal(UNITS_ARRAY, UNITS)
+    assert np.array_equal(PEERS_ARRAY, PEERS)
+
+    # the NumPy forms are immutable
+    with pytest.raises(ValueError):
+        UNITS_ARRAY[0, 0] = 1
+
+
+def test_intersections():
+    """
+    Test the intersections of blocks with rows and columns
+    """
+    assert len(INTERSECTIONS) == 54
+    for block, line, squares, line_rest, block_rest in INTERSECTIONS:
+        assert set(squares) | set(line_rest) == set(UNITS[line])
+        assert set(squares) | set(block_rest) == set(UNITS[block])
+        assert len(squares) == 3 and not set(line_rest) & set(block_rest)
+
+    assert INTERSECTION_ARRAY.shape == (54, 3)
+    assert LINE_REST_ARRAY.shape == BLOCK_REST_ARRAY.shape == (54, 6)
+
+    assert POPCOUNT[0b101101] == 4 and len(POPCOUNT) == 512
+
+
+def test_grid_tables():
+    """
+    Test the tables of grids of other sizes, and that they match the 9x9 tables
+    """
+    tables = grid_tables(3)
+    assert tables["UNITS"] == UNITS and tables["PEERS"] == PEERS
+    assert tables["INTERSECTIONS"] == INTERSECTIONS
+
+    for box in (2, 4, 5):
+        tables = grid_tables(box)
+        n = tables["size"]
+        assert n == box * box and len(tables["UNITS"]) == 3 * n
+        assert all(len(set(unit)) == n for unit in tables["UNITS"])
+        assert all(len(peers) == 3 * n - 2 * box - 1 for peers in tables["PEERS"])
+        assert len(tables["INTERSECTIONS"]) == 2 * n * box
+        assert tables["BLOCK_OF"][n * (n - 1)] == n - box  # bottom left square
@@ -0,0 +1,130 @@
+"""
+Robust testing for in-place backtracking with an undo trail (engine/trail.py)
+"""
+
+from src.toolkit.input import load_puzzle
+from src.toolkit.validation import validate_solution
+from src.engine.backtracking import backtracker
+from src.engine.bitmask import init_masks
+from src.engine.trail import (
+    init_places,
+    eliminate,
+    undo,
+    propagate,
+    masks_to_puzzle,
+    solve,
+)
+
+
+def test_eliminate_and_undo():
+    """
+    Test that eliminations are recorded on the trail and can be undone
+    """
+    puzzle = load_puzzle("tests/test_puzzles/hardest/hardest_01.txt")
+    masks = init_places(init_masks(puzzle).tolist())
+    original = masks.copy()
+    trail = []
+
+    # eliminating a candidate that is present records the change, followed
+    # by the changes to the places of the number in the square's 3 units
+    square = 2  # (0, 2) is empty and has several candidates
+    lowest = masks[square] & -masks[square]
+    assert eliminate(masks, trail, square, lowest)
+    assert len(trail) == 4 and trail[0] == (square, original[square])
+    assert masks == init_places(masks)
+
+    # eliminating a candidate that is not present records nothing
+    eliminate(masks, trail, square, lowest)
+    assert len(trail) == 4
+
+    # eliminating every candidate is reported as a contradiction
+    assert not eliminate(masks, trail, square, 0x1FF)
+
+    # rolling back to the start of the trail restores the grid
+    undo(masks, trail, 0)
+    assert masks == original and trail == []
+
+
+def test_propagate():
+    """
+    Test in-place propagation of all elimination techniques
+    """
+    # all 3 easy puzzles can be solved using only elimination techniques
+    for file in ["01.txt", "02.txt", "03.txt"]:
+        puzzle = load_puzzle("tests/test_puzzles/easy/easy_" + file)
+        masks = init_places(init_masks(puzzle).tolist())
+        trail = []
+        assert propagate(masks, trail)
+        assert validate_solution(puzzle, masks_to_puzzle(masks)) == "Valid"
+
+        # the places index is kept consistent with the squares
+        assert masks == init_places(masks)
+
+        # every change is on the trail, so the grid can be fully restored
+        undo(masks, trail, 0)
+        assert masks == init_places(init_masks(puzzle).tolist())
+
+    # unsolvable puzzle
+    puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_01.txt")
+    assert not propagate(init_places(init_masks(puzzle).tolist()), [])
+
+
+def test_propagate_from_mark():
+    """
+    Test propagating only the changes made since a mark
+    """
+    puzzle = load_puzzle("tests/test_puzzles/hardest/hardest_02.txt")
+    masks = init_places(init_masks(puzzle).tolist())
+    trail = []
+    assert propagate(masks, trail)
+
+    # place the lowest candidate of the first unsolved square
+    square = next(s for s in range(81) if masks[s] & (masks[s] - 1))
+    mark = len(trail)
+    eliminate(masks, trail, square, masks[square] & (masks[square] - 1))
+
+    # propagating from the mark reaches the same grid as examining every entry
+    full = masks.copy()
+    result = propagate(full, [])
+    assert propagate(masks, trail, mark) == result
+    if result:
+        assert masks == full
+
+
+def test_solve():
+    """
+    Test that the search leaves the grid as it found it
+    """
+    puzzle = load_puzzle("tests/test_puzzles/10_solutions.txt")
+    masks = init_places(init_masks(puzzle).tolist())
+    original = masks.copy()
+    trail = []
+    solutions = []
+
+    solve(masks, trail, solutions, num_solutions=10)
+
+    assert len(solutions) == 10
+    assert masks == original and trail == []
+
+
+def test_trail_backtracker():
+    """
+    Test backtracking using the trail method
+    """
+    for file in [
+        "hard/hard_01.txt",
+        "hardest/hardest_01.txt",
+        "hardest/hardest_02.txt",
+    ]:
+        puzzle = load_puzzle("tests/test_puzzles/" + file)
+        solution = backtracker(puzzle, method="trail")
+        assert validate_solution(puzzle, solution) == "Valid"
+
+    puzzle = load_puzzle("tests/test_puzzles/10_solutions.txt")
+    solutions = backtracker(puzzle, num_solutions=4, method="trail")
+    assert isinstance(solutions, list) and len(solutions) == 4
+    assert all(validate_solution(puzzle, s) == "Valid" for s in solutions)
+
+    for file in ["01.txt", "02.txt", "03.txt"]:
+        puzzle = load_puzzle("tests/test_puzzles/unsolvable/unsolvable_" + file)
+        assert backtracker(puzzle, method="trail") == "UNSOLVABLE"
@@ -3,7 +3,25 @@ Robust testing for toolkit/validation.py
 """
 
 import numpy as np
-from src.toolkit.validation import validate_puzzle, validate_filled, validate_solution
+from src.toolkit.validation import (
+    validate_puzzle,
+    validate_filled,
+    validate_solution,
+    validate_puzzle_many,
+    validate_filled_many,
+    validate_solution_many,
+    VALID,
+    INVALID_DIMENSIONS,
+    INVALID_ENTRIES,
+    DUPLICATE_ROWS,
+    DUPLICATE_COLUMNS,
+    DUPLICATE_BLOCKS,
+    UNFILLED,
+    PUZZLE_INVALID,
+    INCONSISTENT_GIVENS,
+    MESSAGES,
+)
+from src.engine.grids import sample_grid
 
 
 def test_validate_filled():
@@ -213,3 +231,104 @@ def test_validate_puzzle():
         ]
     )
     assert validate_puzzle(puzzle) == "Duplicate numbers in column(s)"
+
+
+def test_validate_other_sizes():
+    """
+    Test validating puzzles of other sizes than 9x9
+    """
+    grid = np.array([[1, 2, 3, 4], [3, 4, 1, 2], [2, 1, 4, 3], [4, 3, 2, 1]])
+    assert validate_filled(grid) == "Valid"
+
+    puzzle = grid.copy()
+    puzzle[0, 0] = 0
+    assert validate_solution(puzzle, grid) == "Valid"
+    assert validate_solution(puzzle, np.zeros((9, 9), dtype=int)) != "Valid"
+
+    # numbers above 4 are invalid in a 4x4 puzzle
+    puzzle[0, 0] = 5
+    assert validate_puzzle(puzzle) == "Invalid entries"
+
+    # duplicate in the first block only
+    puzzle = np.zeros((4, 4), dtype=int)
+    puzzle[0, 0] = puzzle[1, 1] = 1
+    assert validate_puzzle(puzzle) == "Duplicate numbers in block(s)"
+
+    # 16x16 puzzles with numbers up to 16
+    puzzle = np.zeros((16, 16), dtype=int)
+    puzzle[0, 0], puzzle[15, 15] = 16, 16
+    assert validate_puzzle(puzzle) == "Valid"
+    puzzle[0, 15] = 16
+    assert validate_puzzle(puzzle) == "Duplicate numbers in row(s)"
+
+    # only n x n puzzles with n = 4, 9, 16 or 25
+    for shape in ((10, 10), (36, 36), (1, 1), (81,)):
+        assert validate_puzzle(np.zeros(shape, dtype=int)) == "Invalid dimensions"
+
+
+def test_validate_many():
+    """
+    Test the batch validators, and that they agree with validating each grid
+    """
+    rng = np.random.default_rng(0)
+    solution = sample_grid(3, rng)
+    puzzle = solution.copy()
+    puzzle[rng.random((9, 9)) < 0.6] = 0
+
+    grids = np.array([solution] * 8)
+    grids[1, 0, 0] = 10  # invalid entry
+    grids[2, 4, :2] = grids[2, 4, 1::-1]  # swapped in a row: columns and blocks
+    grids[3, :2, 4] = grids[3, 1::-1, 4]  # swapped in a column: rows and blocks
+    grids[4, 0, 0] = 0  # unfilled
+    grids[5] = sample_grid(3, rng)  # another solution, inconsistent with the puzzle
+    grids[6] = 0
+    grids[6, 0, 0] = grids[6, 2, 0] = 5  # duplicate in a column and a block
+    grids[7] = np.add.outer(range(9), range(9)) % 9 + 1  # Latin square: blocks only
+
+    expected = [
+        VALID,
+        INVALID_ENTRIES,
+        DUPLICATE_COLUMNS,
+        DUPLICATE_ROWS,
+        UNFILLED,
+        VALID,
+        DUPLICATE_COLUMNS,
+        DUPLICATE_BLOCKS,
+    ]
+    assert list(validate_filled_many(grids)) == expected
+
+    # same messages as the validators of a single grid
+    for grid, code in zip(grids, validate_puzzle_many(grids)):
+        assert MESSAGES[code] == validate_puzzle(grid)
+    for grid, code in zip(grids, validate_filled_many(grids)):
+        assert validate_filled(grid).endswith(MESSAGES[code])
+    for grid, code in zip(grids, validate_solution_many(puzzle, grids)):
+        assert validate_solution(puzzle, grid).endswith(MESSAGES[code])
+
+    codes = validate_solution_many(puzzle, grids)
+    assert codes[0] == VALID and codes[5] == INCONSISTENT_GIVENS
+
+    # one puzzle per solution
+    puzzles = np.array([puzzle] * 8)
+    puzzles[0, 0, 0] = 10
+    codes = validate_solution_many(puzzles, grids)
+    assert codes[0] == PUZZLE_INVALID and codes[5] == INCONSISTENT_GIVENS
+
+    # float entries, other sizes and other dimensions
+    assert list(validate_puzzle_many(np.array([puzzle, puzzle + 0.5]))) == [
+        VALID,
+        INVALID_ENTRIES,
+    ]
+    grids_16 = np.array([sample_grid(4, rng) for _ in range(3)])
+    grids_16[1, 0, 0] = 0
+    assert list(validate_filled_many(grids_16)) == [VALID, UNFILLED, VALID]
+    assert list(validate_solution_many(puzzle, grids_16)) == [
+        INCONSISTENT_GIVENS,
+        UNFILLED,
+        INCONSISTENT_GIVENS,
+    ]
+    assert (
+        list(validate_puzzle_many(np.zeros((2, 10, 10), dtype=int)))
+        == [INVALID_DIMENSIONS] * 2
+    )
+    assert len(validate_puzzle_many(np.zeros((0, 9, 9), dtype=int))) == 0